@@ -0,0 +1,190 @@
+'''
+Synthetic project share for the benchmarks.
+
+Generates a share of whls made from the example whl, a scripts.db pointing at it and a maya
+scripts folder with some of the packages installed (at an older version, so they show up
+as outdated).
+
+share/<category>/<package>/<package>-<version>-py2-none-any.whl
+
+Usage: python benchmarks/generate_share.py <output folder> [--categories N] [--packages N] [--versions N]
+                                           [--duplicates FRACTION] [--installed FRACTION]
+'''
+
+import os
+import sys
+import base64
+import shutil
+import hashlib
+import sqlite3
+import zipfile
+import argparse
+
+PKG_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pkg")
+if PKG_FOLDER not in sys.path:
+    sys.path.insert(0, PKG_FOLDER)
+import script_loader_pkg.script_loader_db as script_loader_db
+import script_loader_pkg.script_loader_extract as script_loader_extract
+
+TEMPLATE_WHL = os.path.join(os.path.dirname(PKG_FOLDER), "example_whls", "whls", "animation",
+                            "example_pkg_01-1.2.3-py2-none-any.whl")
+TEMPLATE_NAME = "example_pkg_01"
+TEMPLATE_VERSION = "1.2.3"
+TEMPLATE_TOP_LEVEL = "example_pkg_1"
+
+
+class ShareLayout(object):
+    """
+    Paths and counts of a generated share
+    """
+    def __init__(self, folder):
+        """
+        init function
+        Args:
+            folder: output folder
+        """
+        self.folder = folder.replace("\\", "/")
+        self.share = self.folder + "/share"
+        self.database_path = self.folder + "/scripts.db"
+        self.scripts_folder = self.folder + "/scripts"
+        self.whls = []  # (path, category, name, version)
+        self.installed = []  # names installed into the scripts folder
+        self.duplicates = 0  # packages that are in more than one category
+
+
+def record_hash(data):
+    """
+    Args:
+        data: file contents
+    Returns: RECORD hash of the data
+    """
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode("ascii")
+    return "sha256=" + digest
+
+
+def read_template(template=TEMPLATE_WHL):
+    """
+    Args:
+        template: path to the template whl
+    Returns: list of (member name, data), without RECORD
+    """
+    archive = zipfile.ZipFile(template)
+    try:
+        return [(name, archive.read(name)) for name in archive.namelist() if not name.endswith("/RECORD")]
+    finally:
+        archive.close()
+
+
+def make_wheel(members, folder, name, version):
+    """
+    Write a whl made from the template with a new name and version
+    Args:
+        members: template members from read_template
+        folder: folder to write the whl to
+        name: distribution name, with underscores
+        version: version
+    Returns: path to the whl
+    """
+    top_level = name + "_mod"
+    dist_info = "%s-%s.dist-info" % (name, version)
+    template_dist_info = "%s-%s.dist-info" % (TEMPLATE_NAME, TEMPLATE_VERSION)
+    path = "%s/%s-%s-py2-none-any.whl" % (folder, name, version)
+    record = []
+    archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+    try:
+        for member, data in members:
+            member = member.replace(template_dist_info, dist_info).replace(TEMPLATE_TOP_LEVEL + "/", top_level + "/")
+            if member.endswith("/METADATA"):
+                lines = []
+                for line in data.decode("utf-8").split("\n"):
+                    if line.startswith("Name:"):
+                        line = "Name: " + name.replace("_", "-")
+                    elif line.startswith("Version:"):
+                        line = "Version: " + version
+                    lines.append(line)
+                data = "\n".join(lines).encode("utf-8")
+            elif member.endswith("/top_level.txt"):
+                data = (top_level + "\n").encode("utf-8")
+            archive.writestr(member, data)
+            record.append("%s,%s,%d" % (member, record_hash(data), len(data)))
+        record.append(dist_info + "/RECORD,,")
+        archive.writestr(dist_info + "/RECORD", ("\n".join(record) + "\n").encode("utf-8"))
+    finally:
+        archive.close()
+    return path
+
+
+def generate(folder, categories=10, packages=20, versions=2, duplicates=0.05, installed=0.2):
+    """
+    Generate a synthetic share, database and scripts folder. An existing share in the folder
+    is replaced.
+    Args:
+        folder: output folder
+        categories: number of categories, each with its own project folder
+        packages: packages per category
+        versions: whls per package
+        duplicates: fraction of packages that are also published in the next category
+        installed: fraction of packages installed into the scripts folder, at their oldest version
+    Returns: ShareLayout
+    """
+    layout = ShareLayout(folder)
+    for path in (layout.share, layout.scripts_folder):
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    if os.path.exists(layout.database_path):
+        os.remove(layout.database_path)
+    members = read_template()
+    script_loader_db.create_schema(layout.database_path)
+    con = sqlite3.connect(layout.database_path)
+    try:
+        with con:
+            for c in range(categories):
+                category = "Category%02d" % c
+                project_folder = "%s/%s" % (layout.share, category.lower())
+                con.execute("INSERT INTO categories (name, sort_order) VALUES (?, ?)", (category, c))
+                con.execute("INSERT INTO projects (name, path, category_id, usercount) "
+                            "VALUES (?, ?, (SELECT id FROM categories WHERE name = ?), 0)",
+                            (category, project_folder, category))
+                for p in range(packages):
+                    name = "bench_pkg_%02d_%04d" % (c, p)
+                    package_folder = project_folder + "/" + name
+                    os.makedirs(package_folder)
+                    oldest = None
+                    for v in range(versions):
+                        path = make_wheel(members, package_folder, name, "1.%d.0" % v)
+                        layout.whls.append((path, category, name, "1.%d.0" % v))
+                        oldest = oldest or path
+                    if p < int(packages * duplicates) and categories > 1:  # same package in the next category
+                        other = "%s/category%02d/%s" % (layout.share, (c + 1) % categories, name + "_copy")
+                        os.makedirs(other)
+                        path = make_wheel(members, other, name, "0.9.0")
+                        layout.whls.append((path, "Category%02d" % ((c + 1) % categories), name, "0.9.0"))
+                        layout.duplicates += 1
+                    if p < int(packages * installed):
+                        script_loader_extract.extract_wheel(oldest, layout.scripts_folder)
+                        layout.installed.append(name)
+    finally:
+        con.close()
+    return layout
+
+
+def main(args):
+    """
+    Args:
+        args: command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic script loader share.")
+    parser.add_argument("folder")
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--packages", type=int, default=20, help="packages per category")
+    parser.add_argument("--versions", type=int, default=2, help="whls per package")
+    parser.add_argument("--duplicates", type=float, default=0.05)
+    parser.add_argument("--installed", type=float, default=0.2)
+    args = parser.parse_args(args)
+    layout = generate(args.folder, args.categories, args.packages, args.versions, args.duplicates, args.installed)
+    print("%d whls, %d duplicates, %d installed: %s" % (len(layout.whls), layout.duplicates, len(layout.installed),
+                                                       layout.folder))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
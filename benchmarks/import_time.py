@@ -0,0 +1,75 @@
+'''
+Import time of the script loader package.
+
+Imports the package and its modules in fresh interpreters, prints the time it took and
+checks that importing the package doesn't load Qt, pkg_resources or the database.
+
+Usage: python benchmarks/import_time.py [python or mayapy executable] [--repeat N]
+'''
+
+import os
+import sys
+import json
+import subprocess
+
+PKG_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pkg")
+MODULES = ["script_loader_pkg", "script_loader_pkg.script_loader_db", "script_loader_pkg.script_loader_catalog",
+           "script_loader_pkg.script_loader_batch"]
+HEAVY_MODULES = ["PySide2", "pkg_resources", "sqlite3", "script_loader_pkg.script_loader"]  # must stay lazy
+MAX_PACKAGE_IMPORT_MS = 100.0  # regression threshold for "import script_loader_pkg"
+
+MEASURE = '''
+import sys, time, json
+start = time.time()
+import %s
+elapsed = (time.time() - start) * 1000.0
+print(json.dumps({"ms": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+'''
+
+
+def measure(python, module, repeat=5):
+    """
+    Import a module in fresh interpreters
+    Args:
+        python: python executable
+        module: module to import
+        repeat: number of interpreters, the fastest run is kept
+    Returns: (milliseconds, heavy modules that got loaded)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PKG_FOLDER + os.pathsep + env.get("PYTHONPATH", "")
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.check_output([python, "-c", MEASURE % (module, HEAVY_MODULES)], env=env)
+        result = json.loads(output.decode("utf-8").strip().splitlines()[-1])
+        if best is None or result["ms"] < best:
+            best = result["ms"]
+        loaded = result["loaded"]
+    return best, loaded
+
+
+def main(args):
+    """
+    Args:
+        args: command line arguments
+    Returns: exit code, 1 if the package import regressed
+    """
+    repeat = 5
+    if "--repeat" in args:
+        repeat = int(args[args.index("--repeat") + 1])
+        del args[args.index("--repeat"):args.index("--repeat") + 2]
+    python = args[0] if args else sys.executable
+    failed = False
+    for module in MODULES:
+        ms, loaded = measure(python, module, repeat)
+        print("%-45s %8.1f ms  %s" % (module, ms, ", ".join(loaded)))
+        if module == "script_loader_pkg" and (loaded or ms > MAX_PACKAGE_IMPORT_MS):
+            print("Importing the package loaded %s in %.1f ms, it should stay under %.0f ms without loading "
+                  "Qt or the database." % (", ".join(loaded) or "nothing heavy", ms, MAX_PACKAGE_IMPORT_MS))
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
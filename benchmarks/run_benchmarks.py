@@ -0,0 +1,362 @@
+'''
+Benchmark suite for the script loader.
+
+Generates synthetic shares of increasing size (see generate_share.py) and times the refresh
+and install steps on each of them, so the scaling of every step can be seen:
+
+    folder_contents_cold   Database.get_folder_contents without a previous scan
+    folder_contents_warm   Database.get_folder_contents with the folder listings of the previous scan
+    check_for_duplicates   Database.check_for_duplicates
+    entries_cold           build_entry for every whl with an empty metadata cache
+    entries_warm           build_entry for every whl with a filled metadata cache
+    index_listing_cold     build_snapshot with the share served as simple indexes (simple_index_server.py)
+    index_listing_warm     the same with the page listings of the previous scan, answered with 304
+    index_entries_cold     build_entry for every whl of the indexes, reading .metadata files
+    model_build            CatalogModel filled from scratch (offscreen Qt, skipped without PySide2)
+    model_update           CatalogModel updated with unchanged entries
+    install_local          what ScriptActions.install_local runs, for INSTALL_COUNT whls one at a time
+    uninstall_local        what ScriptActions.uninstall_local runs, for the same whls
+
+Each benchmark is run --repeat times and the fastest run is kept. Results can be stored as a
+baseline in benchmarks/baselines and compared against later.
+
+Usage: python benchmarks/run_benchmarks.py [--sizes 200,1000,5000] [--repeat 3] [--work DIR]
+                                           [--save NAME] [--compare NAME]
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+
+import generate_share
+import simple_index_server
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_db as script_loader_db
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_metadata_cache as script_loader_metadata_cache
+import script_loader_pkg.script_loader_batch as script_loader_batch
+import script_loader_pkg.script_loader_core as script_loader_core
+import script_loader_pkg.script_loader_search as script_loader_search
+import script_loader_pkg.script_loader_catalog_cache as script_loader_catalog_cache
+
+BASELINE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+CATEGORIES = 10
+VERSIONS = 2
+INSTALL_COUNT = 5  # whls installed and uninstalled per run
+BENCHMARKS = (
+    "folder_contents_cold",
+    "folder_contents_warm",
+    "check_for_duplicates",
+    "entries_cold",
+    "entries_warm",
+    "index_listing_cold",
+    "index_listing_warm",
+    "index_entries_cold",
+    "search_build",
+    "search_typing",
+    "catalog_save",
+    "catalog_restore",
+    "model_build",
+    "model_update",
+    "model_filter",
+    "install_local",
+    "uninstall_local",
+)
+SEARCH_QUERY = "bench pkg 0001"  # typed one character at a time
+REGRESSION_RATIO = 1.25  # slower than the baseline by more than this is reported as a regression
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Hide the log prints of the timed code
+    """
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def best_time(function, repeat, setup=None):
+    """
+    Args:
+        function: function to time
+        repeat: number of runs
+        setup: function run before every run, not timed
+    Returns: fastest run in milliseconds
+    """
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with quiet():
+            start = time.time()
+            function()
+            elapsed = (time.time() - start) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def qt_application():
+    """
+    Returns: QApplication on the offscreen platform, None if PySide2 is not available
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide2 import QtWidgets
+    except ImportError:
+        return None
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def bench_size(layout, repeat, app):
+    """
+    Run the benchmarks on one share
+    Args:
+        layout: ShareLayout
+        repeat: runs per benchmark
+        app: QApplication, or None to skip the model benchmarks
+    Returns: dict of benchmark name: milliseconds
+    """
+    results = {}
+    database = script_loader_db.Database(layout.database_path)
+    projects = database.get_projects()
+
+    results["folder_contents_cold"] = best_time(lambda: database.get_folder_contents(projects), repeat)
+    folders = {}
+    whl_paths = database.get_folder_contents(projects, folders=folders)
+    results["folder_contents_warm"] = best_time(lambda: database.get_folder_contents(projects, folders), repeat)
+    results["check_for_duplicates"] = best_time(lambda: database.check_for_duplicates(whl_paths), repeat)
+
+    with quiet():
+        snapshot = database.build_snapshot()
+    cache_path = layout.folder + "/metadata_cache.json"
+    installed_index = script_loader_installed.get_installed_index(layout.scripts_folder)
+    entries = {}
+
+    def build_entries():
+        metadata_cache = script_loader_metadata_cache.MetadataCache(cache_path)
+        for category in snapshot.categories:
+            entries[category] = [script_loader_catalog.build_entry(path, category, metadata_cache, installed_index,
+                                                                   snapshot.duplicates)
+                                 for path in snapshot.paths_in_category(category)]
+        metadata_cache.save()
+
+    def clear_cache():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    results["entries_cold"] = best_time(build_entries, repeat, clear_cache)
+    results["entries_warm"] = best_time(build_entries, repeat)
+    bench_index(layout, repeat, results)
+
+    all_entries = [entry for category in snapshot.categories for entry in entries[category]]
+    keystrokes = [SEARCH_QUERY[:length] for length in range(1, len(SEARCH_QUERY) + 1)]
+    results["search_build"] = best_time(lambda: script_loader_search.SearchIndex(all_entries), repeat)
+
+    search_indexes = []
+
+    def type_query():
+        for query in keystrokes:
+            search_indexes[-1].search(query)
+
+    results["search_typing"] = best_time(type_query, repeat, lambda: search_indexes.append(
+        script_loader_search.SearchIndex(all_entries)))  # a new index, the lookups aren't cached yet
+
+    catalog_path = layout.folder + "/catalog_cache.json"
+    saved_categories = [(category, False, entries[category]) for category in snapshot.categories]
+
+    def save_catalog():
+        script_loader_catalog_cache.CatalogCache(catalog_path).save(layout.database_path, layout.scripts_folder,
+                                                                     saved_categories)
+
+    results["catalog_save"] = best_time(save_catalog, repeat)
+    results["catalog_restore"] = best_time(lambda: script_loader_catalog_cache.CatalogCache(catalog_path).load(
+        layout.database_path, layout.scripts_folder), repeat)
+
+    if app is not None:
+        import script_loader_pkg.script_loader_model as script_loader_model
+        model = script_loader_model.CatalogModel()
+
+        def fill_model():
+            model.set_categories(list(snapshot.categories))
+            for category in snapshot.categories:
+                model.set_category_entries(category, entries[category])
+
+        results["model_build"] = best_time(fill_model, repeat, lambda: model.set_categories([]))
+        results["model_update"] = best_time(fill_model, repeat)
+
+        filter_model = script_loader_model.CatalogFilterModel()
+        filter_model.setSourceModel(model)
+
+        def type_filter():
+            for query in keystrokes:
+                filter_model.set_query(query)
+
+        results["model_filter"] = best_time(type_filter, repeat, lambda: filter_model.set_query(""))
+
+    installable = []  # one whl of packages that aren't installed
+    for path, category, name, version in layout.whls:
+        if len(installable) < INSTALL_COUNT and name not in layout.installed and \
+                name not in [n for p, n in installable]:
+            installable.append((path, name))
+    names = [name for path, name in installable]
+
+    def install_all():
+        for path, name in installable:
+            script_loader_batch.install_many([(path, name)], layout.scripts_folder)
+
+    def uninstall_all():
+        for name in names:
+            script_loader_core.uninstall(name, layout.scripts_folder)
+
+    results["install_local"] = best_time(install_all, repeat, uninstall_all)
+    results["uninstall_local"] = best_time(uninstall_all, repeat, install_all)
+    return results
+
+
+def bench_index(layout, repeat, results):
+    """
+    Run the simple index benchmarks on one share, and print how much was transferred
+    Args:
+        layout: ShareLayout
+        repeat: runs per benchmark
+        results: dict of benchmark name: milliseconds, the results are added to it
+    """
+    server = simple_index_server.serve(layout.share)
+    try:
+        simple_index_server.index_database(layout.database_path, layout.folder + "/index.db", layout.share,
+                                           server.url)
+        database = script_loader_db.Database(layout.folder + "/index.db")
+        snapshots = []
+
+        def build_snapshot():
+            snapshots.append(database.build_snapshot())
+
+        results["index_listing_cold"] = best_time(build_snapshot, repeat, server.reset_counts)
+        listing_bytes = server.bytes_sent
+        results["index_listing_warm"] = best_time(lambda: database.build_snapshot(snapshots[0]), repeat,
+                                                  server.reset_counts)
+        warm_bytes = server.bytes_sent
+        cache_path = layout.folder + "/index_metadata_cache.json"
+        installed_index = script_loader_installed.get_installed_index(layout.scripts_folder)
+
+        def build_entries():
+            server.reset_counts()
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            metadata_cache = script_loader_metadata_cache.MetadataCache(cache_path)
+            for path, category in snapshots[0].whl_paths.items():
+                script_loader_catalog.build_entry(path, category, metadata_cache, installed_index,
+                                                  snapshots[0].duplicates)
+
+        results["index_entries_cold"] = best_time(build_entries, repeat)
+        print("Index: listing %.1f KB (%.1f KB with the previous listing), metadata %.1f KB, whls %.1f KB"
+              % (listing_bytes / 1024.0, warm_bytes / 1024.0, server.bytes_sent / 1024.0,
+                 sum(os.path.getsize(whl[0]) for whl in layout.whls) / 1024.0))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def report(sizes, results, baseline=None):
+    """
+    Print the scaling table, and the change against a baseline
+    Args:
+        sizes: whl counts
+        results: dict of whl count: dict of benchmark name: milliseconds
+        baseline: stored results to compare with
+    Returns: list of (benchmark, size, ratio) that are slower than the baseline by more than REGRESSION_RATIO
+    """
+    names = [name for name in BENCHMARKS if any(name in results[size] for size in sizes)]
+    print("%-22s" % "ms" + "".join("%18s" % ("%d whls" % size) for size in sizes))
+    regressions = []
+    for name in names:
+        cells = []
+        for size in sizes:
+            ms = results[size].get(name)
+            if ms is None:
+                cells.append("%18s" % "-")
+                continue
+            cell = "%.1f" % ms
+            base = (baseline or {}).get(str(size), {}).get(name)
+            if base:
+                ratio = ms / base
+                cell += " (%+d%%)" % round((ratio - 1.0) * 100)
+                if ratio > REGRESSION_RATIO:
+                    regressions.append((name, size, ratio))
+            cells.append("%18s" % cell)
+        print("%-22s" % name + "".join(cells))
+    return regressions
+
+
+def main(args):
+    """
+    Args:
+        args: command line arguments
+    Returns: exit code, 1 if --compare found a regression
+    """
+    parser = argparse.ArgumentParser(description="Script loader benchmarks.")
+    parser.add_argument("--sizes", default="200,1000,5000", help="comma separated whl counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--work", help="folder for the generated shares, a temp folder by default")
+    parser.add_argument("--save", help="store the results as this baseline")
+    parser.add_argument("--compare", help="compare the results with this baseline")
+    args = parser.parse_args(args)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    work = args.work or tempfile.mkdtemp(prefix="script_loader_bench_")
+    # keep the benchmark away from the user's caches and version pins
+    script_loader_config.local_data_folder = work + "/local"
+    script_loader_config.metadata_cache_path = work + "/local/metadata_cache.json"
+    script_loader_config.version_pins_path = work + "/local/version_pins.json"
+    script_loader_config.log_path = work + "/local/script_loader.log"
+    script_loader_config.wheel_cache_folder = work + "/wheels"
+    app = qt_application()
+    if app is None:
+        print("PySide2 is not available, skipping the model benchmarks.")
+
+    results = {}
+    try:
+        for size in sizes:
+            packages = max(1, size // (CATEGORIES * VERSIONS))
+            with quiet():
+                layout = generate_share.generate("%s/share_%d" % (work, size), CATEGORIES, packages, VERSIONS)
+            print("Share of %d whls (%d duplicates, %d installed)" % (len(layout.whls), layout.duplicates,
+                                                                      len(layout.installed)))
+            results[size] = bench_size(layout, args.repeat, app)
+    finally:
+        if not args.work:
+            shutil.rmtree(work, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_FOLDER, args.compare + ".json")) as f:
+            baseline = json.load(f)["results"]
+    regressions = report(sizes, results, baseline)
+    for name, size, ratio in regressions:
+        print("Regression: %s with %d whls is %.2fx slower than %s" % (name, size, ratio, args.compare))
+
+    if args.save:
+        if not os.path.isdir(BASELINE_FOLDER):
+            os.makedirs(BASELINE_FOLDER)
+        with open(os.path.join(BASELINE_FOLDER, args.save + ".json"), "w") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "repeat": args.repeat,
+                       "results": dict((str(size), dict((name, round(ms, 3)) for name, ms in times.items()))
+                                       for size, times in results.items())},
+                      f, indent=2, sort_keys=True)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,300 @@
+'''
+Local simple index (PEP 503 / PEP 691) stand-in for a generated share.
+
+Serves every category folder of a share as its own index, so the http catalog source can be
+tried and benchmarked without a real index server:
+
+    /<category>/simple/                  index page, the projects of the category
+    /<category>/simple/<project>/        project page, json or html depending on the Accept header
+    /files/<category>/<path>.whl         the whl, with Range support
+    /files/<category>/<path>.whl.metadata    its METADATA file (PEP 658)
+
+Pages have an ETag and answer "304 Not Modified" when it matches. Connections are kept alive.
+The server counts the requests, connections and bytes it sends.
+
+Usage: python benchmarks/simple_index_server.py <share folder> [--port 8000] [--no-metadata] [--html]
+                                               [--database scripts.db --output index.db]
+'''
+
+import os
+import re
+import sys
+import json
+import shutil
+import sqlite3
+import hashlib
+import zipfile
+import argparse
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import unquote, quote
+except ImportError:  # python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote, quote
+
+JSON_TYPE = "application/vnd.pypi.simple.v1+json"
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def normalize_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class IndexServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded http server over a share folder
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, share, metadata=True, html=False):
+        """
+        init function
+        Args:
+            address: (host, port), port 0 picks a free port
+            share: share folder with one folder per category
+            metadata: serve .metadata files and advertise them on the project pages
+            html: always answer with html pages, like a PEP 503 only index
+        """
+        HTTPServer.__init__(self, address, IndexHandler)
+        self.share = share.replace("\\", "/").rstrip("/")
+        self.metadata = metadata
+        self.html = html
+        self.hashes = {}  # path: ((size, mtime), sha256, METADATA, METADATA sha256)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+    def count(self, requests=0, connections=0, sent=0):
+        with self.lock:
+            self.requests += requests
+            self.connections += connections
+            self.bytes_sent += sent
+
+    def reset_counts(self):
+        with self.lock:
+            self.requests = self.connections = self.bytes_sent = 0
+
+    def whl_info(self, path):
+        """
+        Args:
+            path: path to a whl in the share
+        Returns: (sha256, METADATA, METADATA sha256), cached until the whl changes
+        """
+        stat = os.stat(path)
+        cached = self.hashes.get(path)
+        if cached is None or cached[0] != (stat.st_size, stat.st_mtime):
+            with open(path, "rb") as f:
+                sha256 = hashlib.sha256(f.read()).hexdigest()
+            archive = zipfile.ZipFile(path)
+            try:
+                name = [n for n in archive.namelist() if n.endswith(".dist-info/METADATA") and n.count("/") == 1][0]
+                metadata = archive.read(name)
+            finally:
+                archive.close()
+            cached = self.hashes[path] = ((stat.st_size, stat.st_mtime), sha256, metadata,
+                                          hashlib.sha256(metadata).hexdigest())
+        return cached[1:]
+
+    def projects(self, category):
+        """
+        Args:
+            category: category folder name
+        Returns: dict of normalized project name: list of whl paths relative to the category folder
+        """
+        projects = {}
+        root = self.share + "/" + category
+        for folder, sub_folders, files in os.walk(root):
+            sub_folders.sort()
+            for f in sorted(files):
+                if f.endswith(".whl"):
+                    relative = (folder.replace("\\", "/") + "/" + f)[len(root) + 1:]
+                    projects.setdefault(normalize_name(f.split("-")[0]), []).append(relative)
+        return projects
+
+
+class IndexHandler(BaseHTTPRequestHandler):
+    """
+    Answers the index, project, whl and .metadata requests
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # the headers and body are separate writes, don't wait for the ack in between
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.count(connections=1)
+
+    def log_message(self, format, *args):
+        pass  # quiet, the benchmarks count the requests instead
+
+    def send_body(self, status, body, content_type, headers=None):
+        """
+        Args:
+            status: status code
+            body: bytes
+            content_type: content type of the body
+            headers: dict of other response headers
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.server.count(sent=len(body))  # before the write, the client may look at the counts once it has the body
+        self.wfile.write(body)
+
+    def send_page(self, data, html):
+        """
+        Send a page, or 304 if the client has it already
+        Args:
+            data: PEP 691 json data of the page
+            html: html of the page
+        """
+        wants_json = JSON_TYPE in self.headers.get("Accept", "") and not self.server.html
+        body = json.dumps(data, sort_keys=True).encode("utf-8") if wants_json else html.encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(200, body, JSON_TYPE if wants_json else "text/html", {"ETag": etag, "Vary": "Accept"})
+
+    def do_GET(self):
+        self.server.count(requests=1)
+        parts = [unquote(p) for p in self.path.split("?", 1)[0].split("/") if p]
+        if len(parts) in (2, 3) and parts[1] == "simple" and os.path.isdir(self.server.share + "/" + parts[0]):
+            projects = self.server.projects(parts[0])
+            if len(parts) == 2:
+                self.index_page(sorted(projects))
+            elif normalize_name(parts[2]) in projects:
+                self.project_page(parts[0], normalize_name(parts[2]), projects[normalize_name(parts[2])])
+            else:
+                self.send_body(404, b"not found", "text/plain")
+        elif parts and parts[0] == "files" and ".." not in parts:
+            self.send_file("/".join(parts[1:]))
+        else:
+            self.send_body(404, b"not found", "text/plain")
+
+    def index_page(self, names):
+        data = {"meta": {"api-version": "1.1"}, "projects": [{"name": name} for name in names]}
+        html = "<html><body>\n%s</body></html>\n" % "".join('<a href="%s/">%s</a>\n' % (name, name) for name in names)
+        self.send_page(data, html)
+
+    def project_page(self, category, name, whls):
+        files = []
+        anchors = []
+        for relative in whls:
+            sha256, metadata, metadata_sha256 = self.server.whl_info(self.server.share + "/" + category + "/" + relative)
+            url = "/files/" + quote(category + "/" + relative)
+            filename = relative.rsplit("/", 1)[-1]
+            files.append({"filename": filename, "url": url, "hashes": {"sha256": sha256},
+                          "size": os.path.getsize(self.server.share + "/" + category + "/" + relative),
+                          "core-metadata": {"sha256": metadata_sha256} if self.server.metadata else False})
+            data_metadata = ' data-core-metadata="sha256=%s"' % metadata_sha256 if self.server.metadata else ""
+            anchors.append('<a href="%s#sha256=%s"%s>%s</a>\n' % (url, sha256, data_metadata, filename))
+        data = {"meta": {"api-version": "1.1"}, "name": name, "files": files}
+        self.send_page(data, "<html><body>\n%s</body></html>\n" % "".join(anchors))
+
+    def send_file(self, relative):
+        path = self.server.share + "/" + relative
+        if relative.endswith(".whl.metadata") and self.server.metadata and os.path.isfile(path[:-len(".metadata")]):
+            data = self.server.whl_info(path[:-len(".metadata")])[1]
+        elif relative.endswith(".whl") and os.path.isfile(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        else:
+            self.send_body(404, b"not found", "text/plain")
+            return
+        match = RANGE_PATTERN.match(self.headers.get("Range", ""))
+        if match is None:
+            self.send_body(200, data, "application/octet-stream", {"Accept-Ranges": "bytes"})
+            return
+        start, end = match.groups()
+        if not start:  # suffix range, the last bytes
+            start = max(0, len(data) - int(end))
+            end = len(data) - 1
+        else:
+            start = int(start)
+            end = min(int(end), len(data) - 1) if end else len(data) - 1
+        self.send_body(206, data[start:end + 1], "application/octet-stream",
+                       {"Content-Range": "bytes %d-%d/%d" % (start, end, len(data)), "Accept-Ranges": "bytes"})
+
+
+def serve(share, port=0, metadata=True, html=False):
+    """
+    Start a server on a background thread
+    Args:
+        share: share folder with one folder per category
+        port: port to listen on, 0 picks a free port
+        metadata: serve .metadata files
+        html: only answer with html pages
+    Returns: IndexServer, stop it with shutdown()
+    """
+    server = IndexServer(("127.0.0.1", port), share, metadata, html)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def index_database(database_path, output_path, share, url):
+    """
+    Copy a database of generate_share.py with the project folders replaced by index URLs
+    Args:
+        database_path: scripts.db of the generated share
+        output_path: database to write
+        share: share folder
+        url: URL of the server
+    """
+    shutil.copyfile(database_path, output_path)
+    share = share.replace("\\", "/").rstrip("/")
+    con = sqlite3.connect(output_path)
+    try:
+        with con:
+            for project_id, path in con.execute("SELECT id, path FROM projects").fetchall():
+                if path.startswith(share + "/"):
+                    con.execute("UPDATE projects SET path = ? WHERE id = ?",
+                                (url + "/" + path[len(share) + 1:] + "/simple/", project_id))
+            con.execute("DROP TABLE IF EXISTS catalog")
+    finally:
+        con.close()
+
+
+def main(args):
+    """
+    Args:
+        args: command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Serve a generated share as simple indexes.")
+    parser.add_argument("share")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--no-metadata", action="store_true", help="don't serve .metadata files")
+    parser.add_argument("--html", action="store_true", help="only answer with html pages")
+    parser.add_argument("--database", help="scripts.db of the generated share")
+    parser.add_argument("--output", help="database to write with the project folders pointing at the server")
+    args = parser.parse_args(args)
+    server = IndexServer(("127.0.0.1", args.port), args.share, not args.no_metadata, args.html)
+    if args.database and args.output:
+        index_database(args.database, args.output, args.share, server.url)
+        print("Wrote " + args.output)
+    print("Serving %s on %s" % (args.share, server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,6 +1,29 @@
-import script_loader_pkg.script_loader as script_loader
-reload(script_loader)
+'''
+Script loader for maya.
 
-exportUi = script_loader.ScriptLoaderUI()
-exportUi.setup_ui()
-exportUi.show()
\ No newline at end of file
+Importing the package has no side effects, Qt, the database and the installers are only
+loaded when the window is opened:
+
+import script_loader_pkg
+script_loader_pkg.show()
+'''
+
+_window = None  # keeps the open window alive
+
+
+def show():
+    """
+    Open the script loader window. The catalog is scanned after the window is shown.
+    Returns: the ScriptLoaderUI window
+    """
+    global _window
+    import script_loader_pkg.script_loader as script_loader  # loads Qt
+    if _window is not None:
+        _window.close()
+    _window = script_loader.ScriptLoaderUI()
+    _window.setup_ui()
+    _window.show()
+    return _window
+
+
+main = show
@@ -0,0 +1,86 @@
+'''
+Command line for the script loader, runs without Qt from mayapy or plain python.
+The result is written to stdout as json, log messages go to stderr.
+
+python -m script_loader_pkg list [--category NAME ...] [--target DIR] [--search QUERY]
+python -m script_loader_pkg sync [--category NAME ...] [--target DIR] [--no-update] [--no-dependencies] [--dry-run]
+python -m script_loader_pkg uninstall NAME [NAME ...] [--target DIR]
+'''
+
+import sys
+import json
+import argparse
+import script_loader_pkg.script_loader_db as script_loader_db
+
+
+def parse_args(args):
+    """
+    Args:
+        args: command line arguments
+    Returns: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(prog="python -m script_loader_pkg",
+                                     description="Install scripts from the script loader catalog.")
+    parser.add_argument("--database", help="path to the database, defaults to the path in the config")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    list_parser = commands.add_parser("list", help="list the whls in the catalog and their install state")
+    sync_parser = commands.add_parser("sync", help="install the missing and update the outdated scripts")
+    uninstall_parser = commands.add_parser("uninstall", help="uninstall scripts")
+    for sub_parser in (list_parser, sync_parser):
+        sub_parser.add_argument("--category", action="append", help="only this category, can be repeated")
+    for sub_parser in (list_parser, sync_parser, uninstall_parser):
+        sub_parser.add_argument("--target", help="scripts folder, defaults to the folder of the script loader")
+    list_parser.add_argument("--search", help="only the whls matching the query, best match first")
+    sync_parser.add_argument("--no-update", action="store_true", help="don't update outdated scripts")
+    sync_parser.add_argument("--no-dependencies", action="store_true", help="don't install dependencies")
+    sync_parser.add_argument("--dry-run", action="store_true", help="only report what would be done")
+    uninstall_parser.add_argument("names", nargs="+", help="package names")
+    return parser.parse_args(args)
+
+
+def run(args):
+    """
+    Run a command
+    Args:
+        args: argparse.Namespace
+    Returns: dict with the result
+    """
+    import script_loader_pkg.script_loader_core as script_loader_core
+    database = script_loader_db.Database(args.database)
+    if args.command == "list":
+        snapshot, entries, unknown = script_loader_core.scan(args.target, args.category, database)
+        if args.search:
+            import script_loader_pkg.script_loader_search as script_loader_search
+            entries = [entry for entry, score in script_loader_search.SearchIndex(entries).search(args.search)]
+        return {"entries": [entry.as_dict() for entry in entries], "unknown_categories": unknown,
+                "unavailable_categories": sorted(snapshot.unavailable_categories()), "ok": not unknown}
+    if args.command == "sync":
+        return script_loader_core.sync(args.target, args.category, not args.no_update, not args.no_dependencies,
+                                       args.dry_run, database)
+    result = script_loader_core.uninstall_many(args.names, args.target, background=False)
+    return dict(result.as_dict(), ok=not result.failed)
+
+
+def main(args=None):
+    """
+    Args:
+        args: command line arguments, defaults to sys.argv
+    Returns: exit code, 0 if everything succeeded
+    """
+    args = parse_args(sys.argv[1:] if args is None else args)
+    stdout = sys.stdout
+    sys.stdout = sys.stderr  # keep stdout for the json result
+    try:
+        result = run(args)
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    finally:
+        sys.stdout = stdout
+    sys.stdout.write(json.dumps(result, indent=2, sort_keys=True) + "\n")
+    return 0 if result.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,24 +15,28 @@ TODO: add Non Editable ? checkboxes
 TODO: Add pip_test contents to installation def
     * figure out how to run "main" function..?'
 
-TODO: add user popups + log tab
+TODO: add user popups
 TODO: make UI Dockable and Scalable
 '''
 
 import os
-import shutil
-import imp
-import sys
-import pkg_resources
-import sqlite3
-import zipfile
-import glob
-import re
+import time
+import logging
 from PySide2 import QtWidgets, QtCore, QtGui
-from distutils.version import LooseVersion
 import script_loader_pkg.script_loader_ui as script_loader_ui
-reload(script_loader_ui)
+import script_loader_pkg.script_loader_db as script_loader_db
+import script_loader_pkg.script_loader_metadata_cache as script_loader_metadata_cache
+import script_loader_pkg.script_loader_catalog_cache as script_loader_catalog_cache
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_worker as script_loader_worker
+import script_loader_pkg.script_loader_model as script_loader_model
+import script_loader_pkg.script_loader_version as script_loader_version
+import script_loader_pkg.script_loader_batch as script_loader_batch
+import script_loader_pkg.script_loader_core as script_loader_core
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
 import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_watcher as script_loader_watcher
+import script_loader_pkg.script_loader_timing as script_loader_timing
 
 #import excepthook_override
 # override exception hook
@@ -51,7 +55,19 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
         super(ScriptLoaderUI, self).__init__(None)
         self._ui = script_loader_ui.Ui_Form()
         self._ui.setupUi(self)
-        self.database = Database() # load logic class
+        self.database = script_loader_db.Database()  # load logic class, connects on first query
+        self.metadata_cache = script_loader_metadata_cache.MetadataCache()  # local whl metadata cache
+        self.catalog_cache = script_loader_catalog_cache.CatalogCache()  # last catalog, shown until the refresh is done
+        self.snapshot = None  # last catalog snapshot, used for incremental rescans
+        self.refresh_thread = None  # QThread of the running refresh
+        self.refresh_worker = None
+        self.refresh_pending = False  # a change was seen while a refresh was running
+        self.install_state_pending = False
+        self.watcher = script_loader_watcher.CatalogWatcher(self)  # keeps the tree current without reloading
+        self.log_handler = None  # sends the log to the log tab
+        self.catalog_model = script_loader_model.CatalogModel(self)  # categories and whls shown in the tree
+        self.search_model = script_loader_model.CatalogFilterModel(self)  # what the tree shows, filtered by the search
+        self.search_model.setSourceModel(self.catalog_model)
         self.my_selected_path = ""
         self.log = ""
 
@@ -63,20 +79,43 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
         # get setupui method from generated pyqt file
         super(ScriptLoaderUI, self).setupUi(form)
 
-        self.update_btn.clicked.connect(self.update_tree)  # connect update button
-        self.treeWidget.itemClicked.connect(self.get_selected_path)  # get selected item
+        self.update_btn.clicked.connect(lambda: self.update_tree())  # connect update button, full rescan
+        self.cancel_btn.clicked.connect(self.cancel_refresh)  # stop a running refresh
+        self.treeView.setModel(self.search_model)
+        self.search_field.textChanged.connect(self.search_model.set_query)  # filter on every keystroke
+        self.treeView.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)  # multi-select for batches
+        self.treeView.clicked.connect(self.get_selected_path)  # get selected item
         #  run on double click
-        self.treeWidget.itemDoubleClicked.connect(self.double_click)
+        self.treeView.doubleClicked.connect(self.double_click)
+        # expand categories when they are added, or shown again by the search
+        self.search_model.rowsInserted.connect(self.expand_new_categories)
+        # incremental updates when the project folders or the maya scripts folder change
+        self.watcher.catalog_changed.connect(lambda: self.update_tree(changed_only=True))
+        self.watcher.installed_changed.connect(self.update_install_state)
 
-        # for right clicking tree widget items
-        self.treeWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.treeWidget.customContextMenuRequested.connect(self.right_click)
+        # for right clicking tree items
+        self.treeView.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.treeView.customContextMenuRequested.connect(self.right_click)
 
         form.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint)  # Window always on top
 
-        # expand tree on start
-        self.treeWidget.expandToDepth(0)
-        self.update_tree()  # update tree on launch
+        # show the log and timing of each phase in the log tab
+        self.log_handler = LogTabHandler(self.log_text)
+        script_loader_timing.add_listener(self.log_handler)
+
+        self.restore_catalog()  # show the last catalog right away
+        QtCore.QTimer.singleShot(0, self.update_tree)  # update tree once the window is shown
+
+    def closeEvent(self, event):
+        """
+        Stop sending log messages to the log tab of the closed window
+        Args:
+            event: QCloseEvent
+        """
+        if self.log_handler is not None:
+            script_loader_timing.remove_listener(self.log_handler)
+        self.watcher.stop()
+        super(ScriptLoaderUI, self).closeEvent(event)
 
     def right_click(self):
         """
@@ -93,101 +132,176 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
         Action by double clicking the tree menu item.
         """
         maya_script_folder = self.get_maya_scripts_folder()
-        b = self.treeWidget.selectedItems()
-        name = b[0].data(0, 40)
+        name = self.selected_index().data(script_loader_model.NAME_ROLE)
+        if not self.check_if_script_item() or not self.selected_index().data(script_loader_model.INSTALLED_ROLE):
+            return
         # launch the script.
-        self.launch_script(maya_script_folder, name)
+        ScriptActions.launch_script(maya_script_folder, name)
 
     def get_metadata(self):
         pass
 
-    def update_tree(self):
+    def restore_catalog(self):
+        """
+        Fill the tree from the saved catalog, marked as refreshing until the refresh has read
+        each category again
+        """
+        with script_loader_timing.span("catalog_restore", self.catalog_cache.cache_path) as timing:
+            saved = self.catalog_cache.load(self.database.database_path, self.get_maya_scripts_folder())
+            if saved is None:
+                return
+            saved_time, categories = saved
+            self.catalog_model.set_categories([category for category, unavailable, entries in categories],
+                                              [category for category, unavailable, entries in categories
+                                               if unavailable])
+            for category, unavailable, entries in categories:
+                self.catalog_model.set_category_entries(category, entries)
+            self.catalog_model.set_refreshing(True)
+            timing.add(categories=len(categories), rows=sum(len(entries) for category, unavailable, entries
+                                                            in categories))
+        saved_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(saved_time))
+        Logs.log_message("Showing the catalog saved at " + saved_at + ", refreshing...")
+
+    def save_catalog(self):
+        """
+        Save the catalog in the tree, to show it the next time the window opens
         """
-        Update the treewidget list
+        self.catalog_cache.save(self.database.database_path, self.get_maya_scripts_folder(),
+                                [(node.name, node.unavailable, self.catalog_model.entries(node.name))
+                                 for node in self.catalog_model.categories])
+
+    def update_tree(self, changed_only=False):
+        """
+        Update the tree. The catalog is scanned on a background thread and the model is
+        updated one category at a time as the results come in. Only the rows that changed
+        since the last refresh are touched.
         db column info:
             0=ID
             1=name
             2=path
             3=category
-        widget item data:
-            32=path
-            33=version
-            34=True if outdated
-            35=True if script item
-            36 = version
-            40 = name
-        """
-        duplicates = self.database.check_for_duplicates()  # check if there are duplicate packages
-        self.treeWidget.clear()  # clear the tree
-        db_entries = self.database.get_database()  # get the database
-        maya_scripts_folder = self.get_maya_scripts_folder()  # get the maya scripts folder
-        categories = self.database.get_categories(db_entries)  # get database categories
-        whl_paths = self.database.get_folder_contents()  # get a list of the whl paths
-
-        for category in categories:
-            cat_item = QtWidgets.QTreeWidgetItem(self.treeWidget)  # create root items for categories
-            cat_item.setText(0, category)
-            cat_item.setData(0, 35, False)  # mark as not a script item
-            for path, cat in whl_paths.items():  # for each whl path
-                if cat == category:
-                    script_item = QtWidgets.QTreeWidgetItem(cat_item)  # add path whl to list
-                    archive = zipfile.ZipFile(path, 'r')  # open whl archive
-
-                    # parse the path name to get METADATA file
-                    last_folder = str(path).split("/")
-                    name = last_folder[-1].split("-")
-                    dist_folder = name[0] + "-" + name[1] + ".dist-info"
-                    metadata = archive.open(dist_folder + '/METADATA')
-                    # get name and version from metadata
-                    name = ""
-                    version = ""
-                    for x in metadata:
-                        if str(x).startswith("Name:"):
-                            name = str(x).split(": ")[-1].rstrip("\n\r")
-                        if str(x).startswith("Version:"):
-                            version = str(x).split(": ")[-1].rstrip("\n\r")
-                    # print name
-                    script_item.setText(0, name + " - " + version)
-                    # set additional data to tree item
-                    script_item.setData(0, 32, path)  # path
-                    script_item.setData(0, 33, cat)  # category
-                    script_item.setData(0, 35, True)  # script item
-                    script_item.setData(0, 36, version)  # version
-                    script_item.setData(0,40, name)  # name
-                    # check if current version is already installed ( if folder with dist_info exists )
-                    installed = False
-                    installed_version = ""
-                    name_underscore = name.replace("-", "_")
-                    for n in glob.glob(maya_scripts_folder + "/*"):
-                        n = n.replace("\\", "/")
-                        if n.endswith(".dist-info"):
-                            last_folder = n.split("/")
-                            if last_folder[-1].startswith(name_underscore):  #TODO check also if top level folder exists
-                                installed = True
-                                script_item.setFont(0, self.create_fonts()[0])  # set text to bold
-                                script_item.setForeground(0,self.create_brushes()[2])  # set text color to green
-                                with open(n + "/METADATA") as f:
-                                    for x in f.readlines():
-                                        if str(x).startswith("Version:"):
-                                            installed_version = str(x).split(": ")[-1].rstrip("\n\r")
-
-                    script_item.setData(0, 37, installed)  # mark whether it is installed
-                    # check if version is oudated
-                    outdated = False
-                    if installed:
-                        if LooseVersion(installed_version) < LooseVersion(version):
-                            script_item.setData(0, 34, True)  # set outdated status to true
-                            script_item.setForeground(0, self.create_brushes()[3])  # set text color yellow
-                            script_item.setText(0, name + " - New version: " + version)
-                            outdated = True
-
-                    script_item.setData(0, 38, outdated)  # mark if installed
-
-                    for d in duplicates:
-                        if name_underscore == d:
-                            script_item.setForeground(0, self.create_brushes()[3])  # set text color yellow
-                            script_item.setText(0, name + " - Duplicate!: " + version)
-        self.treeWidget.expandToDepth(0)  # expand the tree
+        Args:
+            changed_only: only update the categories that changed since the last refresh
+        """
+        if self.refresh_thread is not None:  # a refresh is already running
+            if changed_only:
+                self.refresh_pending = True  # rescan once it has finished
+            return
+        self.progressBar.setValue(0)
+        self.update_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+
+        self.refresh_thread = QtCore.QThread(self)
+        self.refresh_worker = script_loader_worker.CatalogRefreshWorker(self.database, self.metadata_cache,
+                                                                        self.get_maya_scripts_folder(), self.snapshot,
+                                                                        changed_only)
+        self.refresh_worker.moveToThread(self.refresh_thread)
+        self.refresh_thread.started.connect(self.refresh_worker.run)
+        self.refresh_worker.categories_found.connect(self.add_categories)
+        self.refresh_worker.category_ready.connect(self.add_category_items)
+        self.refresh_worker.progress.connect(self.show_progress)
+        self.refresh_worker.failed.connect(lambda message: Logs.log_message("Refresh failed: " + message))
+        self.refresh_worker.finished.connect(self.refresh_finished)
+        self.refresh_thread.start()
+
+    def cancel_refresh(self):
+        """
+        Stop the running refresh. Categories that were already loaded stay in the tree.
+        """
+        if self.refresh_worker is not None:
+            self.refresh_worker.cancel()
+            Logs.log_message("Refresh cancelled.")
+
+    def show_progress(self, done, total):
+        """
+        Update the progress bar
+        Args:
+            done: number of whls read
+            total: number of whls in the catalog
+        """
+        self.progressBar.setMaximum(max(total, 1))
+        self.progressBar.setValue(done)
+
+    def add_categories(self, categories, unavailable_categories):
+        """
+        Add new categories to the tree and remove the ones that are no longer in the database
+        Args:
+            categories: category names
+            unavailable_categories: categories with project folders that couldn't be scanned
+        """
+        for category in unavailable_categories:
+            Logs.log_message("Warning: a project folder of " + category + " is unavailable, its list may be incomplete.")
+        self.catalog_model.set_categories(categories, unavailable_categories)
+
+    def add_category_items(self, category, entries):
+        """
+        Update the script items of a finished category
+        Args:
+            category: category name
+            entries: list of CatalogEntry
+        """
+        with script_loader_timing.span("tree_build", category, rows=len(entries)):
+            self.catalog_model.set_category_entries(category, entries)
+            self.catalog_model.set_refreshing(False, category)
+
+    def expand_new_categories(self, parent, first, last):
+        """
+        Expand category items when they are added to the tree
+        Args:
+            parent: parent index of the inserted rows
+            first: first inserted row
+            last: last inserted row
+        """
+        if parent.isValid():
+            return
+        for row in range(first, last + 1):
+            self.treeView.expand(self.search_model.index(row, 0))
+
+    def refresh_finished(self, snapshot):
+        """
+        Clean up after the background refresh
+        Args:
+            snapshot: the new CatalogSnapshot, None if the refresh was cancelled or failed
+        """
+        self.catalog_model.set_refreshing(False)  # also when the refresh failed, the saved catalog stays shown
+        if snapshot is not None:
+            self.snapshot = snapshot
+            self.save_catalog()
+            if script_loader_config.watch_enabled:
+                self.watcher.watch(snapshot, self.get_maya_scripts_folder(), self.database.database_path)
+        self.refresh_thread.quit()
+        self.refresh_thread.wait()
+        self.refresh_worker.deleteLater()
+        self.refresh_thread.deleteLater()
+        self.refresh_thread = None
+        self.refresh_worker = None
+        self.update_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        script_loader_timing.log_totals()  # per whl and per category phases of this refresh
+        if self.install_state_pending:
+            self.update_install_state()
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.update_tree(changed_only=True)
+
+    def update_install_state(self):
+        """
+        Check the install state of the entries in the tree again, after the maya scripts folder
+        changed. The whls are not read again.
+        """
+        if self.refresh_thread is not None:  # the running refresh may use the old install state
+            self.install_state_pending = True
+            return
+        self.install_state_pending = False
+        maya_script_folder = self.get_maya_scripts_folder()
+        script_loader_installed.invalidate(maya_script_folder)
+        installed_index = script_loader_installed.get_installed_index(maya_script_folder)
+        pins = script_loader_version.VersionPins()
+        for node in list(self.catalog_model.categories):
+            entries = [script_loader_catalog.update_install_state(entry, installed_index, pins)
+                       for entry in self.catalog_model.entries(node.name)]
+            self.catalog_model.set_category_entries(node.name, entries)
+        self.save_catalog()
 
     def contextMenuEvent(self, selected_path, is_script_item, maya_script_folder):
         """
@@ -197,18 +311,54 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
             is_script_item: is is a script item?
             maya_script_folder: path to local maya script folder
         """
-        b = self.treeWidget.selectedItems()
-        installed = b[0].data(0, 37)  # check if marked as installed
-        outdated = b[0].data(0, 38)  # check if marked as outdated
-        name = b[0].data(0,40)  # get name
+        index = self.selected_index()
+        installed = index.data(script_loader_model.INSTALLED_ROLE)  # check if marked as installed
+        outdated = index.data(script_loader_model.OUTDATED_ROLE)  # check if marked as outdated
+        name = index.data(script_loader_model.NAME_ROLE)  # get name
 
         self.menu = QtWidgets.QMenu(self)
-        if not is_script_item: # skip category items
+        selected_entries = self.selected_entries()
+        outdated_entries = self.outdated_entries()
+        if outdated_entries:
+            update_all_action = QtWidgets.QAction("Update all outdated (" + str(len(outdated_entries)) + ")", self)
+            update_all_action.triggered.connect(lambda: self.batch_actions("update", outdated_entries))
+            self.menu.addAction(update_all_action)
+        if not is_script_item:  # category item
+            category = index.data(script_loader_model.CATEGORY_ROLE)
+            category_entries = [entry for entry in self.catalog_model.entries(category)
+                                if not entry.installed and entry.preferred]
+            if category_entries:
+                category_action = QtWidgets.QAction("Install category (" + str(len(category_entries)) + ")", self)
+                category_action.triggered.connect(lambda: self.batch_actions("install", category_entries))
+                self.menu.addAction(category_action)
+            self.menu.popup(QtGui.QCursor.pos())
+            return
+        if len(selected_entries) > 1:  # several script items
+            install_entries = [entry for entry in selected_entries if not entry.installed]
+            if install_entries:
+                selected_action = QtWidgets.QAction("Install selected (" + str(len(install_entries)) + ")", self)
+                selected_action.triggered.connect(lambda: self.batch_actions("install", install_entries))
+                self.menu.addAction(selected_action)
+            uninstall_entries = [entry for entry in selected_entries if entry.installed]
+            if uninstall_entries:
+                uninstall_count = len(set(entry.name for entry in uninstall_entries))
+                uninstall_selected = QtWidgets.QAction("Uninstall selected (" + str(uninstall_count) + ")", self)
+                uninstall_selected.triggered.connect(lambda: self.batch_actions("uninstall", uninstall_entries))
+                self.menu.addAction(uninstall_selected)
+            self.menu.popup(QtGui.QCursor.pos())
             return
         if installed:
-            run_action = QtWidgets.QAction("Run", self)
-            run_action.triggered.connect(lambda: ScriptActions.launch_script(maya_script_folder, name))
-            self.menu.addAction(run_action)
+            tools = script_loader_core.find_tools(name, maya_script_folder)
+            if len(tools) > 1:  # the package declares several maya_tools entry points
+                for tool in tools:
+                    run_action = QtWidgets.QAction("Run " + tool, self)
+                    run_action.triggered.connect(
+                        lambda checked=False, tool=tool: ScriptActions.launch_script(maya_script_folder, name, tool))
+                    self.menu.addAction(run_action)
+            else:
+                run_action = QtWidgets.QAction("Run", self)
+                run_action.triggered.connect(lambda: ScriptActions.launch_script(maya_script_folder, name))
+                self.menu.addAction(run_action)
 
         if installed and outdated:
             install_action = QtWidgets.QAction("Update", self)
@@ -223,8 +373,23 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
             install_action = QtWidgets.QAction("Install", self)
             install_action.triggered.connect(lambda: self.install_actions("install", selected_path, maya_script_folder, name))
             self.menu.addAction(install_action)
+
+        # version pins
+        version = index.data(script_loader_model.VERSION_ROLE)
+        pins = script_loader_version.VersionPins()
+        if pins.is_held(name) or pins.pinned_version(name):
+            release_action = QtWidgets.QAction("Release version pin", self)
+            release_action.triggered.connect(lambda: self.pin_actions("release", name, version))
+            self.menu.addAction(release_action)
+        else:
+            pin_action = QtWidgets.QAction("Pin to version " + version, self)
+            pin_action.triggered.connect(lambda: self.pin_actions("pin", name, version))
+            self.menu.addAction(pin_action)
+            if installed:
+                hold_action = QtWidgets.QAction("Hold updates", self)
+                hold_action.triggered.connect(lambda: self.pin_actions("hold", name, version))
+                self.menu.addAction(hold_action)
         self.menu.popup(QtGui.QCursor.pos())
-        self.update_tree()
 
     def install_actions(self, action, selected_path, maya_script_folder, name):
         """
@@ -239,9 +404,70 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
             ScriptActions.install_local(selected_path, maya_script_folder, name)
         if action == "uninstall":
             ScriptActions.uninstall_local(maya_script_folder, name)
-        if action == "update":
-            ScriptActions.uninstall_local(maya_script_folder, name)
-            self.install_local(selected_path, maya_script_folder, name)
+        if action == "update":  # the installed version is replaced once the new one is installed
+            ScriptActions.install_local(selected_path, maya_script_folder, name)
+        self.update_tree()
+
+    def batch_actions(self, action, entries):
+        """
+        Install, update or uninstall many scripts at once. The whls are extracted in parallel, the
+        dependencies are resolved once and the tree is refreshed once at the end.
+        Args:
+            action: install, update or uninstall
+            entries: list of CatalogEntry
+        """
+        maya_script_folder = self.get_maya_scripts_folder()
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            if action == "uninstall":
+                names = sorted(set(entry.name for entry in entries))
+                # moved out of the scripts folder right away, deleted in the background
+                Logs.log_message(script_loader_core.uninstall_many(names, maya_script_folder).report())
+            if action in ("install", "update"):  # installed versions are replaced once the new ones are installed
+                result = script_loader_batch.install_many([(entry.path, entry.name) for entry in entries],
+                                                          maya_script_folder)
+                Logs.log_message(result.report())
+        except Exception as e:  # don't let the slot raise, the installs that finished are on disk
+            Logs.log_message("Batch " + action + " failed: " + str(e))
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.update_tree()
+
+    def selected_entries(self):
+        """
+        Get the selected script items
+        Returns: list of CatalogEntry
+        """
+        indexes = self.treeView.selectionModel().selectedIndexes()
+        return [i.data(script_loader_model.ENTRY_ROLE) for i in indexes
+                if i.data(script_loader_model.SCRIPT_ITEM_ROLE)]
+
+    def outdated_entries(self):
+        """
+        Get the newest catalog version of every outdated installed package
+        Returns: list of CatalogEntry
+        """
+        installed_index = script_loader_installed.get_installed_index(self.get_maya_scripts_folder())
+        outdated = script_loader_version.find_outdated(installed_index, self.catalog_model.entries(),
+                                                       script_loader_version.VersionPins())
+        return [entry for installed_dist, entry in outdated.values()]
+
+    def pin_actions(self, action, name, version):
+        """
+        Version pin actions for context menu
+        Args:
+            action: pin, hold or release
+            name: name of the script
+            version: version to pin to
+        """
+        pins = script_loader_version.VersionPins()
+        if action == "pin":
+            pins.pin(name, version)
+        if action == "hold":
+            pins.hold(name)
+        if action == "release":
+            pins.release(name)
+        pins.save()
         self.update_tree()
 
     @staticmethod
@@ -250,82 +476,43 @@ class ScriptLoaderUI(QtWidgets.QWidget, script_loader_ui.Ui_Form):
         Get path of maya scripts folder
         Returns:path to maya scripts folder
         """
-        maya_script_folder = os.path.dirname(os.path.realpath(__file__))
-        maya_script_folder = maya_script_folder.replace("\\", "/")
-        return maya_script_folder
+        return script_loader_core.default_scripts_folder()
+
+    def selected_index(self):
+        """
+        Get the selected tree item
+        Returns: QModelIndex of the selected item, invalid if nothing is selected
+        """
+        indexes = self.treeView.selectionModel().selectedIndexes()
+        return indexes[0] if indexes else QtCore.QModelIndex()
 
     def check_if_script_item(self):
         """
         Check if list item is a script item and not a category
         Returns: True if script item
         """
-        b = self.treeWidget.selectedItems()
-        sel_item = b[0].data(0,35) # true if script item (not a category)
-        return sel_item
+        return bool(self.selected_index().data(script_loader_model.SCRIPT_ITEM_ROLE))  # (not a category)
 
     def get_selected_path(self):
         """
         Get name of selected item
         Returns: the selected item
         """
-        b = self.treeWidget.selectedItems()
-        sel_path = b[0].data(0,32)
+        sel_path = self.selected_index().data(script_loader_model.PATH_ROLE)
         self.my_selected_path = sel_path
         return sel_path
 
-    @staticmethod
-    def create_brushes():
-        """
-        Create color brushes for text fields
-        Returns: brushes as an array
-        """
-        # white brush
-        brushes = []
-        brush_white = QtGui.QBrush(QtGui.QColor(255, 255, 255))
-        brush_white.setStyle(QtCore.Qt.NoBrush)
-        brushes.append(brush_white)
-        # gray brush
-        brush_gray = QtGui.QBrush(QtGui.QColor(128, 128, 128))
-        brush_gray.setStyle(QtCore.Qt.NoBrush)
-        brushes.append(brush_gray)
-        # green brush
-        brush_green = QtGui.QBrush(QtGui.QColor(156, 255, 39))
-        brush_green.setStyle(QtCore.Qt.NoBrush)
-        brushes.append(brush_green)
-        # yellow brush
-        brush_green = QtGui.QBrush(QtGui.QColor(244, 166, 81))
-        brush_green.setStyle(QtCore.Qt.NoBrush)
-        brushes.append(brush_green)
-
-        return brushes
-
-    @staticmethod
-    def create_fonts():
-        """
-        bold/normal font
-        Returns: fonts as an array
-        """
-        # bold font
-        fonts = []
-        font_bold = QtGui.QFont()
-        font_bold.setBold(True)
-        fonts.append(font_bold)
-        # regular font
-        font_normal = QtGui.QFont()
-        font_normal.setBold(True)
-        fonts.append(font_normal)
-        return fonts
-
 
 class Logs(QtWidgets.QWidget):
     @staticmethod
     def log_message(message):
         """
-        Print log message to console, log textbox and file
+        Print log message to console, log tab and file
         Args:
             message: log message
         """
-        print message  # TODO add log tab & file
+        print message
+        script_loader_timing.log(message)
 
     def popup_message(self, title, message):
         """
@@ -356,7 +543,41 @@ class Logs(QtWidgets.QWidget):
         return answer
 
 
+class LogSignal(QtCore.QObject):
+    """
+    Carries log messages to the main thread
+    """
+    message = QtCore.Signal(str)
+
+
+class LogTabHandler(logging.Handler):
+    """
+    Logging handler that appends the log records to the log tab. Records logged on worker
+    threads are queued to the main thread.
+    """
+    def __init__(self, text_edit):
+        """
+        init function
+        Args:
+            text_edit: QPlainTextEdit of the log tab
+        """
+        logging.Handler.__init__(self)  # old style class in python 2
+        self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s", "%H:%M:%S"))
+        self.signal = LogSignal()
+        self.signal.message.connect(text_edit.appendPlainText)
+
+    def emit(self, record):
+        """
+        Args:
+            record: logging.LogRecord
+        """
+        self.signal.message.emit(self.format(record))
+
+
 class ScriptActions():
+    """
+    Context menu actions, the work is done in script_loader_core
+    """
     @staticmethod
     def install_local(selected_path, maya_script_folder, selected_name):
         """
@@ -366,175 +587,31 @@ class ScriptActions():
             maya_script_folder: path to local maya script folder
             selected_name: name of the selected item
         """
-
-        print selected_path
-        whl = str(selected_path).split(".")
-        whl = whl[-1]
-        print whl
-        if whl == "whl":  # check if file is a whl
+        if str(selected_path).split(".")[-1] == "whl":  # check if file is a whl
             print "Installing " + str(selected_name) + "..."
-            archive = zipfile.ZipFile(selected_path)  # get whl archive
-            for file in archive.namelist():
-                archive.extract(file, maya_script_folder)  # get all files
-
-        # find dependency list
-        name_underscore = selected_name.replace("-", "_")
-        dependencies = []
-        for n in glob.glob(maya_script_folder + "/*"):
-            n = n.replace("\\", "/")
-            if n.endswith(".dist-info"):
-                last_folder = n.split("/")
-                if last_folder[-1].startswith(name_underscore):  # TODO do some additional checks
-                    with open(n + "/METADATA") as f:  # TODO move metadata to its own function..
-                        for x in f.readlines():
-                            if str(x).startswith("Requires-Dist: "):
-                                dependency = str(x).split(": ")[-1].rstrip("\n\r")
-                                dependency = re.sub('[ ()]', '', dependency)
-                                ignore_pkgs = ("PySide2", "maya", "setuptools")
-                                if dependency != "setuptools" and dependency != "maya" and dependency != "PySide2":
-                                    dependencies.append(dependency)
-
-        try:  # try running dependencies
-            for d in dependencies:
-                pkg_resources.require(d)
-                print "Dependencies " + str(d) + " OK."
-        except Exception as e:  # install missing dependencies
-            print "Some of these dependencies are not installed: " + str(d) + ". Installing.. " + str(e)
-            # do some wonky stuff to get the correct path to python executable..
-            maya_exe = sys.executable.split(".")[0] + "py.exe"
-            maya_exe = maya_exe.replace("\\", "/")
-            dependencies_script = "script_loader_install_dependencies.py"
-            dependencies_string  = ""
-            for d in dependencies:
-                dependencies_string += d + " "
-            # instal dependencies command
-            command = "\"" + str(maya_exe) + "\" " + maya_script_folder + "/" + dependencies_script + " \""\
-                      + dependencies_string + "\""
-            os.system('"' + command + '"')
+            result = script_loader_batch.install_many([(selected_path, selected_name)], maya_script_folder)
+            print result.report()
 
     @staticmethod
     def uninstall_local(maya_scripts_folder, name):
         """
-        Delete folder where script is
+        Remove the files of the script listed in its RECORD
         Args:
             maya_scripts_folder: path to maya scripts folder
             name: name of the selected item
         """
-        # find the actual script folder from top_level.txt
-        name_underscore = name.replace("-", "_")
-        for n in glob.glob(maya_scripts_folder + "/*"):
-            n = n.replace("\\", "/")
-            if n.endswith(".dist-info"):
-                last_folder = n.split("/")
-                if last_folder[-1].startswith(name_underscore):  # TODO check also if top level folder exists
-                    fo = open(n + "/top_level.txt")
-                    with fo as f:
-                        script_folder = f.readline().rstrip("\r\n")
-                    fo.close()
-
-                    shutil.rmtree(maya_scripts_folder + "/" + script_folder)  # remove the script folder
-                    shutil.rmtree(n)  # remove the dist_info folder
+        script_loader_core.uninstall(name, maya_scripts_folder)
 
     @staticmethod
-    def launch_script(maya_scripts_folder, name):
+    def launch_script(maya_scripts_folder, name, tool=None):
         """
-        Get top_level.txt - run __init__.py file in folder that is specified
+        Run a tool of the script, imported once and reloaded when another version is installed
         Args:
             maya_scripts_folder: path to maya scripts folder
             name: name of the script
+            tool: name of the tool, None for the first one
         """
-        name_underscore = name.replace("-", "_")
-        for n in glob.glob(maya_scripts_folder + "/*"):
-            n = n.replace("\\", "/")
-            if n.endswith(".dist-info"):
-                last_folder = n.split("/")
-                if last_folder[-1].startswith(name_underscore):  # TODO check also if top level folder exists
-                    with open(n + "/top_level.txt") as f:
-                        x = f.readline().rstrip("\r\n")
-                        print x
-                        imp.load_source('module.name', maya_scripts_folder + "/" + x + "/__init__.py")
-
-class Database():
-    """
-    Logic class for script loader TODO: move more stuff here
-    """
-    con = sqlite3.connect(script_loader_config.database_path)  # path to database
-
-    def get_database(self):
-        """
-        Get all tables
-        Returns: all tables as arrays
-        """
-        with self.con:
-            cur = self.con.cursor()
-            cur.execute("SELECT name from sqlite_master where type= \"table\"")
-            rows = cur.fetchall()
-            all_tables = []
-            for row in rows:
-                cur.execute("SELECT * FROM " + row[0])
-                all_tables.append(cur.fetchall())
-            return all_tables
-
-    def get_folder_contents(self):
-        """
-        Gets the whl files from the database folder paths
-        Returns: whl paths
-        """
-        whl_files = {}
-        db = self.get_database()
-        for table in db:
-            for row in table:
-                category = row[3]
-                path = row[2]
-                # r=root, d=directories, f = files
-                for r, d, f in os.walk(path):
-                    for file in f:
-                        if '.whl' in file:
-                            whl_files.update({path + "/" + file: category})  # TODO check if this will break if there are other files
-        return whl_files
+        script_loader_core.launch(name, maya_scripts_folder, tool)
 
-    @staticmethod
-    def get_categories(db_table_array):
-        """
-        Get all the categories
-        Returns: all the categories in an array
-        """
-        categories = []
-        for entry in db_table_array:
-            for item in entry:
-                categories.append(item[3])  # get all categories
-        categories = list(dict.fromkeys(categories))  # remove duplicates
-        return categories
-
-    def check_for_duplicates(self):
-        """
-        Check if there are duplicate files in the project
-        Returns: list of duplicate items
-
-        """
-        db = self.get_folder_contents()
-        db_keys = []
-        duplicate_list = []
-        # get project name (ignore version number)
-        for key in db:
-            key = str(key).split("/")
-            key = key[-1].split("-")
-            db_keys.append(key[0])
-        # do comparison
-        counter1 = 0
-        duplicates = False
-        for i in db_keys:
-            counter2 = 0
-            for n in db_keys:
-                if counter1 == counter2:  # skip self check
-                    continue
-                if i == n:
-                    duplicates = True
-                    duplicate_list.append(n)
-                counter2 += 1
-            counter1 += 1
-        if duplicates:
-            print "Warning: Duplicate package found! this might cause some issues."
-        else:
-            print "No duplicate packages found."
-        return duplicate_list
\ No newline at end of file
+
+Database = script_loader_db.Database  # moved to script_loader_db
@@ -0,0 +1,193 @@
+'''
+Batch install.
+
+Installs many whls at once: the whls are fetched and extracted in parallel, then the
+dependencies of all of them are resolved together and installed with one pip run.
+Only one whl per project is installed, the newest one, since two versions of a project
+would be extracted over the same package folder.
+An installed version of a project is replaced only after the new whl has been extracted over
+it: then the files of the old version that the new one doesn't have are removed. If the new
+whl fails to install the old version is left as it was.
+'''
+
+import os
+import zipfile
+import collections
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_wheel_cache as script_loader_wheel_cache
+import script_loader_pkg.script_loader_extract as script_loader_extract
+import script_loader_pkg.script_loader_uninstall as script_loader_uninstall
+import script_loader_pkg.script_loader_resolver as script_loader_resolver
+import script_loader_pkg.script_loader_simple_index as script_loader_simple_index
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+
+class BatchResult(object):
+    """
+    Result of a batch install
+    """
+    def __init__(self):
+        self.installed = []  # (name, ExtractResult)
+        self.failed = []  # (name, error message)
+        self.skipped = []  # (name, path) of other versions of a project in the batch
+        self.resolution = None  # Resolution of the dependencies of all installed packages
+        self.dependency_exit_code = 0  # exit code of the dependency install
+
+    def report(self):
+        """
+        Returns: human readable summary
+        """
+        lines = ["Installed " + name + ": " + str(result) for name, result in self.installed]
+        lines += ["Failed to install " + name + ": " + error for name, error in self.failed]
+        lines += ["Skipped " + path + ", another version of " + name + " is installed" for name, path in self.skipped]
+        if self.resolution is not None:
+            lines.append(self.resolution.report())
+        if self.dependency_exit_code != 0:
+            lines.append("Dependency install failed, pip exit code %d" % self.dependency_exit_code)
+        return "\n".join(lines)
+
+    def as_dict(self):
+        """
+        Returns: machine readable summary
+        """
+        return {"installed": [{"name": name, "files": result.files, "bytes": result.bytes_written,
+                               "seconds": result.seconds} for name, result in self.installed],
+                "failed": [{"name": name, "error": error} for name, error in self.failed],
+                "skipped": [{"name": name, "path": path} for name, path in self.skipped],
+                "dependencies": self.resolution.as_dict() if self.resolution is not None else None,
+                "dependency_exit_code": self.dependency_exit_code}
+
+
+def install_one(path, scripts_folder, wheel_cache):
+    """
+    Fetch a whl into the local cache and extract it
+    Args:
+        path: path or URL of the whl
+        scripts_folder: path to the maya scripts folder
+        wheel_cache: WheelCache
+    Returns: ExtractResult
+    """
+    local_path = wheel_cache.fetch(path)  # local copy, only copied from the share once
+    try:
+        # extract to a staging folder, checking the files against RECORD, then move into place
+        with script_loader_timing.span("extraction", os.path.basename(path)) as timing:
+            result = script_loader_extract.extract_wheel(local_path, scripts_folder)
+            timing.add(files=result.files, bytes=result.bytes_written)
+        return result
+    except (script_loader_wheel_cache.WheelIntegrityError, zipfile.BadZipfile):
+        wheel_cache.discard(path)  # fetched again next time, the cached copy may be truncated
+        raise
+
+
+def extracted_dist(extract_result, scripts_folder):
+    """
+    Args:
+        extract_result: ExtractResult of an installed whl
+        scripts_folder: path to the maya scripts folder
+    Returns: InstalledDist of the dist-info folder the whl installed, None if it has none
+    """
+    for name in extract_result.installed:
+        if name.endswith(".dist-info"):
+            name_version = name[:-len(".dist-info")].split("-", 1)
+            return script_loader_installed.InstalledDist(name_version[0], name_version[-1],
+                                                         scripts_folder + "/" + name)
+    return None
+
+
+def one_per_project(whls):
+    """
+    Keep one whl of each project, the newest one, the same one a DuplicateGroup prefers
+    Args:
+        whls: list of (path, name)
+    Returns: (list of (path, name) to install in the order they were given, list of (name, path) left out)
+    """
+    groups = collections.OrderedDict()  # normalized name: DuplicateGroup
+    for path, name in whls:
+        key = script_loader_installed.normalize_name(name)
+        group = groups.setdefault(key, script_loader_catalog.DuplicateGroup(name))
+        if path not in [candidate_path for version, candidate_path in group.candidates]:
+            group.add(script_loader_catalog.parse_wheel_filename(path)[1], path)
+    keep = set(group.preferred for group in groups.values())
+    selected = []
+    skipped = []
+    for path, name in whls:
+        if path in keep:
+            keep.discard(path)  # the same whl given twice is installed once
+            selected.append((path, name))
+        elif path not in [p for p, n in selected]:
+            skipped.append((name, path))
+    return selected, skipped
+
+
+def install_many(whls, scripts_folder, max_workers=None, install_dependencies=True, background=True):
+    """
+    Install whls in parallel, then resolve and install the dependencies of all of them once.
+    Installed versions of the projects are replaced once the new whl has been installed.
+    Args:
+        whls: list of (path, name), only the newest whl of each project is installed
+        scripts_folder: path to the maya scripts folder
+        max_workers: number of whls extracted at the same time, defaults to the config
+        install_dependencies: resolve and install missing dependencies
+        background: delete the files of replaced versions on a background thread
+    Returns: BatchResult
+    """
+    result = BatchResult()
+    whls, result.skipped = one_per_project(whls)
+    if not whls:
+        return result
+    installed_index = script_loader_installed.get_installed_index(scripts_folder)
+    previous = {}  # whl path: InstalledDist of the version it replaces
+    for path, name in whls:
+        installed_dist = installed_index.get(name)
+        if installed_dist is not None:
+            installed_dist.record  # read before the new version can overwrite it
+            previous[path] = installed_dist
+    wheel_cache = script_loader_wheel_cache.WheelCache()
+
+    def run(whl):
+        try:
+            return install_one(whl[0], scripts_folder, wheel_cache), None
+        except (script_loader_wheel_cache.WheelIntegrityError, zipfile.BadZipfile) as e:
+            return None, "the whl is corrupted: " + str(e)
+        except (KeyError, ValueError) as e:  # e.g. no dist-info folder or a broken METADATA
+            return None, "the whl is not valid: " + str(e)
+        except script_loader_simple_index.DOWNLOAD_ERRORS as e:
+            return None, "the whl could not be downloaded: " + str(e)
+        except (IOError, OSError) as e:
+            return None, "files could not be written: " + str(e)
+
+    from multiprocessing.pool import ThreadPool  # slow to import, only needed when installing
+    pool = ThreadPool(min(max_workers or script_loader_config.install_threads, len(whls)))
+    try:
+        outcomes = pool.map(run, whls)
+    finally:
+        pool.close()
+        pool.join()
+        script_loader_installed.invalidate(scripts_folder)
+    for (path, name), (extract_result, error) in zip(whls, outcomes):
+        if error is not None:  # the installed version, if any, is left as it was
+            result.failed.append((name, error))
+            continue
+        result.installed.append((name, extract_result))
+        current = extracted_dist(extract_result, scripts_folder)
+        if path in previous and current is not None:
+            try:
+                script_loader_uninstall.remove_replaced(previous[path], current, scripts_folder, background)
+            except OSError as e:  # e.g. a file is in use, both versions are on disk
+                result.failed.append((name, "the files of version " + previous[path].version +
+                                      " could not be removed: " + str(e)))
+    if previous:
+        script_loader_installed.invalidate(scripts_folder)
+
+    if install_dependencies and result.installed:
+        installed_index = script_loader_installed.get_installed_index(scripts_folder)
+        requirements = []
+        for name, extract_result in result.installed:
+            installed_dist = installed_index.get(name)
+            if installed_dist is not None:
+                requirements.extend(installed_dist.requires_dist)
+        result.resolution = script_loader_resolver.resolve(requirements)
+        result.dependency_exit_code = script_loader_resolver.install_missing(result.resolution)
+    return result
@@ -0,0 +1,407 @@
+'''
+Catalog snapshot - everything one refresh of the script loader reads from the database and
+the project folders, so the share is only walked once per refresh.
+'''
+
+import os
+import time
+import threading
+import collections
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_utils as script_loader_utils
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_version as script_loader_version
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+# project folder status
+SOURCE_OK = "ok"
+SOURCE_UNAVAILABLE = "unavailable"
+
+
+def walk_whl_folder(root, previous_folders=None, folders=None, whl_paths=None, stop=None, errors=None):
+    """
+    Find the whl files under a folder. Folders whose mtime is the same as in the previous
+    scan are not listed again, their cached contents are used instead.
+    Args:
+        root: the folder to walk
+        previous_folders: folder listings of the previous scan
+        folders: dict that the folder listings of this scan are added to
+        whl_paths: list that the found whl paths are added to as they are found
+        stop: threading.Event, the walk stops at the next folder once it is set
+        errors: list that the folders that couldn't be listed are added to
+    Returns: list of whl paths
+    """
+    previous_folders = previous_folders or {}
+    folders = folders if folders is not None else {}
+    whl_paths = whl_paths if whl_paths is not None else []
+    stack = [root]
+    while stack:
+        if stop is not None and stop.is_set():
+            break
+        folder = stack.pop()
+        try:
+            mtime = os.stat(folder).st_mtime
+            cached = previous_folders.get(folder)
+            if cached and cached[0] == mtime:  # folder hasn't changed, skip listing it
+                whl_names, sub_folders = cached[1], cached[2]
+            else:
+                files, sub_folders = script_loader_utils.scan_folder(folder)
+                whl_names = [f for f in files if f.endswith(".whl")]
+        except OSError:  # folder is missing or not reachable
+            if errors is not None:
+                errors.append(folder)
+            continue
+        folders[folder] = (mtime, whl_names, sub_folders)
+        whl_paths.extend(folder + "/" + f for f in whl_names)
+        stack.extend(folder + "/" + d for d in sub_folders)
+    return whl_paths
+
+
+def parse_wheel_filename(path):
+    """
+    Get the project name and version from a whl file name
+    Args:
+        path: path to the whl file
+    Returns: (name, version)
+    """
+    parts = path.replace("\\", "/").split("/")[-1].split("-")
+    return parts[0], parts[1] if len(parts) > 1 else ""
+
+
+class DuplicateGroup(object):
+    """
+    All whls of a project that is in the catalog more than once
+    """
+    def __init__(self, name):
+        """
+        init function
+        Args:
+            name: project name
+        """
+        self.name = name
+        self.candidates = []  # (version, path)
+        self._preferred = None
+
+    def add(self, version, path):
+        """
+        Add a whl to the group
+        Args:
+            version: version of the whl
+            path: path to the whl
+        """
+        self.candidates.append((version, path))
+        self._preferred = None
+
+    @property
+    def preferred(self):
+        """
+        Returns: path of the whl with the highest version
+        """
+        if self._preferred is None and self.candidates:
+            best = sorted(self.candidates, key=lambda c: c[1])[0]  # first path wins a tie
+            for version, path in self.candidates:
+                if script_loader_version.is_newer(version, best[0]):
+                    best = (version, path)
+            self._preferred = best[1]
+        return self._preferred
+
+    @property
+    def versions(self):
+        """
+        Returns: the versions in the group
+        """
+        return sorted(set(version for version, path in self.candidates), key=script_loader_version.parse_version,
+                      reverse=True)
+
+
+class RootScan(object):
+    """
+    Scan of one project folder, run on a worker thread
+    """
+    def __init__(self, root, source):
+        """
+        init function
+        Args:
+            root: the project folder
+            source: catalog source of the project folder, see script_loader_sources
+        """
+        self.root = root
+        self.source = source
+        self.whl_paths = []
+        self.folders = {}
+        self.status = SOURCE_OK
+        self.started = None  # time the scan started
+        self.done = threading.Event()
+        self.stop = threading.Event()
+
+    def run(self, previous_folders=None):
+        """
+        List the whls of the project folder
+        Args:
+            previous_folders: folder listings of the previous scan
+        """
+        self.started = time.time()
+        timing = script_loader_timing.span("root_walk", self.root)
+        try:
+            with timing:
+                if not self.source.scan(self.root, previous_folders, self.folders, self.whl_paths, self.stop):
+                    self.status = SOURCE_UNAVAILABLE
+                timing.add(folders=len(self.folders), whls=len(self.whl_paths))
+        except Exception as e:
+            print("Scanning " + self.root + " failed: " + str(e))
+            self.status = SOURCE_UNAVAILABLE
+        finally:
+            self.done.set()
+
+    def time_out(self):
+        """
+        Give up on the scan and keep what was found so far
+        """
+        self.stop.set()
+        self.status = SOURCE_UNAVAILABLE
+        self.whl_paths = list(self.whl_paths)
+        self.folders = dict(self.folders)
+
+
+def scan_roots(roots, previous_folders=None, max_workers=None, timeout=None):
+    """
+    Scan project folders in parallel, each with its catalog source. Each folder gets its own
+    timeout, counted from when its scan starts. Folders that time out return what was found so
+    far and are marked unavailable.
+    The scans run on daemon threads. A thread that is stuck on a hung network call is left
+    behind when its folder times out, and a new thread takes over the folders still waiting,
+    so a hung folder never holds up the others or the return.
+    Args:
+        roots: project folders
+        previous_folders: folder listings of the previous scan
+        max_workers: max number of folders scanned at the same time
+        timeout: seconds before a folder is given up on
+    Returns: dict of root: RootScan
+    """
+    import script_loader_pkg.script_loader_sources as script_loader_sources  # imports this module
+    max_workers = max_workers or script_loader_config.scan_threads
+    timeout = timeout if timeout is not None else script_loader_config.scan_timeout
+    scans = {}
+    for root in roots:
+        if root not in scans:
+            scans[root] = RootScan(root, script_loader_sources.get_source(root))
+    if not scans:
+        return scans
+    queue = collections.deque(scans.values())  # folders waiting for a thread, popleft is thread safe
+
+    def worker():
+        while True:
+            try:
+                scan = queue.popleft()
+            except IndexError:
+                return
+            scan.run(previous_folders)
+
+    def start_worker():
+        thread = threading.Thread(target=worker, name="root_scan")
+        thread.daemon = True  # a hung network call doesn't keep maya from closing
+        thread.start()
+
+    for _ in range(min(max_workers, len(scans))):
+        start_worker()
+    pending = list(scans.values())
+    while pending:
+        for scan in list(pending):
+            if scan.done.is_set():
+                pending.remove(scan)
+            elif scan.started is not None and time.time() - scan.started > timeout:
+                print("Scanning " + scan.root + " timed out, results are incomplete.")
+                script_loader_timing.log("slow root_walk " + scan.root + " timed out after %.1f s" % timeout,
+                                         script_loader_timing.logging.WARNING)
+                scan.time_out()
+                pending.remove(scan)
+                if queue:
+                    start_worker()  # replaces the thread that is stuck on this folder
+        if pending:
+            pending[0].done.wait(0.05)
+    return scans
+
+
+class CatalogSnapshot(object):
+    """
+    Result of one scan of the database and project folders
+    """
+    def __init__(self, projects, categories, whl_paths, duplicates, folders, source_status=None, metadata=None):
+        """
+        init function
+        Args:
+            projects: project rows (id, name, path, category) from the database
+            categories: category names in database order
+            whl_paths: dict of whl path: category
+            duplicates: dict of normalized project name: DuplicateGroup
+            folders: folder listings keyed by folder path or index page URL, used for incremental rescans
+            source_status: dict of project folder: SOURCE_OK or SOURCE_UNAVAILABLE
+            metadata: dict of whl path: WheelInfo, when the catalog was read from the published index
+        """
+        self.projects = projects
+        self.categories = categories
+        self.whl_paths = whl_paths
+        self.duplicates = duplicates
+        self.folders = folders
+        self.source_status = source_status or {}
+        self.metadata = metadata or {}
+        self.category_paths = {}  # category: sorted whl paths, grouped once for paths_in_category
+        for path, category in whl_paths.items():
+            self.category_paths.setdefault(category, []).append(path)
+        for paths in self.category_paths.values():
+            paths.sort()
+
+    @property
+    def unavailable_roots(self):
+        """
+        Returns: project folders that couldn't be scanned completely
+        """
+        return [root for root, status in self.source_status.items() if status == SOURCE_UNAVAILABLE]
+
+    def unavailable_categories(self):
+        """
+        Returns: categories that have at least one unavailable project folder
+        """
+        unavailable = set(self.unavailable_roots)
+        categories = set()
+        for row in self.projects:
+            if row[2] in unavailable:
+                categories.add(row[3])
+        return categories
+
+    def paths_in_category(self, category):
+        """
+        Get the whl files of a category
+        Args:
+            category: category name
+        Returns: sorted list of whl paths, don't modify it
+        """
+        return self.category_paths.get(category, [])
+
+    def changed_categories(self, previous):
+        """
+        Compare with an older snapshot
+        Args:
+            previous: the older CatalogSnapshot
+        Returns: set of categories whose whls were added, removed or changed since the older snapshot,
+            and the categories with other versions of those projects, since their duplicates changed
+        """
+        changed_folders = set(folder for folder, listing in self.folders.items()
+                              if previous.folders.get(folder, (None,))[0] != listing[0])
+        all_paths = set(self.whl_paths) | set(previous.whl_paths)
+        changed_names = set()
+        for path in all_paths:
+            if self.whl_paths.get(path) != previous.whl_paths.get(path) or \
+                    path.rsplit("/", 1)[0] in changed_folders or \
+                    self.metadata.get(path) != previous.metadata.get(path):  # added, removed, moved or replaced
+                changed_names.add(script_loader_installed.normalize_name(parse_wheel_filename(path)[0]))
+        changed = set()
+        for path in all_paths:
+            if script_loader_installed.normalize_name(parse_wheel_filename(path)[0]) in changed_names:
+                changed.add(self.whl_paths.get(path))
+                changed.add(previous.whl_paths.get(path))
+        changed.discard(None)
+        return changed
+
+
+class CatalogEntry(object):
+    """
+    A whl in the catalog with its install state
+    """
+    def __init__(self, path, category, name, version, installed=False, installed_version="", outdated=False,
+                 duplicate=None, metadata=None):
+        """
+        init function
+        Args:
+            path: path to the whl file
+            category: category of the project folder
+            name: project name from METADATA
+            version: version from METADATA
+            installed: True if a version of the package is installed
+            installed_version: the installed version
+            outdated: True if the installed version is older than this whl
+            duplicate: DuplicateGroup if the package is in the catalog more than once, otherwise None
+            metadata: WheelInfo of the whl, for the summary, keywords and author
+        """
+        self.path = path
+        self.category = category
+        self.name = name
+        self.version = version
+        self.installed = installed
+        self.installed_version = installed_version
+        self.outdated = outdated
+        self.duplicate = duplicate
+        self.metadata = metadata
+
+    @property
+    def summary(self):
+        return self.metadata.summary if self.metadata is not None else ""
+
+    @property
+    def preferred(self):
+        """
+        Returns: True if this whl is the one to install out of its duplicates
+        """
+        return self.duplicate is None or self.duplicate.preferred == self.path
+
+    def as_dict(self):
+        """
+        Returns: machine readable summary
+        """
+        return {"path": self.path, "category": self.category, "name": self.name, "version": self.version,
+                "installed": self.installed, "installed_version": self.installed_version,
+                "outdated": self.outdated, "duplicate": self.duplicate is not None, "preferred": self.preferred,
+                "summary": self.summary}
+
+
+def build_entry(path, category, metadata_cache, installed_index, duplicates, pins=None, metadata=None):
+    """
+    Read a whl and check its install state
+    Args:
+        path: path to the whl file
+        category: category of the project folder
+        metadata_cache: MetadataCache used to read the whl
+        installed_index: InstalledIndex of the maya scripts folder
+        duplicates: DuplicateGroups of the snapshot keyed by normalized project name
+        pins: VersionPins, optional
+        metadata: WheelInfo of the whl if already known, e.g. from the published index
+    Returns: CatalogEntry
+    """
+    if metadata is None:
+        metadata = metadata_cache.get(path)  # cached, only opens the whl if it changed
+    name = metadata.name
+    version = metadata.version
+    installed, installed_version, outdated = install_state(name, version, installed_index, pins)
+    duplicate = duplicates.get(script_loader_installed.normalize_name(name))
+    return CatalogEntry(path, category, name, version, installed, installed_version, outdated, duplicate, metadata)
+
+
+def install_state(name, version, installed_index, pins=None):
+    """
+    Check if a whl is installed
+    Args:
+        name: project name
+        version: version of the whl
+        installed_index: InstalledIndex of the maya scripts folder
+        pins: VersionPins, optional
+    Returns: (installed, installed version, outdated)
+    """
+    installed_dist = installed_index.get(name)
+    installed = installed_dist is not None  # TODO check also if top level folder exists
+    installed_version = installed_dist.version if installed else ""
+    outdated = installed and script_loader_version.is_outdated(name, installed_version, version, pins)
+    return installed, installed_version, outdated
+
+
+def update_install_state(entry, installed_index, pins=None):
+    """
+    Check the install state of an entry again without reading its whl
+    Args:
+        entry: CatalogEntry
+        installed_index: InstalledIndex of the maya scripts folder
+        pins: VersionPins, optional
+    Returns: new CatalogEntry
+    """
+    installed, installed_version, outdated = install_state(entry.name, entry.version, installed_index, pins)
+    return CatalogEntry(entry.path, entry.category, entry.name, entry.version, installed, installed_version,
+                        outdated, entry.duplicate, entry.metadata)
@@ -0,0 +1,112 @@
+'''
+Local copy of the last complete catalog, for showing the tree as soon as the window opens.
+
+A refresh has to query the database, walk the project folders and read the whls before the
+tree can be filled. The categories and whls of the last refresh, with their install state,
+are saved to a small json file in the local data folder, and the next window shows them
+right away while the refresh runs. The refresh then only updates the rows that changed.
+
+The file is written atomically and is only used when its version matches and it was saved
+for the same database and maya scripts folder.
+'''
+
+import time
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_utils as script_loader_utils
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+
+CACHE_VERSION = 1  # bump when the saved fields change
+
+
+def entry_row(entry):
+    """
+    Args:
+        entry: CatalogEntry
+    Returns: list of the fields that are saved, see entry_from_row
+    """
+    metadata = entry.metadata or script_loader_wheel.WheelInfo()
+    return [entry.path, entry.name, entry.version, entry.installed, entry.installed_version, entry.outdated,
+            entry.duplicate.name if entry.duplicate else None, metadata.summary, metadata.keywords, metadata.author]
+
+
+def entry_from_row(row, category, duplicates):
+    """
+    Args:
+        row: list from entry_row
+        category: category of the whl
+        duplicates: dict of project name: DuplicateGroup
+    Returns: CatalogEntry, its metadata only has the fields the tree and the search use
+    """
+    path, name, version, installed, installed_version, outdated, duplicate, summary, keywords, author = row
+    metadata = script_loader_wheel.WheelInfo(name, version, summary=summary, keywords=keywords, author=author)
+    return script_loader_catalog.CatalogEntry(path, category, name, version, installed, installed_version, outdated,
+                                              duplicates.get(duplicate), metadata)
+
+
+class CatalogCache(object):
+    """
+    The saved catalog file
+    """
+    def __init__(self, cache_path=None):
+        """
+        init function
+        Args:
+            cache_path: path to the file, defaults to the path in the config
+        """
+        self.cache_path = cache_path or script_loader_config.catalog_cache_path
+        self.saved = None  # what is in the file, to skip writing it again when nothing changed
+
+    def load(self, database_path, maya_scripts_folder):
+        """
+        Read the saved catalog
+        Args:
+            database_path: path to the database the catalog has to come from
+            maya_scripts_folder: scripts folder the install state has to be for
+        Returns: (saved time, list of (category, unavailable, list of CatalogEntry)), None if there is no
+            usable file
+        """
+        data = script_loader_utils.read_json(self.cache_path)
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION or \
+                data.get("database_path") != database_path or data.get("scripts_folder") != maya_scripts_folder:
+            return None
+        try:
+            duplicates = {}
+            for name, candidates in data["duplicates"]:
+                group = duplicates[name] = script_loader_catalog.DuplicateGroup(name)
+                for version, path in candidates:
+                    group.add(version, path)
+            categories = [(category, unavailable, [entry_from_row(row, category, duplicates) for row in rows])
+                          for category, unavailable, rows in data["categories"]]
+        except (KeyError, TypeError, ValueError) as e:  # broken file, the refresh writes a new one
+            print("Could not read the saved catalog: " + str(e))
+            return None
+        self.saved = data
+        return data["saved"], categories
+
+    def save(self, database_path, maya_scripts_folder, categories):
+        """
+        Write the catalog if it changed since it was loaded or saved
+        Args:
+            database_path: path to the database the catalog came from
+            maya_scripts_folder: scripts folder of the install state
+            categories: list of (category, unavailable, list of CatalogEntry) in database order
+        """
+        duplicates = {}
+        for category, unavailable, entries in categories:
+            for entry in entries:
+                if entry.duplicate:
+                    duplicates[entry.duplicate.name] = entry.duplicate
+        data = {"version": CACHE_VERSION, "database_path": database_path, "scripts_folder": maya_scripts_folder,
+                "categories": [[category, unavailable, [entry_row(entry) for entry in entries]]
+                               for category, unavailable, entries in categories],
+                "duplicates": [[name, [list(candidate) for candidate in duplicates[name].candidates]]  # in order,
+                               for name in sorted(duplicates)]}  # the first one wins a tie
+        if self.saved is not None and dict(self.saved, saved=None) == dict(data, saved=None):
+            return
+        data["saved"] = time.time()
+        try:
+            script_loader_utils.atomic_write_json(self.cache_path, data)
+            self.saved = data
+        except (IOError, OSError) as e:
+            print("Could not save the catalog: " + str(e))
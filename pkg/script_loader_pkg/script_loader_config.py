@@ -1 +1,57 @@
+import os
+import tempfile
+
 database_path = 'C:/my_projects/script_loader/scripts.db'
+
+# local, per-user cache folder for the script loader
+local_data_folder = os.path.join(os.path.expanduser("~"), ".script_loader").replace("\\", "/")
+metadata_cache_path = local_data_folder + "/metadata_cache.json"  # parsed whl METADATA keyed by path, size and mtime
+catalog_cache_path = local_data_folder + "/catalog_cache.json"  # last complete catalog, shown while the tree refreshes
+
+# project folder scanning
+scan_threads = 8  # number of project folders scanned at the same time
+scan_timeout = 10.0  # seconds before a project folder is reported as unavailable
+
+# simple indexes
+index_timeout = 10.0  # seconds before a request to a simple index (http:// project folder) is given up on
+
+# version pins
+version_pins_path = local_data_folder + "/version_pins.json"  # pinned and held package versions
+
+# local whl cache shared by all users of the machine
+wheel_cache_folder = (os.environ.get("PROGRAMDATA") or tempfile.gettempdir()).replace("\\", "/") + "/script_loader/wheels"
+wheel_cache_max_bytes = 2 * 1024 * 1024 * 1024  # least recently used whls are removed above this size
+
+# dependencies
+wheelhouse_path = 'C:/my_projects/script_loader/wheelhouse'  # folder of dependency whls, pip installs offline from here
+ignored_dependencies = ("PySide2", "maya", "setuptools")  # provided by maya, never installed
+install_threads = 4  # number of whls extracted at the same time in batch installs
+database_immutable = False  # open the database as immutable (no locking), only if it is never written while in use
+
+# launching
+launch_entry_point_group = "maya_tools"  # entry point group of the tools a whl declares in setup.py
+
+# change watching
+watch_enabled = True  # refresh the tree when the project folders or the maya scripts folder change
+watch_debounce = 1.0  # seconds to wait for more changes before refreshing
+watch_poll_interval = 60.0  # seconds between rescans of folders that don't send change events (network shares)
+
+# log file and timing
+log_path = local_data_folder + "/script_loader.log"  # timing of each refresh and install phase
+log_max_bytes = 1024 * 1024  # the log file is rotated above this size
+log_backup_count = 3  # rotated log files kept
+slow_thresholds = {  # seconds, a phase above its threshold is logged as a warning
+    "db_query": 1.0,
+    "root_walk": 5.0,  # one project folder
+    "archive_open": 0.5,  # one whl
+    "metadata_parse": 0.5,  # one whl
+    "index_page": 2.0,  # one simple index page
+    "metadata_fetch": 1.0,  # one whl on a simple index
+    "installed_lookup": 1.0,
+    "tree_build": 0.2,  # one category
+    "catalog_restore": 0.2,  # showing the saved catalog when the window opens
+    "search": 0.05,  # filtering the tree for one keystroke
+    "extraction": 10.0,  # one whl
+    "dependency_install": 60.0,
+    "tool_import": 2.0,  # first launch of a tool
+}
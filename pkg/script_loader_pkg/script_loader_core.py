@@ -0,0 +1,192 @@
+'''
+Script loader core - scan, install, uninstall and launch without Qt.
+
+Used by the UI and by the command line (python -m script_loader_pkg), so scripts can be
+installed from mayapy or plain python without opening the window.
+'''
+
+import os
+import script_loader_pkg.script_loader_db as script_loader_db
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_metadata_cache as script_loader_metadata_cache
+import script_loader_pkg.script_loader_version as script_loader_version
+import script_loader_pkg.script_loader_batch as script_loader_batch
+import script_loader_pkg.script_loader_uninstall as script_loader_uninstall
+import script_loader_pkg.script_loader_launch as script_loader_launch
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+
+def default_scripts_folder():
+    """
+    Get the folder scripts are installed to - the folder the script loader is installed in
+    Returns: path to the maya scripts folder
+    """
+    return os.path.dirname(os.path.realpath(__file__)).replace("\\", "/")
+
+
+def match_categories(snapshot, categories):
+    """
+    Find the catalog categories that were asked for, ignoring case
+    Args:
+        snapshot: CatalogSnapshot
+        categories: category names, None for all categories
+    Returns: (matching categories in database order, names that didn't match any category)
+    """
+    if not categories:
+        return list(snapshot.categories), []
+    wanted = dict((category.lower(), category) for category in categories)
+    found = [category for category in snapshot.categories if category.lower() in wanted]
+    unknown = [wanted[name] for name in wanted if name not in set(c.lower() for c in found)]
+    return found, unknown
+
+
+def scan(scripts_folder=None, categories=None, database=None, metadata_cache=None):
+    """
+    Scan the catalog and check the install state of every whl
+    Args:
+        scripts_folder: path to the maya scripts folder, defaults to default_scripts_folder()
+        categories: only read the whls of these categories, None for all
+        database: Database, defaults to the database in the config
+        metadata_cache: MetadataCache used to read the whls
+    Returns: (CatalogSnapshot, list of CatalogEntry, categories that weren't found)
+    """
+    scripts_folder = scripts_folder or default_scripts_folder()
+    database = database or script_loader_db.Database()
+    metadata_cache = metadata_cache or script_loader_metadata_cache.MetadataCache()
+    snapshot = database.build_snapshot()
+    found, unknown = match_categories(snapshot, categories)
+    installed_index = script_loader_installed.get_installed_index(scripts_folder)
+    pins = script_loader_version.VersionPins()
+    entries = []
+    for category in found:
+        for path in snapshot.paths_in_category(category):
+            try:
+                entries.append(script_loader_catalog.build_entry(path, category, metadata_cache, installed_index,
+                                                                 snapshot.duplicates, pins,
+                                                                 snapshot.metadata.get(path)))
+            except Exception as e:  # broken or unreadable whl, skip it
+                print("Could not read " + path + ": " + str(e))
+    metadata_cache.save()
+    script_loader_timing.log_totals()
+    return snapshot, entries, unknown
+
+
+def install(entries, scripts_folder=None, install_dependencies=True):
+    """
+    Install whls and their dependencies
+    Args:
+        entries: list of CatalogEntry
+        scripts_folder: path to the maya scripts folder
+        install_dependencies: resolve and install missing dependencies
+    Returns: BatchResult
+    """
+    scripts_folder = scripts_folder or default_scripts_folder()
+    return script_loader_batch.install_many([(entry.path, entry.name) for entry in entries], scripts_folder,
+                                            install_dependencies=install_dependencies)
+
+
+def uninstall(name, scripts_folder=None):
+    """
+    Remove an installed script, see uninstall_many
+    Args:
+        name: name of the package
+        scripts_folder: path to the maya scripts folder
+    Returns: True if the package was uninstalled
+    """
+    return bool(uninstall_many([name], scripts_folder).removed)
+
+
+def uninstall_many(names, scripts_folder=None, background=True):
+    """
+    Remove installed scripts. Every file in their RECORD is moved to a trash folder right away,
+    the trash is deleted on a background thread.
+    Args:
+        names: names of the packages
+        scripts_folder: path to the maya scripts folder
+        background: delete the trash on a background thread
+    Returns: UninstallResult
+    """
+    scripts_folder = scripts_folder or default_scripts_folder()
+    return script_loader_uninstall.uninstall_many(names, scripts_folder, background)
+
+
+def find_tools(name, scripts_folder=None):
+    """
+    Get the tools an installed package declares in the maya_tools entry point group
+    Args:
+        name: name of the package
+        scripts_folder: path to the maya scripts folder
+    Returns: list of tool names, empty if the package isn't installed
+    """
+    scripts_folder = scripts_folder or default_scripts_folder()
+    installed_dist = script_loader_installed.get_installed_index(scripts_folder).get(name)
+    if installed_dist is None:
+        return []
+    return [tool.name for tool in script_loader_launch.find_tools(installed_dist)]
+
+
+def launch(name, scripts_folder=None, tool=None):
+    """
+    Run a tool of an installed package. Its module is imported once and only imported again
+    when the installed version changes, see script_loader_launch.
+    Args:
+        name: name of the script
+        scripts_folder: path to maya scripts folder
+        tool: name of the tool, None for the first tool of the package
+    Returns: what the tool returned, None if the package isn't installed
+    """
+    scripts_folder = scripts_folder or default_scripts_folder()
+    installed_dist = script_loader_installed.get_installed_index(scripts_folder).get(name)
+    if installed_dist is None:
+        return None
+    return script_loader_launch.launch(installed_dist, scripts_folder, tool)
+
+
+def sync(scripts_folder=None, categories=None, update_outdated=True, install_dependencies=True, dry_run=False,
+         database=None):
+    """
+    Install every whl of the given categories that isn't installed yet, and update the outdated
+    ones. Out of duplicate whls only the preferred one is installed. Version pins are respected.
+    Args:
+        scripts_folder: path to the maya scripts folder
+        categories: category names, None for all categories
+        update_outdated: also update installed packages that have a newer whl
+        install_dependencies: resolve and install missing dependencies
+        dry_run: only report what would be done
+        database: Database, defaults to the database in the config
+    Returns: dict with the result, ready to be written as json. "ok" is False if a category
+        wasn't found or something failed to install.
+    """
+    scripts_folder = scripts_folder or default_scripts_folder()
+    snapshot, entries, unknown = scan(scripts_folder, categories, database)
+    installed_names = set(script_loader_installed.normalize_name(entry.name) for entry in entries if entry.installed)
+    to_install = []
+    seen = set()
+    for entry in entries:
+        name = script_loader_installed.normalize_name(entry.name)
+        if entry.preferred and name not in installed_names and name not in seen:
+            to_install.append(entry)
+            seen.add(name)
+    to_update = []
+    if update_outdated:
+        outdated = script_loader_version.find_outdated(script_loader_installed.get_installed_index(scripts_folder),
+                                                       entries, script_loader_version.VersionPins())
+        to_update = [entry for installed_dist, entry in outdated.values()]
+
+    result = {"target": scripts_folder,
+              "categories": sorted(set(entry.category for entry in entries)),
+              "unknown_categories": unknown,
+              "unavailable_categories": sorted(snapshot.unavailable_categories()),
+              "install": [entry.as_dict() for entry in to_install],
+              "update": [entry.as_dict() for entry in to_update],
+              "dry_run": dry_run,
+              "ok": not unknown}
+    if not dry_run:
+        # one dependency run, outdated versions are only replaced once their update is installed
+        batch = script_loader_batch.install_many([(entry.path, entry.name) for entry in to_install + to_update],
+                                                 scripts_folder, install_dependencies=install_dependencies,
+                                                 background=False)
+        result.update(batch.as_dict())
+        result["ok"] = result["ok"] and not batch.failed and batch.dependency_exit_code == 0
+    return result
@@ -0,0 +1,301 @@
+'''
+Database access for the script loader.
+
+The database is opened lazily, with one read-only connection per thread, and queried with
+parameterized queries against an indexed schema:
+    categories(id, name, sort_order)
+    projects(id, name, path, category_id, usercount)
+    catalog(path, project_id, name, version, requires_dist, top_level, sha256, size, mtime, summary, keywords, author)
+The catalog table is written by script_loader_publish. When it exists, clients read the
+whls from it instead of walking the project folders. Project folders that are simple index
+URLs aren't published, they are always listed live, see script_loader_sources.
+Databases that only have the old "scripts" table are still read. They are migrated by
+create_schema the first time script_loader_publish runs on them. The example scripts.db is
+kept unmigrated, so it only has the old table.
+'''
+
+import sys
+import json
+import sqlite3
+import threading
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+import script_loader_pkg.script_loader_sources as script_loader_sources
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+try:
+    from urllib import pathname2url  # python 2
+except ImportError:
+    from urllib.request import pathname2url
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    sort_order INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    path TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    usercount INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS projects_category_id ON projects(category_id);
+CREATE TABLE IF NOT EXISTS catalog (
+    path TEXT PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects(id),
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    requires_dist TEXT NOT NULL DEFAULT '[]',
+    top_level TEXT NOT NULL DEFAULT '[]',
+    sha256 TEXT,
+    size INTEGER,
+    mtime REAL,
+    summary TEXT NOT NULL DEFAULT '',
+    keywords TEXT NOT NULL DEFAULT '[]',
+    author TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS catalog_project_id ON catalog(project_id);
+'''
+
+SEARCH_COLUMNS = (("summary", "''"), ("keywords", "'[]'"), ("author", "''"))  # added later, with their defaults
+PROJECTS_QUERY = "SELECT p.id, p.name, p.path, c.name FROM projects p JOIN categories c ON c.id = p.category_id"
+CATALOG_QUERY = "SELECT k.path, c.name, k.name, k.version, k.requires_dist, k.top_level, k.sha256, k.size, %s " \
+                "FROM catalog k JOIN projects p ON p.id = k.project_id JOIN categories c ON c.id = p.category_id"
+
+
+def connect_read_only(database_path):
+    """
+    Open a read-only connection. Python 2 can't pass sqlite URIs, there the connection is
+    made read-only with a pragma instead.
+    Args:
+        database_path: path to the database
+    Returns: sqlite3.Connection
+    """
+    if sys.version_info[0] >= 3:
+        uri = "file:" + pathname2url(database_path) + "?mode=ro"
+        if script_loader_config.database_immutable:
+            uri += "&immutable=1"
+        return sqlite3.connect(uri, uri=True)
+    con = sqlite3.connect(database_path)
+    con.execute("PRAGMA query_only = 1")
+    return con
+
+
+def create_schema(database_path):
+    """
+    Create the tables and indexes, and copy the rows of an old scripts table into them.
+    Catalog tables published before the search columns were added get them, and their whls
+    are read again on the next publish.
+    Run this on the publisher side, clients only read.
+    Args:
+        database_path: path to the database
+    """
+    con = sqlite3.connect(database_path)
+    try:
+        with con:
+            con.executescript(SCHEMA)
+            columns = set(row[1] for row in con.execute("PRAGMA table_info(catalog)"))
+            for column, default in SEARCH_COLUMNS:
+                if column not in columns:
+                    con.execute("ALTER TABLE catalog ADD COLUMN %s TEXT NOT NULL DEFAULT %s" % (column, default))
+                    con.execute("UPDATE catalog SET mtime = NULL")  # read every whl again on the next publish
+            tables = set(row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+            if "scripts" in tables and not con.execute("SELECT 1 FROM projects LIMIT 1").fetchall():
+                rows = con.execute("SELECT Id, Name, Path, Category, Usercount FROM scripts ORDER BY rowid").fetchall()
+                for row_id, name, path, category, usercount in rows:
+                    con.execute("INSERT OR IGNORE INTO categories (name, sort_order) "
+                                "VALUES (?, (SELECT COUNT(*) FROM categories))", (category,))
+                    con.execute("INSERT INTO projects (name, path, category_id, usercount) "
+                                "VALUES (?, ?, (SELECT id FROM categories WHERE name = ?), ?)",
+                                (name, path, category, usercount or 0))
+    finally:
+        con.close()
+
+
+class Database(object):
+    """
+    Logic class for script loader. Connects lazily, with one read-only connection per thread.
+    """
+    def __init__(self, database_path=None):
+        """
+        init function
+        Args:
+            database_path: path to the database, defaults to the path in the config
+        """
+        self.database_path = database_path or script_loader_config.database_path
+        self._local = threading.local()  # per thread connection
+        self._tables = None  # table names
+
+    def connection(self):
+        """
+        Get the read-only connection of the current thread, connecting on first use
+        Returns: sqlite3.Connection
+        """
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = connect_read_only(self.database_path)
+            self._local.con = con
+        return con
+
+    def query(self, sql, parameters=()):
+        """
+        Run a parameterized query
+        Args:
+            sql: the query
+            parameters: query parameters
+        Returns: list of rows
+        """
+        with script_loader_timing.span("db_query", " ".join(sql.split())[:60]) as timing:
+            rows = self.connection().execute(sql, parameters).fetchall()
+            timing.add(rows=len(rows))
+        return rows
+
+    def tables(self):
+        """
+        Returns: set of table names
+        """
+        if self._tables is None:
+            self._tables = set(row[0] for row in self.query("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        return self._tables
+
+    def is_legacy(self):
+        """
+        Returns: True if the database only has the old scripts table
+        """
+        return "projects" not in self.tables()
+
+    def get_catalog(self):
+        """
+        Get the published whl index
+        Returns: dict of whl path: (category, WheelInfo), or None if nothing has been published
+        """
+        if "catalog" not in self.tables():
+            return None
+        columns = set(row[1] for row in self.query("PRAGMA table_info(catalog)"))
+        search_columns = ", ".join(("k." + column) if column in columns else default  # published by an older version
+                                   for column, default in SEARCH_COLUMNS)
+        catalog = {}
+        for path, category, name, version, requires_dist, top_level, sha256, size, summary, keywords, author \
+                in self.query(CATALOG_QUERY % search_columns):
+            catalog[path] = (category, script_loader_wheel.WheelInfo(name, version, json.loads(requires_dist),
+                                                                     json.loads(top_level), size=size, sha256=sha256,
+                                                                     summary=summary, keywords=json.loads(keywords),
+                                                                     author=author))
+        return catalog or None
+
+    def get_projects(self):
+        """
+        Get all project folders
+        Returns: list of (id, name, path, category) rows
+        """
+        if self.is_legacy():
+            return self.query("SELECT Id, Name, Path, Category FROM scripts ORDER BY rowid")
+        return self.query(PROJECTS_QUERY + " ORDER BY c.sort_order, c.id, p.id")
+
+    def get_categories(self):
+        """
+        Get all the categories
+        Returns: all the categories in an array
+        """
+        if self.is_legacy():
+            rows = self.query("SELECT Category FROM scripts GROUP BY Category ORDER BY MIN(rowid)")
+        else:
+            rows = self.query("SELECT name FROM categories ORDER BY sort_order, id")
+        return [row[0] for row in rows]
+
+    def get_paths_for_category(self, category):
+        """
+        Get the project folders of a category
+        Args:
+            category: category name
+        Returns: list of paths
+        """
+        if self.is_legacy():
+            rows = self.query("SELECT Path FROM scripts WHERE Category = ? ORDER BY rowid", (category,))
+        else:
+            rows = self.query("SELECT p.path FROM projects p JOIN categories c ON c.id = p.category_id "
+                              "WHERE c.name = ? ORDER BY p.id", (category,))
+        return [row[0] for row in rows]
+
+    def build_snapshot(self, previous=None):
+        """
+        Scan the database and the project folders once. If the catalog has been published
+        into the database, it is read with one query instead of walking the project folders,
+        only the project folders whose source can't be published are listed.
+        Args:
+            previous: the previous snapshot. Folders that haven't changed since it was taken are not listed again.
+        Returns: CatalogSnapshot
+        """
+        self._tables = None  # the catalog table may have been published since the last scan
+        projects = self.get_projects()
+        catalog = self.get_catalog()
+        folders = {}
+        source_status = {}
+        if catalog is not None:  # published index, no need to walk the share
+            whl_paths = dict((path, category) for path, (category, metadata) in catalog.items())
+            metadata = dict((path, metadata) for path, (category, metadata) in catalog.items())
+            source_status = dict((row[2], script_loader_catalog.SOURCE_OK) for row in projects)
+            live = [row for row in projects if not script_loader_sources.get_source(row[2]).publishable]
+            if live:
+                whl_paths.update(self.get_folder_contents(live, previous.folders if previous else None, folders,
+                                                          source_status))
+            return script_loader_catalog.CatalogSnapshot(projects, self.get_categories(), whl_paths,
+                                                         self.check_for_duplicates(whl_paths), folders, source_status,
+                                                         metadata)
+        whl_paths = self.get_folder_contents(projects, previous.folders if previous else None, folders, source_status)
+        duplicates = self.check_for_duplicates(whl_paths)
+        return script_loader_catalog.CatalogSnapshot(projects, self.get_categories(), whl_paths, duplicates, folders,
+                                                     source_status)
+
+    def get_folder_contents(self, projects=None, previous_folders=None, folders=None, source_status=None):
+        """
+        Gets the whl files from the database folder paths. The folders are scanned in parallel,
+        a folder that times out returns what was found so far.
+        Args:
+            projects: project rows, queried if not given
+            previous_folders: folder listings of a previous scan, for incremental rescans
+            folders: dict that the folder listings of this scan are added to
+            source_status: dict that the status of each project folder is added to
+        Returns: whl paths
+        """
+        whl_files = {}
+        if projects is None:
+            projects = self.get_projects()
+        rows = [(row[2], row[3]) for row in projects]  # path, category
+        scans = script_loader_catalog.scan_roots([path for path, category in rows], previous_folders)
+        for path, category in rows:
+            scan = scans[path]
+            for whl_path in scan.whl_paths:
+                whl_files.update({whl_path: category})
+            if folders is not None:
+                folders.update(scan.folders)
+            if source_status is not None:
+                source_status[path] = scan.status
+        return whl_files
+
+    def check_for_duplicates(self, whl_files=None):
+        """
+        Check if there are duplicate files in the project. The whls are grouped by their
+        normalized project name in one pass.
+        Args:
+            whl_files: whl paths to check, scanned from the project folders if not given
+        Returns: dict of normalized project name: DuplicateGroup, only for names with more than one whl
+        """
+        db = whl_files if whl_files is not None else self.get_folder_contents()
+        groups = {}
+        for path in db:
+            name, version = script_loader_catalog.parse_wheel_filename(path)  # project name and version
+            key = script_loader_installed.normalize_name(name)
+            if key not in groups:
+                groups[key] = script_loader_catalog.DuplicateGroup(name)
+            groups[key].add(version, path)
+        duplicates = dict((key, group) for key, group in groups.items() if len(group.candidates) > 1)
+        if duplicates:
+            print("Warning: Duplicate package found! this might cause some issues: " + ", ".join(sorted(duplicates)))
+        else:
+            print("No duplicate packages found.")
+        return duplicates
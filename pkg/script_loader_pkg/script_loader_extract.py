@@ -0,0 +1,203 @@
+'''
+Staged whl extraction.
+
+A whl is extracted into a staging folder inside the scripts folder first, checking every
+file against its RECORD hash while it is written. The staged top level folders and files
+are then renamed into the scripts folder. Folders that already exist, e.g. a namespace package
+shared with other packages, are merged into file by file, so only files of the whl are replaced.
+If anything fails, the staging folder is removed and any replaced files are moved back, so a
+package is never left half installed.
+'''
+
+import os
+import time
+import errno
+import uuid
+import shutil
+import hashlib
+import zipfile
+import script_loader_pkg.script_loader_wheel_cache as script_loader_wheel_cache
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+
+COPY_BUFFER_SIZE = 1024 * 1024
+STAGING_FOLDER = ".script_loader_staging"
+
+
+class ExtractResult(object):
+    """
+    Timing and size of one extraction
+    """
+    def __init__(self, path):
+        self.path = path
+        self.files = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.installed = []  # top level names moved into the scripts folder
+
+    def __str__(self):
+        return "%d files, %.1f KB in %.3f s" % (self.files, self.bytes_written / 1024.0, self.seconds)
+
+
+def is_unsafe_path(name):
+    """
+    Args:
+        name: member name in a whl
+    Returns: True if the member would be written outside the staging folder
+    """
+    parts = name.replace("\\", "/").split("/")
+    return name.startswith(("/", "\\")) or ":" in parts[0] or ".." in parts
+
+
+def stage_wheel(archive, staging, result, verify=True):
+    """
+    Extract a whl into a staging folder
+    Args:
+        archive: zipfile.ZipFile of the whl
+        staging: the staging folder
+        result: ExtractResult that is updated with the files and bytes written
+        verify: check every file against its RECORD hash
+    """
+    try:
+        info = script_loader_wheel.read_archive(archive, record=verify)
+    except KeyError as e:
+        raise script_loader_wheel_cache.WheelIntegrityError(str(e))
+    if verify and info.record is None:
+        raise script_loader_wheel_cache.WheelIntegrityError("RECORD file is missing")
+    record = dict((path, (digest, size)) for path, digest, size in info.record) if verify else {}
+    unhashed = (info.dist_info + "/RECORD", info.dist_info + "/RECORD.jws", info.dist_info + "/RECORD.p7s")
+    infos = [info for info in archive.infolist() if not info.filename.endswith("/")]
+    for info in infos:  # before anything is written
+        if is_unsafe_path(info.filename):
+            raise script_loader_wheel_cache.WheelIntegrityError("unsafe path in whl: " + info.filename)
+        if verify and info.filename not in unhashed and not record.get(info.filename, ("", ""))[0]:
+            raise script_loader_wheel_cache.WheelIntegrityError(info.filename + " is not listed in RECORD")
+    for folder in sorted(set(os.path.dirname(info.filename) for info in infos)):  # create each folder once
+        if folder and not os.path.isdir(staging + "/" + folder):
+            os.makedirs(staging + "/" + folder)
+    for info in infos:
+        expected = record.get(info.filename, ("", ""))[0]
+        data_hash = hashlib.new(expected.split("=", 1)[0]) if expected else None
+        src = archive.open(info)
+        try:
+            with open(staging + "/" + info.filename, "wb") as dst:
+                for chunk in iter(lambda: src.read(COPY_BUFFER_SIZE), b""):
+                    if data_hash is not None:
+                        data_hash.update(chunk)
+                    dst.write(chunk)
+                    result.bytes_written += len(chunk)
+        finally:
+            src.close()
+        if data_hash is not None and script_loader_wheel_cache.record_digest(data_hash) != expected:
+            raise script_loader_wheel_cache.WheelIntegrityError(info.filename + " doesn't match its RECORD hash")
+        result.files += 1
+
+
+def merge_into(staging, scripts_folder, relative, moved):
+    """
+    Rename a staged file or folder into the scripts folder. A folder that already exists there,
+    e.g. a namespace package shared with other packages, is merged into entry by entry. Existing
+    files are moved aside into the .replaced folder of the staging folder first.
+    Args:
+        staging: the staging folder
+        scripts_folder: path to the maya scripts folder
+        relative: path relative to the staging folder
+        moved: list of (relative path, replaced existing) that is extended with every rename
+    """
+    source = staging + "/" + relative
+    target = scripts_folder + "/" + relative
+    if os.path.isdir(source) and os.path.isdir(target):
+        for name in sorted(os.listdir(source)):
+            merge_into(staging, scripts_folder, relative + "/" + name, moved)
+        return
+    replaced = os.path.exists(target)
+    if replaced:
+        backup = staging + "/.replaced/" + relative
+        if not os.path.isdir(os.path.dirname(backup)):
+            os.makedirs(os.path.dirname(backup))
+        os.rename(target, backup)
+    try:
+        os.rename(source, target)
+    except OSError:
+        if replaced:
+            os.rename(staging + "/.replaced/" + relative, target)
+        raise
+    moved.append((relative, replaced))
+
+
+def commit_staging(staging, scripts_folder, result):
+    """
+    Rename the staged top level folders and files into the scripts folder. Top level folders
+    that don't exist yet are moved in one rename, existing ones are merged into so files of
+    other packages in them are kept. Only the files of this whl are replaced, they are moved
+    aside first and moved back if any rename fails.
+    Args:
+        staging: the staging folder
+        scripts_folder: path to the maya scripts folder
+        result: ExtractResult that is updated with the installed names
+    """
+    names = sorted(name for name in os.listdir(staging) if name != ".replaced")
+    moved = []  # (relative path, replaced existing)
+    try:
+        for name in names:
+            merge_into(staging, scripts_folder, name, moved)
+    except OSError:
+        for relative, replaced in reversed(moved):  # roll back
+            os.rename(scripts_folder + "/" + relative, staging + "/" + relative)
+            if replaced:
+                os.rename(staging + "/.replaced/" + relative, scripts_folder + "/" + relative)
+        raise
+    result.installed = names
+
+
+def make_staging_folder(scripts_folder):
+    """
+    Create an empty staging folder for one install. Parallel installs share the parent folder,
+    which is removed by whichever install finishes last.
+    Args:
+        scripts_folder: path to the maya scripts folder
+    Returns: path to the staging folder
+    """
+    parent = scripts_folder + "/" + STAGING_FOLDER
+    staging = parent + "/" + uuid.uuid4().hex
+    while True:
+        try:
+            os.makedirs(parent)  # also creates a missing scripts folder
+        except OSError as e:
+            if e.errno != errno.EEXIST:  # already created by another install
+                raise
+        try:
+            os.mkdir(staging)
+            return staging
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            # the parent was removed by an install that just finished, create it again
+
+
+def extract_wheel(path, scripts_folder, verify=True):
+    """
+    Install a whl into the scripts folder through a staging folder
+    Args:
+        path: path to the (locally cached) whl
+        scripts_folder: path to the maya scripts folder
+        verify: check every file against its RECORD hash
+    Returns: ExtractResult
+    """
+    start = time.time()
+    result = ExtractResult(path)
+    staging = make_staging_folder(scripts_folder)
+    try:
+        archive = zipfile.ZipFile(path)
+        try:
+            stage_wheel(archive, staging, result, verify)
+        finally:
+            archive.close()
+        commit_staging(staging, scripts_folder, result)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            os.rmdir(scripts_folder + "/" + STAGING_FOLDER)  # only removed when no other install is running
+        except OSError:
+            pass
+    result.seconds = time.time() - start
+    return result
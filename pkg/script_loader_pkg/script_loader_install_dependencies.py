@@ -1,28 +1,68 @@
 '''
-Install python dependencies as admin.
-TODO: check if dependencies are already installed
+Install python dependencies into the python that runs this script (mayapy).
+Usage: script_loader_install_dependencies.py <wheelhouse> <requirement> [<requirement> ...]
+All requirements are installed with one offline pip run from the wheelhouse folder. pip runs
+synchronously and its exit code is the exit code of the script.
+On windows, when the site-packages folder of the python isn't writable, the script runs itself
+again as admin and waits for it to finish.
 '''
 
-import ctypes
+import os
 import sys
+import ctypes
+import sysconfig
+import subprocess
+
+SEE_MASK_NOCLOSEPROCESS = 0x40  # ShellExecuteEx returns a handle to the started process
+SW_SHOWNORMAL = 1
+INFINITE = 0xFFFFFFFF
+
+
+class ShellExecuteInfo(ctypes.Structure):
+    """
+    SHELLEXECUTEINFOW
+    """
+    _fields_ = [("cbSize", ctypes.c_ulong), ("fMask", ctypes.c_ulong), ("hwnd", ctypes.c_void_p),
+                ("lpVerb", ctypes.c_wchar_p), ("lpFile", ctypes.c_wchar_p), ("lpParameters", ctypes.c_wchar_p),
+                ("lpDirectory", ctypes.c_wchar_p), ("nShow", ctypes.c_int), ("hInstApp", ctypes.c_void_p),
+                ("lpIDList", ctypes.c_void_p), ("lpClass", ctypes.c_wchar_p), ("hkeyClass", ctypes.c_void_p),
+                ("dwHotKey", ctypes.c_ulong), ("hIcon", ctypes.c_void_p), ("hProcess", ctypes.c_void_p)]
+
+
+def to_text(value):
+    """
+    Args:
+        value: str, or bytes in python 2
+    Returns: the value as text, for the wide char windows api
+    """
+    if isinstance(value, bytes):
+        return value.decode(sys.getfilesystemencoding() or "utf-8")
+    return value
+
+
+def pip_command(wheelhouse, dependencies):
+    """
+    Args:
+        wheelhouse: folder of dependency whls
+        dependencies: requirement strings
+    Returns: command line of one offline pip run, without going to the internet
+    """
+    return [sys.executable, "-m", "pip", "install", "--no-index", "--find-links", wheelhouse] + list(dependencies)
 
 
-def pip_auto_install(dependency):
+def pip_auto_install(wheelhouse, dependencies):
     """
-    Automatically installs all requirements if pip is installed.
+    Install all requirements with pip and wait for it
     Args:
-        dependency: dependency list to send to pip
+        wheelhouse: folder of dependency whls
+        dependencies: dependency list to send to pip
+    Returns: exit code of pip
     """
-    # requirements_file = script_folder + "/requirements.txt"
     try:
-        from pip._internal import main as pip_main
-        pip_main(['install', dependency])  # run pip to install the dependencies
-    except ImportError:
-        print("Failed to import pip. Please ensure that pip is installed.")
-        sys.exit(-1)
-    except Exception as err:
-        print("Failed to install pip requirements: " + err.message)
-        sys.exit(-1)
+        return subprocess.call(pip_command(wheelhouse, dependencies))
+    except OSError as err:
+        print("Failed to run pip: " + str(err))
+        return 1
 
 
 def is_admin():
@@ -31,26 +71,67 @@ def is_admin():
     Returns: True if admin
     """
     try:
-        return ctypes.windll.shell32.IsUserAnAdmin()
+        return bool(ctypes.windll.shell32.IsUserAnAdmin())
+    except AttributeError:  # not on windows, there is no windll
+        return False
     except Exception as e:
-        print str(e)
+        print(str(e))
+        return False
+
+
+def needs_admin():
+    """
+    Returns: True if pip can only write to the site-packages folder of this python as admin
+    """
+    if os.name != "nt" or is_admin():
         return False
+    site_packages = sysconfig.get_paths()["purelib"]
+    return os.path.isdir(site_packages) and not os.access(site_packages, os.W_OK)
 
 
-def install_dependencies(dependency):
+def run_as_admin(arguments):
     """
-    Run install dependencies if admin. If not admin, re-run the script as admin.
+    Run this script again as admin (UAC prompt) and wait for it
     Args:
-        dependency: dependency list
+        arguments: command line arguments of the script
+    Returns: exit code of the script, 1 if it couldn't be started, e.g. the prompt was declined
     """
-    if is_admin():
-        # Code of your program here
-        pip_auto_install(dependency)
-    else:
-        # Re-run the program with admin rights
-        ctypes.windll.shell32.ShellExecuteW(None, u"runas", unicode(sys.executable), unicode(__file__ + " " + dependency), None, 1)
+    info = ShellExecuteInfo()
+    info.cbSize = ctypes.sizeof(info)
+    info.fMask = SEE_MASK_NOCLOSEPROCESS
+    info.lpVerb = u"runas"
+    info.lpFile = to_text(sys.executable)
+    info.lpParameters = to_text(subprocess.list2cmdline([os.path.abspath(__file__)] + list(arguments)))
+    info.nShow = SW_SHOWNORMAL
+    if not ctypes.windll.shell32.ShellExecuteExW(ctypes.byref(info)) or not info.hProcess:
+        print("Could not start the dependency install as admin.")
+        return 1
+    kernel32 = ctypes.windll.kernel32
+    try:
+        kernel32.WaitForSingleObject(ctypes.c_void_p(info.hProcess), INFINITE)
+        exit_code = ctypes.c_ulong()
+        if not kernel32.GetExitCodeProcess(ctypes.c_void_p(info.hProcess), ctypes.byref(exit_code)):
+            return 1
+        return exit_code.value
+    finally:
+        kernel32.CloseHandle(ctypes.c_void_p(info.hProcess))
+
 
-    is_admin()
+def install_dependencies(wheelhouse, dependencies):
+    """
+    Install the dependencies, as admin if the site-packages folder needs it
+    Args:
+        wheelhouse: folder of dependency whls
+        dependencies: dependency list
+    Returns: exit code of pip
+    """
+    if needs_admin():
+        return run_as_admin([wheelhouse] + list(dependencies))
+    return pip_auto_install(wheelhouse, dependencies)
 
 
-install_dependencies(str(sys.argv[1]))
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    sys.exit(install_dependencies(str(sys.argv[1]), sys.argv[2:]))
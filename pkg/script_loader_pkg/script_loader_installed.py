@@ -0,0 +1,208 @@
+'''
+Index of the packages installed in the local maya scripts folder.
+
+The scripts folder is listed once and every dist-info folder is mapped by its normalized
+project name, so the tree, install, uninstall and launch code can look packages up
+without globbing the folder again. The index is rebuilt only when the mtime of the
+scripts folder changes.
+'''
+
+import os
+import re
+import threading
+import script_loader_pkg.script_loader_utils as script_loader_utils
+import script_loader_pkg.script_loader_timing as script_loader_timing
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+
+
+def normalize_name(name):
+    """
+    Normalize a project name as described in PEP 503, so "Example_Pkg.1" and "example-pkg-1" match.
+    Args:
+        name: project name
+    Returns: the normalized name
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class InstalledDist(object):
+    """
+    An installed package. top_level, entry_points and RECORD are read from the dist-info folder on first use.
+    """
+    def __init__(self, name, version, dist_info):
+        """
+        init function
+        Args:
+            name: project name from the dist-info folder name
+            version: installed version
+            dist_info: path to the dist-info folder
+        """
+        self.name = name
+        self.version = version
+        self.dist_info = dist_info
+        self._top_level = None
+        self._entry_points = None
+        self._record = None
+
+    @property
+    def metadata_path(self):
+        return self.dist_info + "/METADATA"
+
+    @property
+    def requires_dist(self):
+        """
+        Returns: list of Requires-Dist requirement strings from METADATA
+        """
+        try:
+            with open(self.metadata_path) as f:
+                return script_loader_wheel.parse_metadata(f).get("requires-dist", [])
+        except (IOError, OSError):
+            return []
+
+    @property
+    def top_level(self):
+        """
+        Returns: list of top level modules from top_level.txt
+        """
+        if self._top_level is None:
+            self._top_level = []
+            try:
+                with open(self.dist_info + "/top_level.txt") as f:
+                    self._top_level = script_loader_wheel.parse_top_level(f)
+            except (IOError, OSError):
+                pass
+        return self._top_level
+
+    @property
+    def entry_points(self):
+        """
+        Returns: dict of group: list of (name, "module:attr") from entry_points.txt
+        """
+        if self._entry_points is None:
+            self._entry_points = {}
+            try:
+                with open(self.dist_info + "/entry_points.txt") as f:
+                    self._entry_points = script_loader_wheel.parse_entry_points(f)
+            except (IOError, OSError):
+                pass
+        return self._entry_points
+
+    @property
+    def record(self):
+        """
+        Returns: list of (path, hash, size) rows from RECORD
+        """
+        if self._record is None:
+            self._record = []
+            try:
+                with open(self.dist_info + "/RECORD") as f:
+                    self._record = script_loader_wheel.parse_record(f)
+            except (IOError, OSError):
+                pass
+        return self._record
+
+
+class InstalledIndex(object):
+    """
+    Installed packages of one scripts folder, keyed by normalized project name.
+    """
+    def __init__(self, scripts_folder):
+        """
+        init function
+        Args:
+            scripts_folder: path to the maya scripts folder
+        """
+        self.scripts_folder = scripts_folder.replace("\\", "/")
+        self.dists = {}
+        self.mtime = None
+        self.build()
+
+    def build(self):
+        """
+        List the scripts folder and index every dist-info folder in it
+        """
+        self.dists = {}
+        with script_loader_timing.span("installed_lookup", self.scripts_folder) as timing:
+            try:
+                self.mtime = os.stat(self.scripts_folder).st_mtime
+                folders = script_loader_utils.scan_folder(self.scripts_folder)[1]
+            except OSError:
+                self.mtime = None
+                return
+            for folder_name in folders:
+                if not folder_name.endswith(".dist-info"):
+                    continue
+                path = self.scripts_folder + "/" + folder_name
+                name_version = folder_name[:-len(".dist-info")].split("-", 1)
+                version = name_version[1] if len(name_version) > 1 else self.read_version(path)
+                self.dists[normalize_name(name_version[0])] = InstalledDist(name_version[0], version, path)
+            timing.add(folders=len(folders), dists=len(self.dists))
+
+    @staticmethod
+    def read_version(dist_info):
+        """
+        Read the version from the METADATA file, for dist-info folders without a version in the name
+        Args:
+            dist_info: path to the dist-info folder
+        Returns: the version or an empty string
+        """
+        try:
+            with open(dist_info + "/METADATA") as f:
+                return script_loader_wheel.parse_metadata(f).get("version", [""])[0]
+        except (IOError, OSError):
+            return ""
+
+    def get(self, name):
+        """
+        Get an installed package
+        Args:
+            name: project name, in any spelling
+        Returns: InstalledDist or None if it isn't installed
+        """
+        return self.dists.get(normalize_name(name))
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.dists
+
+    def __iter__(self):
+        return iter(self.dists.values())
+
+    def __len__(self):
+        return len(self.dists)
+
+
+_indexes = {}  # scripts folder: InstalledIndex
+_lock = threading.Lock()
+
+
+def get_installed_index(scripts_folder):
+    """
+    Get the shared index of a scripts folder, rebuilding it if the folder has changed
+    Args:
+        scripts_folder: path to the maya scripts folder
+    Returns: InstalledIndex
+    """
+    scripts_folder = scripts_folder.replace("\\", "/")
+    try:
+        mtime = os.stat(scripts_folder).st_mtime
+    except OSError:
+        mtime = None
+    with _lock:
+        index = _indexes.get(scripts_folder)
+        if index is None or index.mtime != mtime:
+            index = InstalledIndex(scripts_folder)
+            _indexes[scripts_folder] = index
+        return index
+
+
+def invalidate(scripts_folder=None):
+    """
+    Forget the index of a scripts folder, or of all folders
+    Args:
+        scripts_folder: path to the maya scripts folder
+    """
+    with _lock:
+        if scripts_folder is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(scripts_folder.replace("\\", "/"), None)
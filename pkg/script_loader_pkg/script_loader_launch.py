@@ -0,0 +1,178 @@
+'''
+Launch registry for the installed tools.
+
+A whl declares its tools as entry points in the maya_tools group of its setup.py:
+
+    entry_points={"maya_tools": ["Example Tool = example_pkg_1.tool:main"]}
+
+The first launch imports the module with a normal import, under its real name, so python
+caches the bytecode and tools don't replace each other in sys.modules. Later launches call
+the function that was already imported. The modules of a package are dropped from
+sys.modules and imported again only when its installed version changes.
+
+Packages without entry points run their top level module when it is imported, as before.
+Their first launch imports it and later launches reload it from the cached bytecode.
+'''
+
+import sys
+import logging
+import importlib
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+try:
+    from importlib import reload as reload_module  # python 3
+except ImportError:
+    reload_module = reload  # python 2 builtin
+
+
+class Tool(object):
+    """
+    A tool of an installed package
+    """
+    def __init__(self, name, module, attr=None):
+        """
+        init function
+        Args:
+            name: tool name, shown in the menu
+            module: module to import
+            attr: function in the module to call, None for modules that run when imported
+        """
+        self.name = name
+        self.module = module
+        self.attr = attr
+
+
+class LoadedPackage(object):
+    """
+    Modules imported for the tools of one installed version of a package
+    """
+    def __init__(self, installed_dist):
+        """
+        init function
+        Args:
+            installed_dist: InstalledDist
+        """
+        self.version = installed_dist.version
+        self.dist_info = installed_dist.dist_info
+        self.roots = set(installed_dist.top_level)  # top level modules dropped when the version changes
+        self.targets = {}  # tool name: function, or module for tools without a function
+
+
+def parse_entry_point(name, value):
+    """
+    Args:
+        name: entry point name
+        value: "module.name:function.attr [extras]"
+    Returns: Tool
+    """
+    module, _, attr = value.split("[", 1)[0].partition(":")
+    return Tool(name, module.strip(), attr.strip() or None)
+
+
+def find_tools(installed_dist):
+    """
+    Find the tools of an installed package
+    Args:
+        installed_dist: InstalledDist
+    Returns: list of Tool, the top level module for packages without maya_tools entry points
+    """
+    entry_points = installed_dist.entry_points.get(script_loader_config.launch_entry_point_group, [])
+    tools = [parse_entry_point(name, value) for name, value in entry_points]
+    if not tools and installed_dist.top_level:
+        tools = [Tool(installed_dist.name, installed_dist.top_level[0])]
+    return tools
+
+
+def unload_modules(roots):
+    """
+    Drop modules and their submodules from sys.modules, so the next import reads the new files
+    Args:
+        roots: top level module names
+    Returns: number of modules dropped
+    """
+    names = [name for name in list(sys.modules) if name.split(".", 1)[0] in roots]
+    for name in names:
+        del sys.modules[name]
+    if hasattr(importlib, "invalidate_caches"):  # python 3 caches the folder listings of sys.path
+        importlib.invalidate_caches()
+    return len(names)
+
+
+class LaunchRegistry(object):
+    """
+    The packages whose tools were launched in this session
+    """
+    def __init__(self):
+        self.loaded = {}  # normalized project name: LoadedPackage
+
+    def get_loaded(self, installed_dist):
+        """
+        Get the loaded modules of a package, dropping them if another version was installed since
+        Args:
+            installed_dist: InstalledDist
+        Returns: LoadedPackage
+        """
+        key = script_loader_installed.normalize_name(installed_dist.name)
+        loaded = self.loaded.get(key)
+        if loaded is not None and (loaded.version, loaded.dist_info) != (installed_dist.version,
+                                                                         installed_dist.dist_info):
+            count = unload_modules(loaded.roots)
+            script_loader_timing.log("%s changed from %s to %s, dropped %d modules"
+                                     % (installed_dist.name, loaded.version, installed_dist.version, count))
+            loaded = None
+        if loaded is None:
+            loaded = self.loaded[key] = LoadedPackage(installed_dist)
+        return loaded
+
+    def launch(self, installed_dist, scripts_folder, tool_name=None):
+        """
+        Run a tool of an installed package
+        Args:
+            installed_dist: InstalledDist
+            scripts_folder: path to the maya scripts folder
+            tool_name: name of the tool, None for the first tool of the package
+        Returns: what the tool returned, or the module for tools without a function.
+            None if the package has no such tool.
+        """
+        tools = [tool for tool in find_tools(installed_dist) if tool_name in (None, tool.name)]
+        if not tools:
+            return None
+        tool = tools[0]
+        loaded = self.get_loaded(installed_dist)
+        target = loaded.targets.get(tool.name)
+        if target is None:
+            with script_loader_timing.span("tool_import", tool.module):
+                if scripts_folder not in sys.path:
+                    sys.path.insert(0, scripts_folder)
+                imported = tool.module in sys.modules
+                target = importlib.import_module(tool.module)
+                loaded.roots.add(tool.module.split(".", 1)[0])
+                module_file = (getattr(target, "__file__", None) or "").replace("\\", "/")
+                if not module_file.startswith(scripts_folder + "/"):
+                    script_loader_timing.log(tool.module + " was imported from " + module_file + " instead of " +
+                                             scripts_folder, logging.WARNING)
+                for attr in tool.attr.split(".") if tool.attr else []:
+                    target = getattr(target, attr)
+            loaded.targets[tool.name] = target
+            if tool.attr is None and not imported:  # running the module was the launch
+                return target
+        if tool.attr is None:
+            return reload_module(target)
+        return target()
+
+
+registry = LaunchRegistry()
+
+
+def launch(installed_dist, scripts_folder, tool_name=None):
+    """
+    Run a tool of an installed package with the shared registry, see LaunchRegistry.launch
+    Args:
+        installed_dist: InstalledDist
+        scripts_folder: path to the maya scripts folder
+        tool_name: name of the tool, None for the first tool of the package
+    Returns: what the tool returned, None if the package has no such tool
+    """
+    return registry.launch(installed_dist, scripts_folder.replace("\\", "/"), tool_name)
@@ -0,0 +1,98 @@
+'''
+Local on-disk cache for whl metadata.
+
+Opening every whl on the network share on each refresh is slow, so the parsed
+METADATA of each whl is stored locally and keyed by its path and the stamp of its catalog
+source, (size, mtime) for files and (size, sha256) for simple index URLs. A whl is
+only read again when one of those changes.
+'''
+
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_utils as script_loader_utils
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+import script_loader_pkg.script_loader_sources as script_loader_sources
+
+CACHE_VERSION = 4  # bump when the cached fields change
+
+
+class MetadataCache(object):
+    """
+    Persistent whl metadata cache.
+    Entries for whls that were not seen during the last refresh are evicted on save.
+    """
+    def __init__(self, cache_path=None):
+        """
+        init function
+        Args:
+            cache_path: path to the cache file, defaults to the path in the config
+        """
+        self.cache_path = cache_path or script_loader_config.metadata_cache_path
+        self.entries = {}
+        self.infos = {}  # path: WheelInfo made from the cached entry
+        self.seen = set()  # paths requested since the last eviction
+        self.dirty = False
+        self.archives_opened = 0  # number of whls read since the last eviction
+        self.load()
+
+    def load(self):
+        """
+        Load the cache file. A missing, broken or outdated file starts an empty cache.
+        """
+        data = script_loader_utils.read_json(self.cache_path, {})
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+        else:
+            self.entries = {}
+        self.infos = {}
+
+    def get(self, path):
+        """
+        Get the metadata of a whl, reading the archive only if it changed since it was cached
+        Args:
+            path: path or URL of the whl file
+        Returns: WheelInfo
+        """
+        source = script_loader_sources.get_source(path)
+        stamp = source.stamp(path)
+        self.seen.add(path)
+        entry = self.entries.get(path)
+        if entry and entry["stamp"] == stamp:
+            info = self.infos.get(path)
+            if info is None:
+                info = self.infos[path] = script_loader_wheel.WheelInfo.from_row(entry["metadata"])
+            return info
+        info = source.read_metadata(path)
+        self.archives_opened += 1
+        self.entries[path] = {"stamp": stamp, "metadata": info.as_row()}
+        self.infos[path] = info
+        self.dirty = True
+        return info
+
+    def evict(self, live_paths=None, keep_roots=None):
+        """
+        Drop entries of whls that have disappeared
+        Args:
+            live_paths: paths that still exist. Defaults to the paths requested since the last eviction.
+            keep_roots: folders whose entries are kept, e.g. project folders that are offline
+        """
+        live_paths = set(live_paths) if live_paths is not None else self.seen
+        keep_roots = tuple(root.rstrip("/") + "/" for root in keep_roots or [])
+        for path in list(self.entries):
+            if path not in live_paths and not (keep_roots and path.startswith(keep_roots)):
+                del self.entries[path]
+                self.infos.pop(path, None)
+                self.dirty = True
+        self.seen = set()
+        self.archives_opened = 0
+
+    def save(self):
+        """
+        Write the cache file if anything changed
+        """
+        if not self.dirty:
+            return
+        try:
+            script_loader_utils.atomic_write_json(self.cache_path, {"version": CACHE_VERSION, "entries": self.entries})
+            self.dirty = False
+        except (IOError, OSError) as e:
+            print("Could not write metadata cache: " + str(e))
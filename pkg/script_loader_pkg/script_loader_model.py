@@ -0,0 +1,412 @@
+'''
+Item model of the script catalog.
+
+Categories and whls keep their tree items across refreshes. A refresh only inserts,
+removes or updates the rows that actually changed, so the view keeps its expansion,
+selection and scroll position.
+
+Categories shown from the saved catalog are marked as refreshing until the refresh has
+read them again, see script_loader_catalog_cache.
+
+The view shows the catalog through CatalogFilterModel, which filters and ranks the whls
+with a search index as the user types.
+'''
+
+import collections
+from PySide2 import QtCore, QtGui
+import script_loader_pkg.script_loader_search as script_loader_search
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+# item data roles
+PATH_ROLE = QtCore.Qt.UserRole  # path to the whl
+CATEGORY_ROLE = QtCore.Qt.UserRole + 1  # category name
+OUTDATED_ROLE = QtCore.Qt.UserRole + 2  # True if the installed version is older
+SCRIPT_ITEM_ROLE = QtCore.Qt.UserRole + 3  # True if script item, False if category
+VERSION_ROLE = QtCore.Qt.UserRole + 4  # version of the whl
+INSTALLED_ROLE = QtCore.Qt.UserRole + 5  # True if installed
+DUPLICATE_ROLE = QtCore.Qt.UserRole + 6  # DuplicateGroup if the package is in the catalog more than once
+NAME_ROLE = QtCore.Qt.UserRole + 8  # project name
+ENTRY_ROLE = QtCore.Qt.UserRole + 9  # the CatalogEntry
+
+_styles = {}  # brushes and fonts, shared by all items
+
+
+def create_brushes():
+    """
+    Create color brushes for text fields. The brushes are created once and shared.
+    Returns: brushes as an array - white, gray, green, yellow
+    """
+    if "brushes" not in _styles:
+        brushes = []
+        for color in ((255, 255, 255), (128, 128, 128), (156, 255, 39), (244, 166, 81)):
+            brush = QtGui.QBrush(QtGui.QColor(*color))
+            brush.setStyle(QtCore.Qt.NoBrush)
+            brushes.append(brush)
+        _styles["brushes"] = brushes
+    return _styles["brushes"]
+
+
+def create_fonts():
+    """
+    bold/normal font. The fonts are created once and shared.
+    Returns: fonts as an array
+    """
+    if "fonts" not in _styles:
+        font_bold = QtGui.QFont()
+        font_bold.setBold(True)
+        font_normal = QtGui.QFont()
+        font_normal.setBold(False)
+        _styles["fonts"] = [font_bold, font_normal]
+    return _styles["fonts"]
+
+
+class CategoryNode(object):
+    """
+    Top level item of the model
+    """
+    __slots__ = ("name", "unavailable", "refreshing", "children", "keys")
+
+    def __init__(self, name, unavailable=False):
+        self.name = name
+        self.unavailable = unavailable
+        self.refreshing = False  # the whls are from the saved catalog and are being read again
+        self.children = []  # EntryNodes sorted by path
+        self.keys = []  # paths of the children
+
+
+class EntryNode(object):
+    """
+    Script item of the model. The node lives as long as its whl is in the catalog.
+    """
+    __slots__ = ("parent", "entry")
+
+    def __init__(self, parent, entry):
+        self.parent = parent
+        self.entry = entry
+
+
+def entry_state(entry):
+    """
+    Get the fields of an entry that are shown in the view
+    Args:
+        entry: CatalogEntry
+    Returns: tuple that changes when the item has to be redrawn
+    """
+    duplicate = tuple(sorted(entry.duplicate.candidates)) if entry.duplicate else None
+    return (entry.name, entry.version, entry.installed, entry.installed_version, entry.outdated, duplicate,
+            entry.preferred)
+
+
+class CatalogModel(QtCore.QAbstractItemModel):
+    """
+    Two level model: categories with their whls
+    """
+    def __init__(self, parent=None):
+        """
+        init function
+        Args:
+            parent: parent QObject
+        """
+        super(CatalogModel, self).__init__(parent)
+        self.categories = []  # CategoryNodes in database order
+        self.category_rows = {}  # category name: row
+
+    # QAbstractItemModel interface
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if column != 0 or row < 0:
+            return QtCore.QModelIndex()
+        if not parent.isValid():
+            if row < len(self.categories):
+                return self.createIndex(row, column, self.categories[row])
+            return QtCore.QModelIndex()
+        node = parent.internalPointer()
+        if isinstance(node, CategoryNode) and row < len(node.children):
+            return self.createIndex(row, column, node.children[row])
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        node = index.internalPointer()
+        if isinstance(node, CategoryNode):
+            return QtCore.QModelIndex()
+        category = node.parent
+        return self.createIndex(self.category_rows[category.name], 0, category)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self.categories)
+        node = parent.internalPointer()
+        if isinstance(node, CategoryNode):
+            return len(node.children)
+        return 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if isinstance(node, CategoryNode):
+            if role == QtCore.Qt.DisplayRole:
+                if node.unavailable:
+                    return node.name + " (source unavailable)"
+                if node.refreshing:
+                    return node.name + " (refreshing...)"
+                return node.name
+            if role == SCRIPT_ITEM_ROLE:
+                return False
+            if role == CATEGORY_ROLE:
+                return node.name
+            return None
+        entry = node.entry
+        if role == QtCore.Qt.DisplayRole:
+            if entry.duplicate and entry.preferred:
+                return entry.name + " - Duplicate! (newest): " + entry.version
+            if entry.duplicate:
+                return entry.name + " - Duplicate!: " + entry.version
+            if entry.outdated:
+                return entry.name + " - New version: " + entry.version
+            return entry.name + " - " + entry.version
+        if role == QtCore.Qt.ForegroundRole:
+            if entry.duplicate or entry.outdated:
+                return create_brushes()[3]  # yellow
+            if entry.installed:
+                return create_brushes()[2]  # green
+            return None
+        if role == QtCore.Qt.ToolTipRole and entry.duplicate:
+            return "\n".join(version + ": " + path for version, path in sorted(entry.duplicate.candidates))
+        if role == QtCore.Qt.ToolTipRole and entry.summary:
+            return entry.summary
+        if role == QtCore.Qt.FontRole:
+            return create_fonts()[0] if entry.installed else None
+        if role == PATH_ROLE:
+            return entry.path
+        if role == CATEGORY_ROLE:
+            return entry.category
+        if role == OUTDATED_ROLE:
+            return entry.outdated
+        if role == SCRIPT_ITEM_ROLE:
+            return True
+        if role == VERSION_ROLE:
+            return entry.version
+        if role == INSTALLED_ROLE:
+            return entry.installed
+        if role == DUPLICATE_ROLE:
+            return entry.duplicate
+        if role == NAME_ROLE:
+            return entry.name
+        if role == ENTRY_ROLE:
+            return entry
+        return None
+
+    # updates
+
+    def set_categories(self, categories, unavailable_categories=()):
+        """
+        Add new categories and remove the ones that are no longer in the database
+        Args:
+            categories: category names in database order
+            unavailable_categories: categories with project folders that couldn't be scanned
+        """
+        wanted = list(collections.OrderedDict.fromkeys(categories))  # keeps database order on python 2
+        wanted_set = set(wanted)
+        row = len(self.categories)
+        while row > 0:  # remove old categories, one contiguous run at a time
+            row -= 1
+            if self.categories[row].name in wanted_set:
+                continue
+            first = row
+            while first > 0 and self.categories[first - 1].name not in wanted_set:
+                first -= 1
+            self.beginRemoveRows(QtCore.QModelIndex(), first, row)
+            del self.categories[first:row + 1]
+            self.update_category_rows()
+            self.endRemoveRows()
+            row = first
+        existing = [name for name in wanted if name in self.category_rows]
+        for row, name in enumerate(existing):  # move the kept categories into database order
+            current = self.category_rows[name]
+            if current != row:  # always below row, the rows above are already in order
+                self.beginMoveRows(QtCore.QModelIndex(), current, current, QtCore.QModelIndex(), row)
+                self.categories.insert(row, self.categories.pop(current))
+                self.update_category_rows()
+                self.endMoveRows()
+        row = 0
+        while row < len(wanted):  # insert new categories in database order, one contiguous run at a time
+            if wanted[row] in self.category_rows:
+                row += 1
+                continue
+            end = row
+            while end < len(wanted) and wanted[end] not in self.category_rows:
+                end += 1
+            self.beginInsertRows(QtCore.QModelIndex(), row, end - 1)
+            self.categories[row:row] = [CategoryNode(name) for name in wanted[row:end]]
+            self.update_category_rows()
+            self.endInsertRows()
+            row = end
+        unavailable_categories = set(unavailable_categories)
+        for row, node in enumerate(self.categories):
+            unavailable = node.name in unavailable_categories
+            if node.unavailable != unavailable:
+                node.unavailable = unavailable
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index)
+
+    def set_category_entries(self, category, entries):
+        """
+        Update the whls of a category. Only rows that were added, removed or changed are touched.
+        Args:
+            category: category name
+            entries: list of CatalogEntry
+        """
+        row = self.category_rows.get(category)
+        if row is None:
+            return
+        node = self.categories[row]
+        parent = self.index(row, 0)
+        new_entries = dict((entry.path, entry) for entry in entries)
+
+        child_row = len(node.children)
+        while child_row > 0:  # remove whls that have disappeared, one contiguous run at a time
+            child_row -= 1
+            if node.keys[child_row] in new_entries:
+                continue
+            first = child_row
+            while first > 0 and node.keys[first - 1] not in new_entries:
+                first -= 1
+            self.beginRemoveRows(parent, first, child_row)
+            del node.children[first:child_row + 1]
+            del node.keys[first:child_row + 1]
+            self.endRemoveRows()
+            child_row = first
+
+        paths = sorted(new_entries)  # the kept keys are already in this order
+        child_row = 0
+        while child_row < len(paths):
+            path = paths[child_row]
+            if child_row < len(node.keys) and node.keys[child_row] == path:  # existing whl
+                child = node.children[child_row]
+                entry = new_entries[path]
+                changed = entry_state(child.entry) != entry_state(entry)
+                child.entry = entry
+                if changed:
+                    index = self.index(child_row, 0, parent)
+                    self.dataChanged.emit(index, index)
+                child_row += 1
+                continue
+            # new whls, up to the next existing one
+            next_key = node.keys[child_row] if child_row < len(node.keys) else None
+            end = child_row
+            while end < len(paths) and paths[end] != next_key:
+                end += 1
+            self.beginInsertRows(parent, child_row, end - 1)
+            node.children[child_row:child_row] = [EntryNode(node, new_entries[key]) for key in paths[child_row:end]]
+            node.keys[child_row:child_row] = paths[child_row:end]
+            self.endInsertRows()
+            child_row = end
+
+    def set_refreshing(self, refreshing, category=None):
+        """
+        Mark categories as shown from the saved catalog while the refresh reads them again
+        Args:
+            refreshing: True to mark, False when the category is up to date
+            category: only this category, None for all of them
+        """
+        for row, node in enumerate(self.categories):
+            if (category is None or node.name == category) and node.refreshing != refreshing:
+                node.refreshing = refreshing
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index)
+
+    def update_category_rows(self):
+        """
+        Rebuild the category name: row lookup
+        """
+        self.category_rows = dict((node.name, row) for row, node in enumerate(self.categories))
+
+    def entries(self, category=None):
+        """
+        Get the CatalogEntries in the model
+        Args:
+            category: only return the entries of this category
+        Returns: list of CatalogEntry
+        """
+        return [child.entry for node in self.categories for child in node.children
+                if category is None or node.name == category]
+
+
+class CatalogFilterModel(QtCore.QSortFilterProxyModel):
+    """
+    Filter-as-you-type view of a CatalogModel. While there is a query, only the matching whls
+    and their categories are shown, and the whls are sorted by their rank.
+    """
+    def __init__(self, parent=None):
+        """
+        init function
+        Args:
+            parent: parent QObject
+        """
+        super(CatalogFilterModel, self).__init__(parent)
+        self.query = ""
+        self.search_index = None  # SearchIndex of the source model, rebuilt after it changes
+        self.ranks = None  # whl path: rank of the matches, None when there is no query
+        self.categories = set()  # categories with matches
+        self.search_timer = QtCore.QTimer(self)  # searches again once after a batch of catalog changes
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(0)
+        self.search_timer.timeout.connect(lambda: self.set_query(self.query))
+
+    def setSourceModel(self, model):
+        super(CatalogFilterModel, self).setSourceModel(model)
+        for signal in (model.rowsInserted, model.rowsRemoved, model.dataChanged, model.modelReset):
+            signal.connect(self.catalog_changed)
+
+    def catalog_changed(self, *args):
+        """
+        Drop the search index when the catalog changes, the matches are updated once the changes are done
+        """
+        self.search_index = None
+        if self.ranks is not None:
+            self.search_timer.start()
+
+    def set_query(self, query):
+        """
+        Filter the catalog
+        Args:
+            query: text typed by the user, an empty query shows everything
+        """
+        self.query = query
+        if not query.strip():
+            self.ranks = None
+            self.categories = set()
+        else:
+            with script_loader_timing.span("search", query) as timing:
+                if self.search_index is None:
+                    self.search_index = script_loader_search.SearchIndex(self.sourceModel().entries())
+                matches = self.search_index.search(query)
+                self.ranks = dict((entry.path, rank) for rank, (entry, score) in enumerate(matches))
+                self.categories = set(entry.category for entry, score in matches)
+                timing.add(matches=len(matches))
+        self.invalidateFilter()
+        self.sort(0 if self.ranks is not None else -1)  # -1 goes back to the catalog order
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.ranks is None:
+            return True
+        if not source_parent.isValid():
+            return self.sourceModel().categories[source_row].name in self.categories
+        return source_parent.internalPointer().children[source_row].entry.path in self.ranks
+
+    def lessThan(self, left, right):
+        if self.ranks is None or not left.parent().isValid():  # categories keep the database order
+            return left.row() < right.row()
+        return self.ranks.get(left.internalPointer().entry.path, 0) < \
+            self.ranks.get(right.internalPointer().entry.path, 0)
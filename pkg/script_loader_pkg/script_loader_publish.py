@@ -0,0 +1,116 @@
+'''
+Publisher side catalog indexer.
+
+Walks the project folders in the database once, reads every whl and writes name, version,
+Requires-Dist, top_level, summary, keywords, author, sha256 and size into the catalog table
+of the database. Clients then read the catalog with one query instead of walking the share.
+Whls whose size and mtime haven't changed since the last publish are not read again.
+Project folders that are simple index URLs are skipped, clients list them live.
+Project folders that are offline or can't be walked completely keep their catalog rows
+until a publish can scan them again. Whls that can't be read are left out of the catalog and
+reported, like clients skip them.
+
+Usage: python -m script_loader_pkg.script_loader_publish [database path]
+'''
+
+import os
+import sys
+import json
+import hashlib
+import sqlite3
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_db as script_loader_db
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_sources as script_loader_sources
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """
+    Args:
+        path: path to the file
+    Returns: sha256 hex digest of the file
+    """
+    data_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            data_hash.update(chunk)
+    return data_hash.hexdigest()
+
+
+def publish(database_path=None):
+    """
+    Index every whl of every project folder into the catalog table
+    Args:
+        database_path: path to the database, defaults to the path in the config
+    Returns: (whls indexed, whls read, whls removed, project folders that couldn't be scanned,
+        whls that couldn't be read)
+    """
+    database_path = database_path or script_loader_config.database_path
+    script_loader_db.create_schema(database_path)
+    con = sqlite3.connect(database_path)
+    try:
+        projects = con.execute(script_loader_db.PROJECTS_QUERY).fetchall()
+        known = dict((row[0], (row[1], row[2], row[3]))
+                     for row in con.execute("SELECT path, size, mtime, project_id FROM catalog"))
+        rows = []
+        read = 0
+        unavailable = []  # project folders whose rows are kept
+        kept_projects = set()
+        skipped = []  # whls that couldn't be read
+        for project_id, name, root, category in projects:
+            if not script_loader_sources.get_source(root).publishable:
+                continue
+            errors = []
+            whl_paths = script_loader_catalog.walk_whl_folder(root, errors=errors) if os.path.isdir(root) else []
+            if errors or not os.path.isdir(root):
+                print("Could not scan " + root + ", its catalog rows are kept.")
+                unavailable.append(root)
+                kept_projects.add(project_id)
+            for path in whl_paths:
+                try:
+                    stat = os.stat(path)
+                    if known.get(path, ())[:2] == (stat.st_size, stat.st_mtime):  # unchanged since the last publish
+                        rows.append((path, project_id, None))
+                        continue
+                    info = script_loader_wheel.read_wheel(path)
+                    rows.append((path, project_id, (info, hash_file(path), stat.st_size, stat.st_mtime)))
+                except Exception as e:  # broken or unreadable whl, leave it out of the catalog
+                    print("Could not read " + path + ": " + str(e))
+                    skipped.append(path)
+                    continue
+                read += 1
+        with con:
+            seen = set()
+            for path, project_id, new in rows:
+                seen.add(path)
+                if new is None:
+                    con.execute("UPDATE catalog SET project_id = ? WHERE path = ?", (project_id, path))
+                    continue
+                info, sha256, size, mtime = new
+                con.execute("INSERT OR REPLACE INTO catalog (path, project_id, name, version, requires_dist, "
+                            "top_level, sha256, size, mtime, summary, keywords, author) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (path, project_id, info.name, info.version,
+                             json.dumps(info.requires_dist), json.dumps(info.top_level),
+                             sha256, size, mtime, info.summary, json.dumps(info.keywords), info.author))
+            removed = [path for path in known if path not in seen and known[path][2] not in kept_projects]
+            for path in removed:
+                con.execute("DELETE FROM catalog WHERE path = ?", (path,))
+    finally:
+        con.close()
+    return len(rows), read, len(removed), unavailable, skipped
+
+
+if __name__ == "__main__":
+    indexed, read, removed, unavailable, skipped = publish(sys.argv[1] if len(sys.argv) > 1 else None)
+    print("Published %d whls (%d read, %d removed)." % (indexed, read, removed))
+    if skipped:
+        print("Left out %d whls that couldn't be read: %s" % (len(skipped), ", ".join(skipped)))
+    if unavailable:
+        print("Kept the catalog rows of %d project folders that couldn't be scanned: %s" %
+              (len(unavailable), ", ".join(unavailable)))
+    if unavailable or skipped:
+        sys.exit(1)
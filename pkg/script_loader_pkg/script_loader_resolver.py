@@ -0,0 +1,142 @@
+'''
+Dependency resolution against a local wheelhouse.
+
+The Requires-Dist of all packages being installed are resolved together, following the
+dependencies of missing packages through the whls in the wheelhouse. Everything that is
+missing is then installed with a single offline pip run.
+'''
+
+import os
+import sys
+import subprocess
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_metadata_cache as script_loader_metadata_cache
+import script_loader_pkg.script_loader_version as script_loader_version
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+DEPENDENCIES_SCRIPT = os.path.dirname(os.path.abspath(__file__)).replace("\\", "/") + \
+    "/script_loader_install_dependencies.py"
+
+
+class Resolution(object):
+    """
+    Result of resolving the requirements of one or more packages
+    """
+    def __init__(self):
+        self.satisfied = []  # requirement strings that are already installed
+        self.missing = []  # requirement strings to install
+        self.skipped = []  # requirement strings whose markers don't match this python
+
+    def report(self):
+        """
+        Returns: human readable summary
+        """
+        lines = []
+        if self.satisfied:
+            lines.append("Dependencies OK: " + ", ".join(self.satisfied))
+        if self.skipped:
+            lines.append("Dependencies not needed here: " + ", ".join(self.skipped))
+        if self.missing:
+            lines.append("Dependencies to install: " + ", ".join(self.missing))
+        return "\n".join(lines) or "No dependencies."
+
+    def as_dict(self):
+        """
+        Returns: machine readable summary
+        """
+        return {"satisfied": self.satisfied, "missing": self.missing, "skipped": self.skipped}
+
+
+def wheelhouse_index(wheelhouse):
+    """
+    List the whls in the wheelhouse
+    Args:
+        wheelhouse: folder of dependency whls
+    Returns: dict of normalized name: list of (version, path)
+    """
+    index = {}
+    if not wheelhouse or not os.path.isdir(wheelhouse):
+        return index
+    for path in script_loader_catalog.walk_whl_folder(wheelhouse.replace("\\", "/")):
+        name, version = script_loader_catalog.parse_wheel_filename(path)
+        index.setdefault(script_loader_installed.normalize_name(name), []).append((version, path))
+    return index
+
+
+def resolve(requirements, wheelhouse=None, metadata_cache=None):
+    """
+    Find which requirements are missing, including the dependencies of missing packages
+    that are in the wheelhouse
+    Args:
+        requirements: Requires-Dist strings of all packages being installed
+        wheelhouse: folder of dependency whls, defaults to the folder in the config
+        metadata_cache: MetadataCache used to read the dependencies of wheelhouse whls
+    Returns: Resolution
+    """
+    import pkg_resources  # slow to import, only needed when installing
+
+    wheelhouse = wheelhouse if wheelhouse is not None else script_loader_config.wheelhouse_path
+    metadata_cache = metadata_cache or script_loader_metadata_cache.MetadataCache()
+    ignored = set(script_loader_installed.normalize_name(x) for x in script_loader_config.ignored_dependencies)
+    available = None  # wheelhouse index, only listed if something is missing
+    resolution = Resolution()
+    seen = set()
+    queue = list(requirements)
+    while queue:
+        requirement = pkg_resources.Requirement.parse(queue.pop(0))
+        key = script_loader_installed.normalize_name(requirement.project_name)
+        if key in ignored or str(requirement) in seen:
+            continue
+        seen.add(str(requirement))
+        if requirement.marker is not None and not requirement.marker.evaluate({"extra": ""}):
+            resolution.skipped.append(str(requirement))
+            continue
+        try:
+            if pkg_resources.working_set.find(requirement) is not None:
+                resolution.satisfied.append(str(requirement))
+                continue
+        except pkg_resources.VersionConflict:  # installed, but the wrong version
+            pass
+        resolution.missing.append(str(requirement).split(";")[0].strip())
+        # follow the dependencies of the whl pip will pick from the wheelhouse
+        if available is None:
+            available = wheelhouse_index(wheelhouse)
+        candidates = [c for c in available.get(key, []) if c[0] in requirement.specifier]
+        if candidates:
+            version, path = max(candidates, key=lambda c: script_loader_version.parse_version(c[0]))
+            queue.extend(metadata_cache.get(path).requires_dist)
+    metadata_cache.save()
+    return resolution
+
+
+def get_python_executable():
+    """
+    Get the python interpreter to run pip with - mayapy next to maya, or the current python
+    Returns: path to the python executable
+    """
+    executable = sys.executable.replace("\\", "/")
+    folder, name = os.path.split(executable)
+    if name.lower().startswith("maya") and not name.lower().startswith("mayapy"):
+        executable = folder + "/mayapy" + os.path.splitext(name)[1]
+    return executable
+
+
+def install_missing(resolution, wheelhouse=None):
+    """
+    Install all missing requirements with one offline pip run
+    Args:
+        resolution: Resolution
+        wheelhouse: folder of dependency whls, defaults to the folder in the config
+    Returns: exit code of the install, 0 if nothing was missing
+    """
+    if not resolution.missing:
+        return 0
+    wheelhouse = wheelhouse if wheelhouse is not None else script_loader_config.wheelhouse_path
+    command = [get_python_executable(), DEPENDENCIES_SCRIPT, wheelhouse] + resolution.missing
+    print("Installing dependencies: " + ", ".join(resolution.missing))
+    with script_loader_timing.span("dependency_install", ", ".join(resolution.missing)) as timing:
+        exit_code = subprocess.call(command)
+        timing.add(packages=len(resolution.missing), exit_code=exit_code)
+    return exit_code
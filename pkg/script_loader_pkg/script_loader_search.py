@@ -0,0 +1,135 @@
+'''
+In-memory search index over the catalog.
+
+The normalized name, summary, keywords, category and author of every entry are split into
+tokens. Each token maps to the entries it appears in, with the weight of the best field it
+appears in, and the tokens are kept sorted so the tokens starting with a prefix are found
+with one bisect. A query matches the entries that have every query word as a token or as
+the start of one. Matches are ranked by the field weights, with exact name matches, names
+starting with the query and installed packages first.
+
+The index is built once per catalog change. Typing only runs the lookups, which are cached,
+so the tree can be filtered again on every keystroke.
+'''
+
+import re
+import bisect
+import script_loader_pkg.script_loader_installed as script_loader_installed
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)  # letters and digits, "_" and "-" split words
+
+# a token counts with the weight of the best field it appears in
+NAME_WEIGHT = 10.0
+KEYWORD_WEIGHT = 5.0
+CATEGORY_WEIGHT = 3.0
+AUTHOR_WEIGHT = 2.0
+SUMMARY_WEIGHT = 1.0
+PREFIX_FACTOR = 0.5  # a query word that is only the start of a token counts half
+
+EXACT_NAME_BONUS = 1000.0  # the query is the name of the package
+NAME_PREFIX_BONUS = 100.0  # the name starts with the query
+INSTALLED_BONUS = 5.0
+
+MAX_CACHED_LOOKUPS = 1000
+
+
+def tokenize(text):
+    """
+    Args:
+        text: text to split
+    Returns: list of lower case words
+    """
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class SearchIndex(object):
+    """
+    Token and prefix index of a list of CatalogEntries
+    """
+    def __init__(self, entries=()):
+        """
+        init function
+        Args:
+            entries: CatalogEntries to index
+        """
+        self.entries = []  # CatalogEntry by document id
+        self.names = []  # normalized project name by document id
+        self.postings = {}  # token: {document id: weight}
+        self.lookups = {}  # query word: {document id: weight}, cached between keystrokes
+        for entry in entries:
+            self.add(entry)
+        self.tokens = sorted(self.postings)
+
+    def add(self, entry):
+        """
+        Index an entry. The tokens are sorted once all entries are added.
+        Args:
+            entry: CatalogEntry
+        """
+        document = len(self.entries)
+        self.entries.append(entry)
+        self.names.append(script_loader_installed.normalize_name(entry.name))
+        metadata = entry.metadata
+        fields = [(entry.name, NAME_WEIGHT), (entry.category, CATEGORY_WEIGHT)]
+        if metadata is not None:
+            fields += [(" ".join(metadata.keywords), KEYWORD_WEIGHT), (metadata.author, AUTHOR_WEIGHT),
+                       (metadata.summary, SUMMARY_WEIGHT)]
+        for text, weight in fields:
+            for token in tokenize(text):
+                documents = self.postings.setdefault(token, {})
+                if documents.get(document, 0) < weight:
+                    documents[document] = weight
+
+    def lookup(self, word):
+        """
+        Find the entries with a token that is, or starts with, a query word
+        Args:
+            word: lower case query word
+        Returns: dict of document id: weight
+        """
+        matches = self.lookups.get(word)
+        if matches is not None:
+            return matches
+        matches = dict(self.postings.get(word, {}))
+        for row in range(bisect.bisect_right(self.tokens, word), len(self.tokens)):
+            token = self.tokens[row]
+            if not token.startswith(word):
+                break
+            for document, weight in self.postings[token].items():
+                weight *= PREFIX_FACTOR
+                if matches.get(document, 0) < weight:
+                    matches[document] = weight
+        if len(self.lookups) >= MAX_CACHED_LOOKUPS:
+            self.lookups.clear()
+        self.lookups[word] = matches
+        return matches
+
+    def search(self, query):
+        """
+        Args:
+            query: text typed by the user
+        Returns: list of (CatalogEntry, score), best match first. Empty if the query has no words.
+        """
+        scores = None
+        for word in tokenize(query):
+            matches = self.lookup(word)
+            if scores is None:
+                scores = dict(matches)
+            else:  # every word has to match
+                scores = dict((document, score + matches[document]) for document, score in scores.items()
+                              if document in matches)
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        name = script_loader_installed.normalize_name("-".join(tokenize(query)))
+        for document in scores:
+            if self.names[document] == name:
+                scores[document] += EXACT_NAME_BONUS
+            elif self.names[document].startswith(name):
+                scores[document] += NAME_PREFIX_BONUS
+            if self.entries[document].installed:
+                scores[document] += INSTALLED_BONUS
+        ranked = sorted(scores, key=lambda document: (-scores[document], self.names[document],
+                                                      self.entries[document].path))
+        return [(self.entries[document], scores[document]) for document in ranked]
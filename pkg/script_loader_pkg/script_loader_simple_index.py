@@ -0,0 +1,520 @@
+'''
+Simple repository API (PEP 503 / PEP 691) catalog source.
+
+A project folder in the database can be the URL of a simple index instead of a folder on the
+share, e.g. https://tools.studio.com/animation/simple/. The index page lists the projects, and
+each project page lists its whls. Pages are requested as json (PEP 691) and fall back to html
+(PEP 503). They are requested with the ETag of the previous scan, so an unchanged page costs
+one "304 Not Modified" response.
+
+The whls themselves are never downloaded to list them. Their METADATA is read from the
+.metadata file next to the whl when the index has one (PEP 658), or with HTTP range requests
+for the end of the zip, where the central directory and the dist-info files are. Installs
+download the whl into the local whl cache and check it against the sha256 of the index.
+
+Connections are kept alive and reused, one per host and thread.
+Files on an index are expected to never change, a new build gets a new file name.
+'''
+
+import json
+import socket
+import hashlib
+import zipfile
+import threading
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_timing as script_loader_timing
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+
+try:
+    import httplib as http_client  # python 2
+    from urlparse import urlsplit, urljoin, urldefrag
+    from HTMLParser import HTMLParser
+except ImportError:
+    import http.client as http_client
+    from urllib.parse import urlsplit, urljoin, urldefrag
+    from html.parser import HTMLParser
+
+JSON_TYPE = "application/vnd.pypi.simple.v1+json"
+ACCEPT = JSON_TYPE + ", application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.1"
+MAX_REDIRECTS = 5
+TAIL_SIZE = 64 * 1024  # first range read, the central directory and dist-info files are at the end of a whl
+HEADER_SIZE = 16 * 1024  # first range read of a .metadata file, the long description after the headers is skipped
+BLOCK_SIZE = 16 * 1024  # smallest range read after that
+
+
+class HttpError(IOError):
+    """
+    An index request failed
+    """
+    def __init__(self, url, status, reason=""):
+        super(HttpError, self).__init__("%s %s %s" % (status, reason, url))
+        self.url = url
+        self.status = status
+
+
+DOWNLOAD_ERRORS = (HttpError, http_client.HTTPException, socket.timeout, socket.gaierror)
+
+
+def is_url(path):
+    """
+    Args:
+        path: project folder or whl path
+    Returns: True for http and https URLs
+    """
+    return path.startswith(("http://", "https://"))
+
+
+class HttpClient(object):
+    """
+    Minimal keep-alive http client. Each thread has its own connection per host, so the
+    connections are reused for every page and range read of a scan.
+    """
+    def __init__(self, timeout=None):
+        """
+        init function
+        Args:
+            timeout: seconds before a request is given up on, defaults to the timeout in the config
+        """
+        self.timeout = timeout if timeout is not None else script_loader_config.index_timeout
+        self._local = threading.local()  # per thread connections
+        self._lock = threading.Lock()  # guards the counters
+        self.requests = 0
+        self.connections_opened = 0
+        self.bytes_received = 0
+
+    def connection(self, scheme, netloc):
+        """
+        Get the connection of the current thread to a host, connecting on first use
+        Args:
+            scheme: "http" or "https"
+            netloc: host and port
+        Returns: HTTPConnection
+        """
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        con = connections.get((scheme, netloc))
+        if con is None:
+            connection_class = http_client.HTTPSConnection if scheme == "https" else http_client.HTTPConnection
+            con = connections[(scheme, netloc)] = connection_class(netloc, timeout=self.timeout)
+            with self._lock:
+                self.connections_opened += 1
+        return con
+
+    def drop(self, scheme, netloc):
+        """
+        Close the connection of the current thread to a host, e.g. after the server closed it
+        Args:
+            scheme: "http" or "https"
+            netloc: host and port
+        """
+        con = getattr(self._local, "connections", {}).pop((scheme, netloc), None)
+        if con is not None:
+            con.close()
+
+    def count(self, requests=0, received=0):
+        """
+        Add to the counters
+        Args:
+            requests: number of requests sent
+            received: number of body bytes received
+        """
+        self._local.received = self.received() + received
+        with self._lock:
+            self.requests += requests
+            self.bytes_received += received
+
+    def received(self):
+        """
+        Returns: body bytes received by the current thread
+        """
+        return getattr(self._local, "received", 0)
+
+    def send(self, url, headers=None):
+        """
+        Send a GET request, following redirects. The body of the response must be read
+        completely, or the response closed, before the next request of the thread.
+        Args:
+            url: URL to get
+            headers: dict of request headers
+        Returns: (final URL, HTTPResponse)
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            target = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+            for attempt in range(2):
+                con = self.connection(parts.scheme, parts.netloc)
+                try:
+                    con.request("GET", target, headers=headers or {})
+                    response = con.getresponse()
+                    break
+                except (http_client.HTTPException, socket.error):
+                    self.drop(parts.scheme, parts.netloc)
+                    if attempt:  # a kept alive connection may have been closed by the server, retry once
+                        raise
+            self.count(requests=1)
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader("location")
+                self.count(received=len(response.read()))
+                if not location:
+                    raise HttpError(url, response.status, "redirect without a location")
+                url = urljoin(url, location)
+                continue
+            return url, response
+        raise HttpError(url, 310, "too many redirects")
+
+    def get(self, url, headers=None, expected=(200,)):
+        """
+        Get a URL and read its body
+        Args:
+            url: URL to get
+            headers: dict of request headers
+            expected: status codes that aren't an error
+        Returns: (final URL, status, response headers with lower case names, body)
+        """
+        url, response = self.send(url, headers)
+        body = response.read()
+        self.count(received=len(body))
+        if response.status not in expected:
+            raise HttpError(url, response.status, response.reason)
+        return url, response.status, dict((k.lower(), v) for k, v in response.getheaders()), body
+
+
+class Stream(object):
+    """
+    Body of a download, read in chunks
+    """
+    def __init__(self, client, url):
+        """
+        init function
+        Args:
+            client: HttpClient
+            url: URL of the file
+        """
+        self.client = client
+        self.url, self.response = client.send(url)
+        if self.response.status != 200:
+            self.response.read()
+            raise HttpError(self.url, self.response.status, self.response.reason)
+        self.complete = False
+
+    def read(self, size=-1):
+        data = self.response.read(size) if size is not None and size >= 0 else self.response.read()
+        self.client.count(received=len(data))
+        if not data:
+            self.complete = True
+        return data
+
+    def close(self):
+        if not self.complete:  # the rest of the body is still on the connection, it can't be reused
+            parts = urlsplit(self.url)
+            self.client.drop(parts.scheme, parts.netloc)
+        self.response.close()
+
+
+class RangeFile(object):
+    """
+    Read only, seekable file over HTTP range requests, enough for zipfile to read the central
+    directory and single members of a whl without downloading it
+    """
+    def __init__(self, client, url):
+        """
+        init function
+        Args:
+            client: HttpClient
+            url: URL of the whl
+        """
+        self.client = client
+        self.name = url
+        self.pos = 0
+        self.size = None
+        self.blocks = []  # (start, data) ranges that were read
+        self.fetch_tail()
+
+    def fetch_tail(self):
+        """
+        Read the end of the file, which also tells its size
+        """
+        url, status, headers, body = self.client.get(self.name, {"Range": "bytes=-%d" % TAIL_SIZE}, (200, 206))
+        if status == 200:  # the server doesn't do ranges, this is the whole file
+            self.size = len(body)
+            self.blocks.append((0, body))
+            return
+        self.size = int(headers.get("content-range", "").rsplit("/", 1)[-1])
+        self.blocks.append((self.size - len(body), body))
+
+    def fetch(self, start, end):
+        """
+        Read a range of the file
+        Args:
+            start: first byte
+            end: byte after the last byte
+        """
+        end = min(self.size, max(end, start + BLOCK_SIZE))
+        url, status, headers, body = self.client.get(self.name, {"Range": "bytes=%d-%d" % (start, end - 1)},
+                                                     (200, 206))
+        if status == 200:
+            self.blocks = [(0, body)]
+        else:
+            self.blocks.append((start, body))
+
+    def cached(self, start, end):
+        """
+        Args:
+            start: first byte
+            end: byte after the last byte
+        Returns: the bytes if they were read already, otherwise None
+        """
+        for block_start, data in self.blocks:
+            if block_start <= start and end <= block_start + len(data):
+                return data[start - block_start:end - block_start]
+        return None
+
+    def read(self, size=-1):
+        end = self.size if size is None or size < 0 else min(self.size, self.pos + size)
+        if end <= self.pos:
+            return b""
+        data = self.cached(self.pos, end)
+        if data is None:
+            self.fetch(self.pos, end)
+            data = self.cached(self.pos, end)
+        self.pos = end
+        return data
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += self.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self.blocks = []
+
+
+class LinkParser(HTMLParser):
+    """
+    Collects the anchors of a PEP 503 html page
+    """
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.anchors = []  # dict of attributes per anchor
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self.anchors.append(dict(attrs))
+
+
+def hash_from(value):
+    """
+    Args:
+        value: PEP 658 / PEP 691 hash, "sha256=<hex>", {"sha256": "<hex>"}, True or False
+    Returns: sha256 hex digest, "" if there is no sha256, None if there is no file
+    """
+    if not value or value == "false":
+        return None
+    if isinstance(value, dict):
+        return value.get("sha256", "")
+    if hasattr(value, "startswith") and value.startswith("sha256="):
+        return value[len("sha256="):]
+    return ""
+
+
+def make_link(page, href, sha256="", metadata=None, size=None):
+    """
+    Args:
+        page: URL of the page the link is on
+        href: URL of the file, relative to the page, may end with a #sha256= fragment
+        sha256: sha256 of the file if given separately
+        metadata: see hash_from, for the .metadata file
+        size: size of the file if the index lists it
+    Returns: (URL, sha256, metadata sha256, size), metadata sha256 is None if there is no .metadata file
+    """
+    url, fragment = urldefrag(urljoin(page, href))
+    if not sha256 and fragment.startswith("sha256="):
+        sha256 = fragment[len("sha256="):]
+    return url, sha256 or "", hash_from(metadata), size
+
+
+def parse_page(page, content_type, body):
+    """
+    Read the links of an index page
+    Args:
+        page: URL of the page
+        content_type: content type of the response
+        body: the page
+    Returns: (list of whl links, see make_link, list of project page URLs)
+    """
+    links = []
+    sub_pages = []
+    if content_type.split(";")[0].strip() == JSON_TYPE:
+        data = json.loads(body.decode("utf-8"))
+        for project in data.get("projects", []):  # index page
+            sub_pages.append(urljoin(page, project["name"] + "/"))
+        for f in data.get("files", []):  # project page
+            if not f.get("filename", "").endswith(".whl") or f.get("yanked"):
+                continue
+            metadata = f.get("core-metadata", f.get("dist-info-metadata"))
+            links.append(make_link(page, f["url"], f.get("hashes", {}).get("sha256", ""), metadata, f.get("size")))
+        return links, sub_pages
+    parser = LinkParser()
+    parser.feed(body.decode("utf-8"))
+    for anchor in parser.anchors:
+        href = anchor.get("href")
+        if not href or "data-yanked" in anchor:
+            continue
+        path = urlsplit(href).path
+        if path.endswith(".whl"):
+            metadata = anchor.get("data-core-metadata", anchor.get("data-dist-info-metadata"))
+            links.append(make_link(page, href, metadata=metadata))
+        elif path.endswith("/") or "." not in path.rsplit("/", 1)[-1]:  # project page, not an sdist
+            sub_pages.append(urljoin(page, href))
+    return links, sub_pages
+
+
+class SimpleIndexSource(object):
+    """
+    Catalog source for http and https project folders, see script_loader_sources
+    """
+    publishable = False  # listed live by every client, the index is already the published catalog
+
+    def __init__(self, client=None):
+        """
+        init function
+        Args:
+            client: HttpClient, shared by all the scans
+        """
+        self.client = client or HttpClient()
+        self.links = {}  # whl URL: link from the last listing, see make_link
+
+    def handles(self, path):
+        return is_url(path)
+
+    def read_page(self, page, cached=None):
+        """
+        Get an index page, or reuse the previous listing if it hasn't changed
+        Args:
+            page: URL of the page
+            cached: (etag, links, sub pages) of the previous scan
+        Returns: (etag, links, sub pages)
+        """
+        headers = {"Accept": ACCEPT}
+        if cached and cached[0]:
+            headers["If-None-Match"] = cached[0]
+        with script_loader_timing.span("index_page", page) as timing:
+            url, status, response_headers, body = self.client.get(page, headers, (200, 304))
+            timing.add(bytes=len(body))
+            if status == 304 and cached:
+                return cached[0], [tuple(link) for link in cached[1]], list(cached[2])
+            links, sub_pages = parse_page(url, response_headers.get("content-type", ""), body)
+            timing.add(whls=len(links))
+        return response_headers.get("etag", ""), links, sub_pages
+
+    def scan(self, root, previous_folders=None, folders=None, whl_paths=None, stop=None):
+        """
+        List the index page of a project folder and its project pages
+        Args:
+            root: URL of the index
+            previous_folders: page listings of the previous scan
+            folders: dict that the page listings of this scan are added to
+            whl_paths: list that the found whl URLs are added to as they are found
+            stop: threading.Event, the scan stops at the next page once it is set
+        Returns: True, a root that can't be reached raises HttpError or socket.error
+        """
+        previous_folders = previous_folders or {}
+        folders = folders if folders is not None else {}
+        whl_paths = whl_paths if whl_paths is not None else []
+        stack = [root]
+        while stack:
+            if stop is not None and stop.is_set():
+                break
+            page = stack.pop()
+            if page in folders:
+                continue
+            etag, links, sub_pages = folders[page] = self.read_page(page, previous_folders.get(page))
+            for link in links:
+                self.links[link[0]] = link
+                whl_paths.append(link[0])
+            stack.extend(reversed(sub_pages))
+        return True
+
+    def link(self, url):
+        return self.links.get(url) or (url, "", None, None)
+
+    def stamp(self, url):
+        """
+        Args:
+            url: URL of the whl
+        Returns: [size, sha256] from the index, cached metadata is read again if it changes
+        """
+        link = self.link(url)
+        return [link[3], link[1]]
+
+    def read_metadata_file(self, url, sha256=""):
+        """
+        Read the headers of a .metadata file. Only its start is requested, the whole file is
+        only read if the headers don't fit, and checked against its sha256 when it was read whole.
+        Args:
+            url: URL of the .metadata file
+            sha256: sha256 of the file from the index
+        Returns: text lines of the file, at least up to the end of the headers
+        """
+        url, status, headers, body = self.client.get(url, {"Range": "bytes=0-%d" % (HEADER_SIZE - 1)}, (200, 206))
+        complete = status == 200 or headers.get("content-range", "").endswith("/%d" % len(body))
+        if not complete and b"\n\n" not in body.replace(b"\r\n", b"\n"):  # long headers, read the whole file
+            body = self.client.get(url)[3]
+            complete = True
+        if complete and sha256 and hashlib.sha256(body).hexdigest() != sha256:
+            raise script_loader_wheel.WheelIntegrityError(url + " doesn't match its index hash")
+        return body.decode("utf-8", "replace").splitlines()
+
+    def read_metadata(self, url):
+        """
+        Read the metadata of a whl from its .metadata file, or from the end of the whl
+        Args:
+            url: URL of the whl
+        Returns: WheelInfo. Only the METADATA fields are filled when it was read from the .metadata file.
+        """
+        url, sha256, metadata_sha256, size = self.link(url)
+        file_name = url.rsplit("/", 1)[-1]
+        with script_loader_timing.span("metadata_fetch", url) as timing:
+            received = self.client.received()
+            if metadata_sha256 is not None:
+                headers = script_loader_wheel.parse_metadata(self.read_metadata_file(url + ".metadata",
+                                                                                     metadata_sha256))
+                info = script_loader_wheel.info_from_headers(
+                    headers, dist_info="-".join(file_name.split("-")[:2]) + ".dist-info", size=size or 0)
+            else:
+                range_file = RangeFile(self.client, url)
+                archive = zipfile.ZipFile(range_file)
+                try:
+                    info = script_loader_wheel.read_archive(archive)
+                finally:
+                    archive.close()
+                info.size = range_file.size
+            info.sha256 = sha256
+            timing.add(bytes=self.client.received() - received)
+        return info
+
+    def open(self, url):
+        """
+        Args:
+            url: URL of the whl
+        Returns: file like object of the whl download
+        """
+        return Stream(self.client, url)
+
+    def expected_sha256(self, url):
+        """
+        Args:
+            url: URL of the whl
+        Returns: sha256 from the index, None if the index has no hash for the whl
+        """
+        return self.link(url)[1] or None
@@ -0,0 +1,88 @@
+'''
+Catalog sources - where the whls of a project folder are listed and read from.
+
+The path of a project folder in the database picks its source:
+    folders on disk or on a network share    FolderSource
+    http:// and https:// simple index URLs   script_loader_simple_index.SimpleIndexSource
+
+A source has:
+    publishable                             True if script_loader_publish can index it into the database
+    handles(path)                           True if the project folder or whl path belongs to the source
+    scan(root, previous_folders, folders, whl_paths, stop)
+                                            list the whls of a project folder, see walk_whl_folder.
+                                            Returns False if the project folder isn't there.
+    stamp(path)                             json compatible value that changes when the whl changes
+    read_metadata(path)                     WheelInfo of a whl
+    open(path)                              file like object to read the whl from
+    expected_sha256(path)                   sha256 the whl must have, None if it isn't known
+
+Other sources can be added with register_source.
+'''
+
+import os
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+import script_loader_pkg.script_loader_simple_index as script_loader_simple_index
+
+
+class FolderSource(object):
+    """
+    Project folders on disk or on a network share
+    """
+    publishable = True
+
+    def handles(self, path):
+        return True  # fallback for everything that isn't claimed by another source
+
+    def scan(self, root, previous_folders=None, folders=None, whl_paths=None, stop=None):
+        """
+        Walk a project folder, see script_loader_catalog.walk_whl_folder
+        Returns: False if the project folder is missing or not reachable
+        """
+        if not os.path.isdir(root):
+            return False
+        script_loader_catalog.walk_whl_folder(root, previous_folders, folders, whl_paths, stop)
+        return True
+
+    def stamp(self, path):
+        """
+        Args:
+            path: path to the whl file
+        Returns: [size, mtime]
+        """
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime]
+
+    def read_metadata(self, path):
+        return script_loader_wheel.read_wheel(path)
+
+    def open(self, path):
+        return open(path, "rb")
+
+    def expected_sha256(self, path):
+        return None  # checked against RECORD when it is extracted
+
+
+_sources = [script_loader_simple_index.SimpleIndexSource()]
+_folder_source = FolderSource()
+
+
+def register_source(source):
+    """
+    Add a catalog source. It is asked before the sources that were registered earlier.
+    Args:
+        source: catalog source, see the module docstring
+    """
+    _sources.insert(0, source)
+
+
+def get_source(path):
+    """
+    Args:
+        path: project folder or whl path
+    Returns: the catalog source of the path
+    """
+    for source in _sources:
+        if source.handles(path):
+            return source
+    return _folder_source
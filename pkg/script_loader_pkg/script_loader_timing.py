@@ -0,0 +1,167 @@
+'''
+Timing spans and the script loader log.
+
+Each phase of a refresh or install is wrapped in a span that measures its time and counts
+(files, bytes, rows...). Spans are written to a rotating log file in the local data folder
+and sent to the listeners, e.g. the log tab of the UI. Spans above the slow threshold of
+their phase are logged as warnings.
+
+Phases that run once per whl, index page or keystroke (archive_open, metadata_parse,
+index_page, metadata_fetch, tree_build, search) would flood the log, so they are only
+logged when they are slow, and their totals are logged once at the end of the refresh
+with log_totals().
+'''
+
+import os
+import time
+import logging
+import threading
+import logging.handlers
+import script_loader_pkg.script_loader_config as script_loader_config
+
+LOGGER_NAME = "script_loader"
+PER_ITEM_PHASES = ("archive_open", "metadata_parse", "index_page", "metadata_fetch", "tree_build", "search")  # summed up instead of logged one by one
+
+_lock = threading.Lock()
+_logger = None
+_totals = {}  # phase: [count, seconds, counts]
+
+
+def get_logger():
+    """
+    Get the script loader logger. The rotating log file is set up on first use.
+    Returns: logging.Logger
+    """
+    global _logger
+    with _lock:
+        if _logger is None:
+            logger = logging.getLogger(LOGGER_NAME)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False  # don't print spans to the maya script editor
+            try:
+                if not os.path.isdir(script_loader_config.local_data_folder):
+                    os.makedirs(script_loader_config.local_data_folder)
+                handler = logging.handlers.RotatingFileHandler(script_loader_config.log_path,
+                                                               maxBytes=script_loader_config.log_max_bytes,
+                                                               backupCount=script_loader_config.log_backup_count)
+                handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(threadName)s %(message)s"))
+                logger.addHandler(handler)
+            except (IOError, OSError) as e:
+                print("Could not open the log file: " + str(e))
+            _logger = logger
+    return _logger
+
+
+def add_listener(handler):
+    """
+    Send the log records to another handler as well, e.g. the log tab
+    Args:
+        handler: logging.Handler
+    """
+    get_logger().addHandler(handler)
+
+
+def remove_listener(handler):
+    """
+    Args:
+        handler: logging.Handler added with add_listener
+    """
+    get_logger().removeHandler(handler)
+
+
+def log(message, level=logging.INFO):
+    """
+    Write a message to the log
+    Args:
+        message: log message
+        level: logging level
+    """
+    get_logger().log(level, message)
+
+
+def format_counts(counts):
+    """
+    Args:
+        counts: dict of name: number
+    Returns: "name=number ..." with byte counts in KB
+    """
+    parts = []
+    for name in sorted(counts):
+        value = counts[name]
+        if name == "bytes":
+            parts.append("%.1f KB" % (value / 1024.0))
+        elif isinstance(value, float):
+            parts.append("%s=%.3f" % (name, value))
+        else:
+            parts.append("%s=%s" % (name, value))
+    return " ".join(parts)
+
+
+class Span(object):
+    """
+    Times one phase. Use as a context manager:
+
+    with script_loader_timing.span("root_walk", root) as s:
+        s.add(folders=1, whls=len(whl_names))
+    """
+    def __init__(self, phase, subject="", **counts):
+        """
+        init function
+        Args:
+            phase: phase name, also the key of its slow threshold
+            subject: what the phase is working on, e.g. the root folder or whl path
+            counts: initial counts
+        """
+        self.phase = phase
+        self.subject = subject
+        self.counts = dict(counts)
+        self.start = None
+        self.seconds = 0.0
+
+    def add(self, **counts):
+        """
+        Add to the counts of the span
+        Args:
+            counts: name=number
+        """
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = time.time() - self.start
+        threshold = script_loader_config.slow_thresholds.get(self.phase)
+        slow = threshold is not None and self.seconds > threshold
+        message = "%s %.1f ms %s %s" % (self.phase, self.seconds * 1000.0, self.subject, format_counts(self.counts))
+        if exc_type is not None:
+            log(message.rstrip() + " failed: " + str(exc_value), logging.WARNING)
+        elif slow:
+            log("slow " + message.rstrip() + " (threshold %.1f s)" % threshold, logging.WARNING)
+        elif self.phase not in PER_ITEM_PHASES:
+            log(message.rstrip())
+        if self.phase in PER_ITEM_PHASES:
+            with _lock:
+                total = _totals.setdefault(self.phase, [0, 0.0, {}])
+                total[0] += 1
+                total[1] += self.seconds
+                for name, value in self.counts.items():
+                    total[2][name] = total[2].get(name, 0) + value
+        return False
+
+
+span = Span
+
+
+def log_totals():
+    """
+    Log the summed up per-whl phases since the last call, and start counting again
+    """
+    global _totals
+    with _lock:
+        totals, _totals = _totals, {}
+    for phase in sorted(totals):
+        count, seconds, counts = totals[phase]
+        log("%s total %.1f ms for %d items %s" % (phase, seconds * 1000.0, count, format_counts(counts)))
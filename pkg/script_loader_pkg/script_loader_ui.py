@@ -24,23 +24,37 @@ class Ui_Form(object):
         self.update_btn = QtWidgets.QPushButton(self.tab_1)
         self.update_btn.setGeometry(QtCore.QRect(10, 410, 291, 28))
         self.update_btn.setObjectName("pushButton_2")
-        self.treeWidget = QtWidgets.QTreeWidget(self.tab_1)
-        self.treeWidget.setGeometry(QtCore.QRect(10, 10, 291, 391))
-        self.treeWidget.setRootIsDecorated(True)
-        self.treeWidget.setUniformRowHeights(False)
-        self.treeWidget.setItemsExpandable(True)
-        self.treeWidget.setAnimated(False)
-        self.treeWidget.setHeaderHidden(True)
-        self.treeWidget.setObjectName("treeWidget")
-        item_0 = QtWidgets.QTreeWidgetItem(self.treeWidget)
-        item_1 = QtWidgets.QTreeWidgetItem(item_0)
-        brush = QtGui.QBrush(QtGui.QColor(0, 255, 8))
-        brush.setStyle(QtCore.Qt.NoBrush)
-        item_1.setForeground(0, brush)
-        item_1.setFlags(
-            QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsDragEnabled | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsTristate)
-        item_1 = QtWidgets.QTreeWidgetItem(item_0)
+        self.search_field = QtWidgets.QLineEdit(self.tab_1)
+        self.search_field.setGeometry(QtCore.QRect(10, 10, 291, 24))
+        self.search_field.setClearButtonEnabled(True)
+        self.search_field.setObjectName("search_field")
+        self.treeView = QtWidgets.QTreeView(self.tab_1)
+        self.treeView.setGeometry(QtCore.QRect(10, 40, 291, 331))
+        self.treeView.setRootIsDecorated(True)
+        self.treeView.setUniformRowHeights(True)
+        self.treeView.setItemsExpandable(True)
+        self.treeView.setAnimated(False)
+        self.treeView.setHeaderHidden(True)
+        self.treeView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.treeView.setObjectName("treeView")
+        self.progressBar = QtWidgets.QProgressBar(self.tab_1)
+        self.progressBar.setGeometry(QtCore.QRect(10, 378, 211, 23))
+        self.progressBar.setTextVisible(True)
+        self.progressBar.setObjectName("progressBar")
+        self.cancel_btn = QtWidgets.QPushButton(self.tab_1)
+        self.cancel_btn.setGeometry(QtCore.QRect(226, 376, 75, 28))
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.setObjectName("cancel_btn")
         self.tabWidget.addTab(self.tab_1, "")
+        self.tab_3 = QtWidgets.QWidget()
+        self.tab_3.setObjectName("tab_3")
+        self.log_text = QtWidgets.QPlainTextEdit(self.tab_3)
+        self.log_text.setGeometry(QtCore.QRect(10, 10, 291, 391))
+        self.log_text.setReadOnly(True)
+        self.log_text.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.log_text.setMaximumBlockCount(2000)
+        self.log_text.setObjectName("log_text")
+        self.tabWidget.addTab(self.tab_3, "")
         self.tab_2 = QtWidgets.QWidget()
         self.tab_2.setObjectName("tab_2")
         self.plainTextEdit = QtWidgets.QLabel(self.tab_2)
@@ -59,13 +73,9 @@ class Ui_Form(object):
     def retranslateUi(self, Form):
         Form.setWindowTitle(QtWidgets.QApplication.translate("Form", "Script Loader", None, -1))
         self.update_btn.setText(QtWidgets.QApplication.translate("Form", "Reload dbase", None, -1))
-        self.treeWidget.setSortingEnabled(False)
-        self.treeWidget.headerItem().setText(0, QtWidgets.QApplication.translate("Form", "Tools", None,  -1))
-        __sortingEnabled = self.treeWidget.isSortingEnabled()
-        self.treeWidget.setSortingEnabled(False)
-        self.treeWidget.topLevelItem(0).setText(0, QtWidgets.QApplication.translate("Form", "Misc", None, -1))
-        self.treeWidget.topLevelItem(0).child(0).setText(0, QtWidgets.QApplication.translate("Form", "Hello World", None,  -1))
-        self.treeWidget.setSortingEnabled(__sortingEnabled)
+        self.cancel_btn.setText(QtWidgets.QApplication.translate("Form", "Cancel", None, -1))
+        self.search_field.setPlaceholderText(QtWidgets.QApplication.translate("Form", "Search", None, -1))
+        self.treeView.setSortingEnabled(False)
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_1), QtWidgets.QApplication.translate("Form", "Script loader", None,  -1))
         self.plainTextEdit.setText(QtWidgets.QApplication.translate("Form", "Script Loader\n"
                                                                          "\n"
@@ -73,6 +83,7 @@ class Ui_Form(object):
                                                                          "\n"
                                                                          "By Laura K - www.laurakart.fi"
                                                                          , None,  -1))
+        self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_3), QtWidgets.QApplication.translate("Form", "Log", None, -1))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_2), QtWidgets.QApplication.translate("Form", "Info", None, -1))
 
 
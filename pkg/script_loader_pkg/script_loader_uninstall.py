@@ -0,0 +1,283 @@
+'''
+RECORD driven uninstall.
+
+The files of a package are found from the RECORD of its dist-info folder, so packages with
+several top level modules or data files are removed completely. The files are renamed into
+a trash folder inside the scripts folder, which is instant, and the trash is deleted on a
+background thread so large tool folders don't block Maya.
+
+Top level folders that only hold files of the package (and their compiled .pyc files) are
+moved in one rename. Folders shared with other packages or holding files that aren't in
+RECORD (e.g. user settings) are left in place and only the recorded files are moved.
+If any rename fails the moved files are put back, so a package is never left half removed.
+
+When a package is updated the new version is installed over the old one first, then only the
+files of the old version that the new one doesn't have are removed, see remove_replaced.
+'''
+
+import os
+import uuid
+import shutil
+import threading
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+TRASH_FOLDER = ".script_loader_trash"  # inside the scripts folder, on the same drive so renames are instant
+
+_trash_lock = threading.Lock()  # the trash isn't listed for deleting while files are moved into it
+
+
+class UninstallResult(object):
+    """
+    Result of a batch uninstall
+    """
+    def __init__(self):
+        self.removed = []  # (name, number of paths moved to the trash)
+        self.failed = []  # (name, error message)
+        self.not_installed = []  # names
+        self.delete_thread = None  # thread deleting the trash
+
+    def wait(self):
+        """
+        Wait until the trash has been deleted
+        """
+        if self.delete_thread is not None:
+            self.delete_thread.join()
+
+    def report(self):
+        """
+        Returns: human readable summary
+        """
+        lines = ["Uninstalled " + name for name, moved in self.removed]
+        lines += ["Failed to uninstall " + name + ": " + error for name, error in self.failed]
+        lines += [name + " is not installed" for name in self.not_installed]
+        return "\n".join(lines)
+
+    def as_dict(self):
+        """
+        Returns: machine readable summary
+        """
+        return {"uninstalled": [name for name, moved in self.removed],
+                "failed": [{"name": name, "error": error} for name, error in self.failed],
+                "not_installed": self.not_installed}
+
+
+def is_compiled(path, recorded):
+    """
+    Check if a file is the compiled version of a recorded python file
+    Args:
+        path: path relative to the scripts folder
+        recorded: set of recorded paths
+    Returns: True for .pyc / .pyo files of recorded .py files
+    """
+    if not path.endswith((".pyc", ".pyo")):
+        return False
+    folder, name = path.rsplit("/", 1) if "/" in path else ("", path)
+    if folder.endswith("__pycache__"):  # python 3: __pycache__/module.cpython-37.pyc
+        folder = folder[:-len("__pycache__")].rstrip("/")
+        name = name.split(".", 1)[0] + ".py"
+    else:
+        name = name[:-1]
+    return (folder + "/" + name if folder else name) in recorded
+
+
+def owned_entirely(scripts_folder, top_level, recorded):
+    """
+    Check if every file in a top level folder belongs to the package
+    Args:
+        scripts_folder: path to the maya scripts folder
+        top_level: name of the top level folder
+        recorded: set of recorded paths
+    Returns: True if the folder can be moved as a whole
+    """
+    for root, folders, files in os.walk(scripts_folder + "/" + top_level):
+        relative = root.replace("\\", "/")[len(scripts_folder) + 1:]
+        for name in files:
+            path = relative + "/" + name
+            if path not in recorded and not is_compiled(path, recorded):
+                return False
+    return True
+
+
+def paths_to_move(installed_dist, scripts_folder):
+    """
+    Find the paths to move to the trash for a package
+    Args:
+        installed_dist: InstalledDist
+        scripts_folder: path to the maya scripts folder
+    Returns: list of paths relative to the scripts folder, folders are moved as a whole
+    """
+    dist_info = installed_dist.dist_info.replace("\\", "/").rsplit("/", 1)[-1]
+    recorded = set()
+    for path, digest, size in installed_dist.record:
+        path = path.replace("\\", "/")
+        if path.startswith("/") or ".." in path.split("/"):  # outside the scripts folder, e.g. console scripts
+            continue
+        recorded.add(path)
+    if not recorded:  # no RECORD, fall back to top_level.txt
+        return [name for name in installed_dist.top_level if os.path.exists(scripts_folder + "/" + name)] + \
+            [dist_info]
+
+    moves = [dist_info]
+    top_levels = sorted(set(path.split("/", 1)[0] for path in recorded) - set([dist_info]))
+    for top_level in top_levels:
+        full_path = scripts_folder + "/" + top_level
+        if not os.path.isdir(full_path):
+            if os.path.exists(full_path):  # single module file, and its compiled files next to it
+                moves.append(top_level)
+                for name in (top_level + "c", top_level + "o"):
+                    if top_level.endswith(".py") and os.path.exists(scripts_folder + "/" + name):
+                        moves.append(name)
+        elif owned_entirely(scripts_folder, top_level, recorded):
+            moves.append(top_level)
+        else:  # shared or holds files of the user, only move the recorded files
+            moves.extend(path for path in sorted(recorded)
+                         if path.startswith(top_level + "/") and os.path.isfile(scripts_folder + "/" + path))
+    return moves
+
+
+def move_to_trash(scripts_folder, paths, trash):
+    """
+    Rename paths into the trash, keeping their relative paths. All of them are moved back
+    if one of the renames fails.
+    Args:
+        scripts_folder: path to the maya scripts folder
+        paths: paths relative to the scripts folder
+        trash: the trash folder of this uninstall
+    """
+    moved = []
+    try:
+        for path in paths:
+            target = trash + "/" + path
+            if not os.path.isdir(os.path.dirname(target)):
+                os.makedirs(os.path.dirname(target))
+            os.rename(scripts_folder + "/" + path, target)
+            moved.append(path)
+    except OSError:
+        for path in reversed(moved):  # roll back
+            os.rename(trash + "/" + path, scripts_folder + "/" + path)
+        raise
+
+
+def replaced_paths(previous, current, scripts_folder):
+    """
+    Find the paths of a replaced version that the version installed over it doesn't have
+    Args:
+        previous: InstalledDist of the replaced version
+        current: InstalledDist of the version installed over it
+        scripts_folder: path to the maya scripts folder
+    Returns: list of paths relative to the scripts folder, folders are moved as a whole
+    """
+    current_dist_info = current.dist_info.replace("\\", "/").rsplit("/", 1)[-1]
+    kept = set(path.replace("\\", "/") for path, digest, size in current.record)
+    kept.add(current_dist_info + "/RECORD")
+    kept_folders = set()
+    for path in kept:
+        parts = path.split("/")
+        kept_folders.update("/".join(parts[:end]) for end in range(1, len(parts)))
+    recorded = sorted(path.replace("\\", "/") for path, digest, size in previous.record)
+    paths = []
+    for path in paths_to_move(previous, scripts_folder):
+        if path in kept:
+            continue
+        if path in kept_folders:  # the new version has files in the folder, only move the old ones
+            paths.extend(old for old in recorded if old.startswith(path + "/") and old not in kept and
+                         os.path.isfile(scripts_folder + "/" + old))
+            continue
+        paths.append(path)
+    return paths
+
+
+def start_delete_trash(trash_root, background):
+    """
+    Delete the trash
+    Args:
+        trash_root: the trash folder
+        background: delete the trash on a background thread, otherwise before returning
+    Returns: the thread deleting the trash, None if it was deleted before returning
+    """
+    if not background:
+        delete_trash(trash_root)
+        return None
+    thread = threading.Thread(target=delete_trash, args=(trash_root,))
+    thread.daemon = True  # leftovers are deleted by the next uninstall
+    thread.start()
+    return thread
+
+
+def remove_replaced(previous, current, scripts_folder, background=True):
+    """
+    Remove the files of a replaced version that the version installed over it doesn't have,
+    e.g. its dist-info folder and modules that were removed in the new version
+    Args:
+        previous: InstalledDist of the replaced version
+        current: InstalledDist of the version installed over it
+        scripts_folder: path to the maya scripts folder
+        background: delete the trash on a background thread, otherwise before returning
+    Returns: number of paths removed
+    Raises: OSError if a file couldn't be moved, nothing is removed then
+    """
+    paths = replaced_paths(previous, current, scripts_folder)
+    if paths:
+        trash_root = scripts_folder + "/" + TRASH_FOLDER
+        with _trash_lock:
+            move_to_trash(scripts_folder, paths, trash_root + "/" + uuid.uuid4().hex)
+        start_delete_trash(trash_root, background)
+    return len(paths)
+
+
+def delete_trash(trash_root):
+    """
+    Delete everything in the trash folder, including leftovers of earlier sessions
+    Args:
+        trash_root: the trash folder
+    """
+    with script_loader_timing.span("trash_delete", trash_root) as timing:
+        with _trash_lock:
+            try:
+                names = os.listdir(trash_root)
+            except OSError:
+                return
+        for name in names:
+            shutil.rmtree(trash_root + "/" + name, ignore_errors=True)  # locked files are retried next time
+        timing.add(folders=len(names))
+        with _trash_lock:
+            try:
+                os.rmdir(trash_root)
+            except OSError:  # not empty, another uninstall moved files in or a file is locked
+                pass
+
+
+def uninstall_many(names, scripts_folder, background=True):
+    """
+    Uninstall packages. The files are moved to the trash before this returns, the trash
+    is deleted on a background thread.
+    Args:
+        names: package names
+        scripts_folder: path to the maya scripts folder
+        background: delete the trash on a background thread, otherwise before returning
+    Returns: UninstallResult
+    """
+    result = UninstallResult()
+    trash_root = scripts_folder + "/" + TRASH_FOLDER
+    installed_index = script_loader_installed.get_installed_index(scripts_folder)
+    with script_loader_timing.span("uninstall", ", ".join(names)) as timing:
+        for name in names:
+            installed_dist = installed_index.get(name)
+            if installed_dist is None:
+                result.not_installed.append(name)
+                continue
+            trash = trash_root + "/" + uuid.uuid4().hex
+            try:
+                paths = paths_to_move(installed_dist, scripts_folder)
+                with _trash_lock:
+                    move_to_trash(scripts_folder, paths, trash)
+            except OSError as e:  # e.g. a file is in use
+                result.failed.append((name, str(e)))
+                continue
+            result.removed.append((name, len(paths)))
+            timing.add(packages=1, paths=len(paths))
+    script_loader_installed.invalidate(scripts_folder)
+    if result.removed or os.path.isdir(trash_root):
+        result.delete_thread = start_delete_trash(trash_root, background)
+    return result
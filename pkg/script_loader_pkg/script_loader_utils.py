@@ -0,0 +1,91 @@
+'''
+Small helpers shared by the script loader modules.
+'''
+
+import os
+import json
+import tempfile
+
+try:
+    from os import scandir
+except ImportError:  # python 2
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+def scan_folder(folder):
+    """
+    List a folder in one pass
+    Args:
+        folder: path of the folder
+    Returns: (file names, sub folder names)
+    """
+    files = []
+    folders = []
+    if scandir is not None:
+        for entry in scandir(folder):
+            if entry.is_dir():
+                folders.append(entry.name)
+            else:
+                files.append(entry.name)
+        return files, folders
+    for name in os.listdir(folder):
+        if os.path.isdir(folder + "/" + name):
+            folders.append(name)
+        else:
+            files.append(name)
+    return files, folders
+
+
+def replace_file(src, dst):
+    """
+    Rename src over dst, replacing dst if it exists.
+    Args:
+        src: path of the new file
+        dst: path to replace
+    """
+    try:
+        os.replace(src, dst)
+    except AttributeError:  # python 2 has no os.replace
+        if os.name == "nt" and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+def atomic_write_json(path, data):
+    """
+    Write data as json next to the target first and rename it over the target, so readers
+    never see a half written file.
+    Args:
+        path: path of the json file
+        data: json serializable data
+    """
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=folder or None)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        replace_file(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path, default=None):
+    """
+    Read a json file, returning default if it is missing or unreadable.
+    Args:
+        path: path of the json file
+        default: value returned when the file can't be read
+    Returns: the parsed data
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return default
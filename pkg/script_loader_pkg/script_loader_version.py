@@ -0,0 +1,205 @@
+'''
+PEP 440 versions.
+
+Each version string is parsed once into a tuple that sorts in PEP 440 order (pre-releases
+before the release, post-releases after it, local versions last) and the result is cached.
+Version strings that aren't PEP 440 sort before all valid versions.
+'''
+
+import re
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_utils as script_loader_utils
+import script_loader_pkg.script_loader_installed as script_loader_installed
+
+VERSION_PATTERN = re.compile(r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:[-_.]?(?P<pre_l>a|b|c|rc|alpha|beta|pre|preview)[-_.]?(?P<pre_n>[0-9]+)?)?
+    (?:-(?P<post_n1>[0-9]+)|[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?)?
+    (?:[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+PRE_RELEASE_ORDER = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2}
+
+_cache = {}  # version string: key
+
+
+def _parts_key(parts):
+    """
+    Make alphanumeric parts comparable, numbers sort after strings like in PEP 440 local versions
+    Args:
+        parts: list of strings
+    Returns: tuple of (0, string) or (1, number)
+    """
+    return tuple((1, int(part)) if part.isdigit() else (0, part) for part in parts)
+
+
+def parse_version(version):
+    """
+    Parse a version string into a comparable key. Results are cached.
+    Args:
+        version: version string, e.g. "1.2.3rc1"
+    Returns: tuple (epoch, release, pre, post, dev, local)
+    """
+    key = _cache.get(version)
+    if key is not None:
+        return key
+    match = VERSION_PATTERN.match(version or "")
+    if match is None:  # not a PEP 440 version, sort it before all valid versions
+        key = (-1, _parts_key(re.findall(r"[0-9]+|[a-z]+", (version or "").lower())), (), (), (), ())
+        _cache[version] = key
+        return key
+
+    release = [int(x) for x in match.group("release").split(".")]
+    while len(release) > 1 and release[-1] == 0:  # 1.0.0 == 1.0 == 1
+        release.pop()
+    has_pre = match.group("pre_l") is not None
+    has_post = match.group("post_n1") is not None or match.group("post_l") is not None
+    has_dev = match.group("dev_l") is not None
+    if has_pre:
+        pre = (0, PRE_RELEASE_ORDER[match.group("pre_l").lower()], int(match.group("pre_n") or 0))
+    elif has_dev and not has_post:
+        pre = (-1,)  # 1.0.dev1 sorts before 1.0a1
+    else:
+        pre = (1,)
+    if has_post:
+        post = (0, int(match.group("post_n1") or match.group("post_n2") or 0))
+    else:
+        post = (-1,)
+    dev = (0, int(match.group("dev_n") or 0)) if has_dev else (1,)
+    local = _parts_key(re.split(r"[-_.]", match.group("local").lower())) if match.group("local") else ()
+    key = (int(match.group("epoch") or 0), tuple(release), pre, post, dev, local)
+    _cache[version] = key
+    return key
+
+
+def is_newer(version, other):
+    """
+    Args:
+        version: version string
+        other: version string
+    Returns: True if version is newer than other
+    """
+    return parse_version(version) > parse_version(other)
+
+
+class VersionPins(object):
+    """
+    Per package version pins and holds, stored in a local json file.
+    A pinned package is only updated to its pinned version, a held package is never updated.
+    """
+    def __init__(self, path=None):
+        """
+        init function
+        Args:
+            path: path to the pins file, defaults to the path in the config
+        """
+        self.path = path or script_loader_config.version_pins_path
+        data = script_loader_utils.read_json(self.path, {}) or {}
+        self.pinned = data.get("pinned", {})  # normalized name: version
+        self.held = set(data.get("held", []))  # normalized names
+
+    def save(self):
+        """
+        Write the pins file
+        """
+        script_loader_utils.atomic_write_json(self.path, {"pinned": self.pinned, "held": sorted(self.held)})
+
+    def pin(self, name, version):
+        """
+        Pin a package to a version, it is only updated to that version
+        Args:
+            name: project name
+            version: the pinned version
+        """
+        self.pinned[script_loader_installed.normalize_name(name)] = version
+
+    def hold(self, name):
+        """
+        Hold a package at its installed version, it is never updated
+        Args:
+            name: project name
+        """
+        self.held.add(script_loader_installed.normalize_name(name))
+
+    def release(self, name):
+        """
+        Remove the pin and hold of a package
+        Args:
+            name: project name
+        """
+        key = script_loader_installed.normalize_name(name)
+        self.pinned.pop(key, None)
+        self.held.discard(key)
+
+    def is_held(self, name):
+        """
+        Args:
+            name: project name
+        Returns: True if the package is held
+        """
+        return script_loader_installed.normalize_name(name) in self.held
+
+    def pinned_version(self, name):
+        """
+        Args:
+            name: project name
+        Returns: the version the package is pinned to, None if it isn't pinned
+        """
+        return self.pinned.get(script_loader_installed.normalize_name(name))
+
+    def allows_update(self, name, installed_version, version):
+        """
+        Check if a package may be updated from one version to another
+        Args:
+            name: project name
+            installed_version: the installed version
+            version: the available version
+        Returns: True if version is an update the pins allow
+        """
+        if self.is_held(name):
+            return False
+        pinned_version = self.pinned_version(name)
+        if pinned_version is not None:
+            return parse_version(version) == parse_version(pinned_version) and \
+                parse_version(installed_version) != parse_version(version)
+        return is_newer(version, installed_version)
+
+
+def is_outdated(name, installed_version, version, pins=None):
+    """
+    Check if an installed package should be updated to a version
+    Args:
+        name: project name
+        installed_version: the installed version
+        version: the available version
+        pins: VersionPins, optional
+    Returns: True if the installed package is outdated
+    """
+    if pins is not None:
+        return pins.allows_update(name, installed_version, version)
+    return is_newer(version, installed_version)
+
+
+def find_outdated(installed_index, entries, pins=None):
+    """
+    Find the installed packages that have an update in the catalog
+    Args:
+        installed_index: InstalledIndex of the maya scripts folder
+        entries: CatalogEntries of the catalog
+        pins: VersionPins, optional
+    Returns: dict of normalized name: (InstalledDist, CatalogEntry of the version to update to)
+    """
+    best = {}  # normalized name: newest allowed entry
+    for entry in entries:
+        installed_dist = installed_index.get(entry.name)
+        if installed_dist is None or not is_outdated(entry.name, installed_dist.version, entry.version, pins):
+            continue
+        key = script_loader_installed.normalize_name(entry.name)
+        current = best.get(key)
+        if current is None or parse_version(entry.version) > parse_version(current[1].version):
+            best[key] = (installed_dist, entry)
+    return best
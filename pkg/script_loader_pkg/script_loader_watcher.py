@@ -0,0 +1,134 @@
+'''
+Change watching for the catalog and the maya scripts folder.
+
+The project folders, the database file and the maya scripts folder are watched with a
+QFileSystemWatcher. Changes are debounced, so a copy of many whls only causes one refresh.
+Network shares often don't send change events, so their folders are rescanned on a timer
+instead. The rescan is incremental, only folders whose mtime changed are listed again.
+Simple index URLs can't be watched at all and are polled the same way.
+'''
+
+import os
+import ctypes
+from PySide2 import QtCore
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_simple_index as script_loader_simple_index
+
+DRIVE_REMOTE = 4  # GetDriveTypeW of a mapped network drive
+
+
+def is_mapped_drive(path):
+    """
+    Args:
+        path: folder path
+    Returns: True if the path is on a drive letter mapped to a network share (windows only)
+    """
+    drive = os.path.splitdrive(path)[0]
+    if os.name != "nt" or len(drive) != 2 or not drive.endswith(":"):
+        return False
+    try:
+        return ctypes.windll.kernel32.GetDriveTypeW(u"%s\\" % drive) == DRIVE_REMOTE
+    except (AttributeError, OSError):
+        return False
+
+
+def is_network_path(path):
+    """
+    Args:
+        path: folder path
+    Returns: True if the path is on a network share, a mapped network drive or a simple index URL
+    """
+    return (path.startswith("//") or path.startswith("\\\\") or is_mapped_drive(path) or
+            script_loader_simple_index.is_url(path))
+
+
+class CatalogWatcher(QtCore.QObject):
+    """
+    Watches the catalog folders and the maya scripts folder
+    """
+    catalog_changed = QtCore.Signal()  # project folders or the database changed
+    installed_changed = QtCore.Signal()  # something was installed to or removed from the maya scripts folder
+
+    def __init__(self, parent=None):
+        """
+        init function
+        Args:
+            parent: parent QObject
+        """
+        super(CatalogWatcher, self).__init__(parent)
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.path_changed)
+        self.watcher.fileChanged.connect(self.path_changed)
+        self.scripts_folder = None
+        self.polled = []  # folders without change events
+        # debounce timers, restarted on every change
+        self.catalog_timer = self.create_timer(script_loader_config.watch_debounce, self.catalog_changed.emit)
+        self.installed_timer = self.create_timer(script_loader_config.watch_debounce, self.installed_changed.emit)
+        self.poll_timer = self.create_timer(script_loader_config.watch_poll_interval, self.catalog_changed.emit,
+                                            single_shot=False)
+
+    def create_timer(self, seconds, slot, single_shot=True):
+        """
+        Args:
+            seconds: timer interval
+            slot: function called on timeout
+            single_shot: only fire once per start
+        Returns: QTimer
+        """
+        timer = QtCore.QTimer(self)
+        timer.setSingleShot(single_shot)
+        timer.setInterval(int(seconds * 1000))
+        timer.timeout.connect(slot)
+        return timer
+
+    def watch(self, snapshot, scripts_folder, database_path):
+        """
+        Watch the folders of a catalog snapshot. Paths that are no longer in the snapshot are
+        not watched anymore.
+        Args:
+            snapshot: CatalogSnapshot
+            scripts_folder: path to the maya scripts folder
+            database_path: path to the database file
+        """
+        self.scripts_folder = scripts_folder
+        folders = set(snapshot.folders)  # every folder the project folder walk listed
+        folders.update(row[2] for row in snapshot.projects if row[2] not in snapshot.unavailable_roots)
+        folders.add(scripts_folder)
+        files = set([database_path]) if os.path.isfile(database_path) else set()
+
+        stale = [path for path in self.watcher.directories() if path not in folders] + \
+                [path for path in self.watcher.files() if path not in files]
+        if stale:
+            self.watcher.removePaths(stale)
+        watched = set(self.watcher.directories()) | set(self.watcher.files())
+        new_paths = [path for path in folders | files
+                     if path not in watched and not script_loader_simple_index.is_url(path)]
+        failed = self.watcher.addPaths(new_paths) if new_paths else []
+
+        self.polled = sorted(set(failed) | set(path for path in folders if is_network_path(path)))
+        if self.polled and script_loader_config.watch_poll_interval > 0:
+            if not self.poll_timer.isActive():
+                self.poll_timer.start()
+        else:
+            self.poll_timer.stop()
+
+    def path_changed(self, path):
+        """
+        Start the debounce timer of a changed path
+        Args:
+            path: the changed folder or file
+        """
+        if path == self.scripts_folder:
+            self.installed_timer.start()
+        else:
+            self.catalog_timer.start()
+
+    def stop(self):
+        """
+        Stop watching
+        """
+        for timer in (self.catalog_timer, self.installed_timer, self.poll_timer):
+            timer.stop()
+        paths = self.watcher.directories() + self.watcher.files()
+        if paths:
+            self.watcher.removePaths(paths)
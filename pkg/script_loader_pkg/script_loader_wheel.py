@@ -0,0 +1,295 @@
+'''
+Wheel reader.
+
+Each whl is opened once. The dist-info folder is found from the central directory instead
+of being guessed from the file name, and METADATA is only read up to the end of its headers,
+so the long description isn't decompressed. top_level.txt and entry_points.txt are read in
+the same pass, and the number and size of the files come from the central directory, into a
+small WheelInfo record. RECORD is only parsed for installs, which check every file against it.
+
+The parse functions are shared with the installed packages, which have the same files in
+their extracted dist-info folders.
+'''
+
+import os
+import zipfile
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+HEADER_CHUNK_SIZE = 4096  # METADATA is read in chunks until the blank line after the headers
+
+
+class WheelIntegrityError(Exception):
+    """
+    A whl or its metadata doesn't match the hashes in its RECORD file or the index
+    """
+
+
+class WheelInfo(object):
+    """
+    What the script loader needs to know about a whl
+    """
+    __slots__ = ("name", "version", "requires_dist", "top_level", "entry_points", "dist_info", "files",
+                 "installed_size", "size", "sha256", "summary", "keywords", "author", "record")
+    FIELDS = __slots__[:-1]  # stored in the metadata cache, RECORD rows are only read for installs
+
+    def __init__(self, name="", version="", requires_dist=None, top_level=None, entry_points=None, dist_info="",
+                 files=0, installed_size=0, size=0, sha256="", summary="", keywords=None, author="", record=None):
+        """
+        init function
+        Args:
+            name: project name from METADATA
+            version: version from METADATA
+            requires_dist: Requires-Dist requirement strings
+            top_level: top level modules from top_level.txt
+            entry_points: dict of group: list of (name, "module:attr") from entry_points.txt
+            dist_info: name of the dist-info folder in the whl
+            files: number of files in the whl
+            installed_size: uncompressed size of the files
+            size: size of the whl file
+            sha256: sha256 of the whl file, when it was published
+            summary: one line description from METADATA
+            keywords: list of keywords from METADATA
+            author: author from METADATA, or the name of the author e-mail
+            record: list of (path, hash, size) rows from RECORD, None if it wasn't read or is missing
+        """
+        self.name = name
+        self.version = version
+        self.requires_dist = requires_dist or []
+        self.top_level = top_level or []
+        self.entry_points = entry_points or {}
+        self.dist_info = dist_info
+        self.files = files
+        self.installed_size = installed_size
+        self.size = size
+        self.sha256 = sha256
+        self.summary = summary
+        self.keywords = keywords or []
+        self.author = author
+        self.record = record
+
+    def as_dict(self):
+        """
+        Returns: the cached fields as a json compatible dict
+        """
+        return dict((field, getattr(self, field)) for field in self.FIELDS)
+
+    def as_row(self):
+        """
+        Returns: the cached fields as a list in FIELDS order, smaller and faster to load than as_dict
+        """
+        return [getattr(self, field) for field in self.FIELDS]
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Args:
+            row: list from as_row
+        Returns: WheelInfo
+        """
+        info = cls(*row)  # the metadata cache version makes sure the fields match
+        if info.entry_points:  # json turns the tuples into lists
+            info.entry_points = dict((group, [tuple(x) for x in entry_points])
+                                     for group, entry_points in info.entry_points.items())
+        return info
+
+    def __eq__(self, other):
+        return isinstance(other, WheelInfo) and self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "WheelInfo(%s %s)" % (self.name, self.version)
+
+
+def parse_metadata(lines):
+    """
+    Read the headers of a METADATA file, stopping at the blank line before the description
+    Args:
+        lines: text lines of the file
+    Returns: dict of lower case header name: list of values
+    """
+    headers = {}
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():  # end of the headers
+            break
+        if line[0] in " \t" or ":" not in line:  # continuation line of a long header
+            continue
+        key, value = line.split(":", 1)
+        headers.setdefault(key.strip().lower(), []).append(value.strip())
+    return headers
+
+
+def parse_keywords(value):
+    """
+    Args:
+        value: Keywords header, separated by commas, or by spaces in older metadata versions
+    Returns: list of keywords
+    """
+    return [x.strip() for x in value.split("," if "," in value else None) if x.strip()]
+
+
+def parse_author(headers):
+    """
+    Args:
+        headers: headers from parse_metadata
+    Returns: the author, or the name part of Author-email, e.g. "Jane Doe" of "Jane Doe <jane@studio.com>"
+    """
+    author = headers.get("author", [""])[0]
+    if not author and headers.get("author-email"):
+        author = headers["author-email"][0].split("<", 1)[0].strip().strip('"')
+    return "" if author == "UNKNOWN" or "@" in author else author
+
+
+def info_from_headers(headers, **fields):
+    """
+    Args:
+        headers: headers from parse_metadata
+        fields: other WheelInfo fields
+    Returns: WheelInfo with the METADATA fields filled in
+    """
+    summary = headers.get("summary", [""])[0]
+    return WheelInfo(headers.get("name", [""])[0], headers.get("version", [""])[0], headers.get("requires-dist", []),
+                     summary="" if summary == "UNKNOWN" else summary,
+                     keywords=parse_keywords(headers.get("keywords", [""])[0]), author=parse_author(headers),
+                     **fields)
+
+
+def parse_top_level(lines):
+    """
+    Args:
+        lines: text lines of top_level.txt
+    Returns: list of top level module names
+    """
+    return [x.strip() for x in lines if x.strip()]
+
+
+def parse_entry_points(lines):
+    """
+    Args:
+        lines: text lines of entry_points.txt
+    Returns: dict of group: list of (name, "module:attr")
+    """
+    entry_points = {}
+    group = None
+    for x in lines:
+        x = x.strip()
+        if not x or x.startswith(("#", ";")):
+            continue
+        if x.startswith("[") and x.endswith("]"):
+            group = entry_points.setdefault(x[1:-1].strip(), [])
+        elif group is not None and "=" in x:
+            name, value = x.split("=", 1)
+            group.append((name.strip(), value.strip()))
+    return entry_points
+
+
+def parse_record(lines):
+    """
+    Args:
+        lines: text lines of RECORD
+    Returns: list of (path, hash, size) rows, hash and size are empty for files without them
+    """
+    record = []
+    for line in lines:
+        row = line.rstrip("\r\n").rsplit(",", 2)
+        if len(row) == 3 and row[0]:
+            record.append(tuple(row))
+    return record
+
+
+def read_member(archive, name):
+    """
+    Read a small text file from a whl
+    Args:
+        archive: zipfile.ZipFile of the whl
+        name: member name
+    Returns: list of text lines
+    """
+    return archive.read(name).decode("utf-8").splitlines()
+
+
+def read_headers(archive, name):
+    """
+    Read a METADATA file from a whl up to the end of its headers, the description after them
+    isn't decompressed
+    Args:
+        archive: zipfile.ZipFile of the whl
+        name: member name
+    Returns: list of text lines of the headers
+    """
+    member = archive.open(name)
+    try:
+        data = b""
+        while True:
+            chunk = member.read(HEADER_CHUNK_SIZE)
+            data += chunk
+            end = data.replace(b"\r\n", b"\n").find(b"\n\n")
+            if end >= 0:
+                data = data.replace(b"\r\n", b"\n")[:end]
+                break
+            if not chunk:
+                break
+    finally:
+        member.close()
+    return data.decode("utf-8").splitlines()
+
+
+def find_dist_info(names):
+    """
+    Find the dist-info folder in the member names of a whl
+    Args:
+        names: member names from the central directory
+    Returns: name of the dist-info folder, None if the whl has no METADATA
+    """
+    for name in names:
+        if name.endswith(".dist-info/METADATA") and name.count("/") == 1:
+            return name.split("/", 1)[0]
+    return None
+
+
+def read_archive(archive, record=False):
+    """
+    Read the dist-info files of an open whl
+    Args:
+        archive: zipfile.ZipFile of the whl
+        record: also read the RECORD rows
+    Returns: WheelInfo
+    Raises: KeyError if the whl has no dist-info folder
+    """
+    infos = [x for x in archive.infolist() if not x.filename.endswith("/")]
+    names = set(x.filename for x in infos)
+    dist_info = find_dist_info(names)
+    if dist_info is None:
+        raise KeyError("There is no dist-info folder with a METADATA file in " + str(archive.filename))
+    headers = parse_metadata(read_headers(archive, dist_info + "/METADATA"))
+    info = info_from_headers(headers, dist_info=dist_info, files=len(infos),
+                             installed_size=sum(x.file_size for x in infos))
+    if dist_info + "/top_level.txt" in names:
+        info.top_level = parse_top_level(read_member(archive, dist_info + "/top_level.txt"))
+    if dist_info + "/entry_points.txt" in names:
+        info.entry_points = parse_entry_points(read_member(archive, dist_info + "/entry_points.txt"))
+    if record and dist_info + "/RECORD" in names:
+        info.record = parse_record(read_member(archive, dist_info + "/RECORD"))
+    return info
+
+
+def read_wheel(path):
+    """
+    Open a whl and read its dist-info files
+    Args:
+        path: path to the whl file
+    Returns: WheelInfo
+    """
+    with script_loader_timing.span("archive_open", path) as timing:
+        archive = zipfile.ZipFile(path, 'r')  # reads the central directory
+        size = os.fstat(archive.fp.fileno()).st_size
+        timing.add(bytes=size, members=len(archive.infolist()))
+    try:
+        with script_loader_timing.span("metadata_parse", path):
+            info = read_archive(archive)
+            info.size = size
+    finally:
+        archive.close()
+    return info
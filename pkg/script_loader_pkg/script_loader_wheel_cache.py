@@ -0,0 +1,179 @@
+'''
+Local content addressed whl cache.
+
+Whls are copied from the network share, or downloaded from a simple index, once and stored
+by their sha256, so installs, updates and reinstalls read a local copy. Downloads are checked
+against the sha256 of the index. The cache folder is shared by all users of the machine.
+The least recently used whls are removed when the cache grows over its size cap.
+'''
+
+import os
+import base64
+import hashlib
+import tempfile
+import threading
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_utils as script_loader_utils
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+import script_loader_pkg.script_loader_sources as script_loader_sources
+
+CHUNK_SIZE = 1024 * 1024
+
+
+WheelIntegrityError = script_loader_wheel.WheelIntegrityError  # moved to script_loader_wheel
+
+
+def record_digest(data_hash):
+    """
+    Format a hash the way RECORD files store it
+    Args:
+        data_hash: hashlib hash object
+    Returns: e.g. "sha256=<urlsafe base64 without padding>"
+    """
+    digest = base64.urlsafe_b64encode(data_hash.digest()).decode("ascii").rstrip("=")
+    return data_hash.name.lower() + "=" + digest  # python 2 names it "SHA256"
+
+
+class WheelCache(object):
+    """
+    sha256 addressed whl store with a source path index and LRU eviction
+    """
+    def __init__(self, folder=None, max_bytes=None):
+        """
+        init function
+        Args:
+            folder: cache folder, defaults to the folder in the config
+            max_bytes: size cap, defaults to the size in the config
+        """
+        self.folder = folder or script_loader_config.wheel_cache_folder
+        self.max_bytes = max_bytes if max_bytes is not None else script_loader_config.wheel_cache_max_bytes
+        self.index_path = self.folder + "/index.json"
+        self.index = script_loader_utils.read_json(self.index_path, {}) or {}  # source path: stamp, sha256
+        self.lock = threading.Lock()  # guards the index, whls can be fetched from several threads
+
+    def blob_path(self, sha256):
+        """
+        Args:
+            sha256: sha256 of the whl
+        Returns: path of the cached copy, whls are stored by content so the same whl is cached once
+        """
+        return self.folder + "/" + sha256[:2] + "/" + sha256 + ".whl"
+
+    def fetch(self, path):
+        """
+        Get a local copy of a whl, copying it from the share only if it isn't cached yet
+        Args:
+            path: path or URL of the whl
+        Returns: path to the local copy
+        """
+        source = script_loader_sources.get_source(path)
+        stamp = source.stamp(path)
+        with self.lock:
+            entry = self.index.get(path)
+        sha256 = entry["sha256"] if entry and entry.get("stamp") == stamp else source.expected_sha256(path)
+        if sha256:
+            blob = self.blob_path(sha256)
+            if os.path.isfile(blob):
+                try:
+                    os.utime(blob, None)  # mark as recently used
+                except OSError:  # cached by another user of the shared cache, evicted a little early
+                    pass
+                return blob
+        sha256 = self.copy_in(path, source)
+        with self.lock:
+            self.index[path] = {"stamp": stamp, "sha256": sha256}
+            self.evict(keep=sha256)
+            self.save()
+        return self.blob_path(sha256)
+
+    def copy_in(self, path, source=None):
+        """
+        Copy a whl into the cache, hashing it while it is read
+        Args:
+            path: path or URL of the whl
+            source: catalog source of the whl
+        Returns: sha256 of the whl
+        Raises: WheelIntegrityError if the whl doesn't match the sha256 its source expects
+        """
+        source = source or script_loader_sources.get_source(path)
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        data_hash = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".whl", dir=self.folder)
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                src = source.open(path)
+                try:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                        data_hash.update(chunk)
+                        dst.write(chunk)
+                finally:
+                    src.close()
+            sha256 = data_hash.hexdigest()
+            expected = source.expected_sha256(path)
+            if expected and expected != sha256:
+                raise WheelIntegrityError(path + " doesn't match the sha256 of its index")
+            blob = self.blob_path(sha256)
+            if os.path.isfile(blob):  # same whl is already cached from another path
+                os.remove(tmp_path)
+            else:
+                if not os.path.isdir(os.path.dirname(blob)):
+                    os.makedirs(os.path.dirname(blob))
+                script_loader_utils.replace_file(tmp_path, blob)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256
+
+    def discard(self, path):
+        """
+        Remove the cached copy of a whl, e.g. after it failed verification
+        Args:
+            path: path or URL of the whl
+        """
+        with self.lock:
+            entry = self.index.pop(path, None)
+            if entry and os.path.isfile(self.blob_path(entry["sha256"])):
+                os.remove(self.blob_path(entry["sha256"]))
+            self.save()
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used whls until the cache is under its size cap
+        Args:
+            keep: sha256 of a whl that must not be removed
+        """
+        blobs = []
+        total = 0
+        for root, dirs, files in os.walk(self.folder):
+            for f in files:
+                if f.endswith(".whl") and not f.startswith(".tmp_"):
+                    stat = os.stat(os.path.join(root, f))
+                    blobs.append((stat.st_mtime, stat.st_size, os.path.join(root, f), f[:-len(".whl")]))
+                    total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        removed = set()
+        for mtime, size, blob, sha256 in sorted(blobs):  # oldest first
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            try:
+                os.remove(blob)
+            except OSError:  # in use by another user
+                continue
+            removed.add(sha256)
+            total -= size
+        for path in [p for p, entry in self.index.items() if entry["sha256"] in removed]:
+            del self.index[path]
+
+    def save(self):
+        """
+        Write the source path index
+        """
+        try:
+            script_loader_utils.atomic_write_json(self.index_path, self.index)
+        except (IOError, OSError) as e:
+            print("Could not write whl cache index: " + str(e))
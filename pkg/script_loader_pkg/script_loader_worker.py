@@ -0,0 +1,98 @@
+'''
+Background catalog refresh.
+
+The database query, project folder scans and whl reads run on a QThread. Finished
+categories are sent back to the UI with signals, so the tree fills in while Maya stays
+responsive.
+'''
+
+import time
+from PySide2 import QtCore
+import script_loader_pkg.script_loader_catalog as script_loader_catalog
+import script_loader_pkg.script_loader_installed as script_loader_installed
+import script_loader_pkg.script_loader_version as script_loader_version
+import script_loader_pkg.script_loader_timing as script_loader_timing
+
+
+class CatalogRefreshWorker(QtCore.QObject):
+    """
+    Builds a catalog snapshot and its entries off the main thread
+    """
+    categories_found = QtCore.Signal(list, list)  # categories, categories with unavailable project folders
+    category_ready = QtCore.Signal(str, list)  # category, list of CatalogEntry
+    progress = QtCore.Signal(int, int)  # whls read, total whls
+    finished = QtCore.Signal(object)  # the new snapshot, or None if cancelled or failed
+    failed = QtCore.Signal(str)  # error message
+
+    def __init__(self, database, metadata_cache, maya_scripts_folder, previous_snapshot=None, changed_only=False):
+        """
+        init function
+        Args:
+            database: Database to query
+            metadata_cache: MetadataCache used to read the whls
+            maya_scripts_folder: path to the maya scripts folder
+            previous_snapshot: the previous snapshot, for incremental rescans
+            changed_only: only emit the categories that changed since the previous snapshot
+        """
+        super(CatalogRefreshWorker, self).__init__()
+        self.database = database
+        self.metadata_cache = metadata_cache
+        self.maya_scripts_folder = maya_scripts_folder
+        self.previous_snapshot = previous_snapshot
+        self.changed_only = changed_only and previous_snapshot is not None
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Stop the refresh after the current whl. Safe to call from the main thread.
+        """
+        self.cancelled = True
+
+    @QtCore.Slot()
+    def run(self):
+        """
+        Scan the catalog and emit each category as soon as its whls have been read
+        """
+        started = time.time()
+        try:
+            snapshot = self.database.build_snapshot(self.previous_snapshot)
+            if self.cancelled:
+                self.finished.emit(None)
+                return
+            self.categories_found.emit(list(snapshot.categories), list(snapshot.unavailable_categories()))
+            installed_index = script_loader_installed.get_installed_index(self.maya_scripts_folder)
+            pins = script_loader_version.VersionPins()  # pinned and held packages
+            categories = snapshot.categories
+            if self.changed_only:
+                changed = snapshot.changed_categories(self.previous_snapshot)
+                categories = [category for category in categories if category in changed]
+            total = sum(len(snapshot.paths_in_category(category)) for category in categories)
+            done = 0
+            self.progress.emit(done, total)
+            for category in categories:
+                entries = []
+                for path in snapshot.paths_in_category(category):
+                    if self.cancelled:
+                        self.metadata_cache.save()  # keep what was read so far
+                        self.finished.emit(None)
+                        return
+                    try:
+                        entries.append(script_loader_catalog.build_entry(path, category, self.metadata_cache,
+                                                                         installed_index, snapshot.duplicates, pins,
+                                                                         snapshot.metadata.get(path)))
+                    except Exception as e:  # broken or unreadable whl, skip it
+                        print("Could not read " + path + ": " + str(e))
+                    done += 1
+                self.category_ready.emit(category, entries)
+                self.progress.emit(done, total)
+            print("Read metadata from " + str(self.metadata_cache.archives_opened) + " whl archives.")
+            script_loader_timing.log("refresh %.1f ms read %d of %d whls in %d categories, %d archives opened" %
+                                     ((time.time() - started) * 1000.0, done, len(snapshot.whl_paths),
+                                      len(categories), self.metadata_cache.archives_opened))
+            # forget whls that have disappeared, but keep the ones in folders that couldn't be scanned
+            self.metadata_cache.evict(snapshot.whl_paths, keep_roots=snapshot.unavailable_roots)
+            self.metadata_cache.save()
+            self.finished.emit(snapshot)
+        except Exception as e:
+            self.failed.emit(str(e))
+            self.finished.emit(None)
@@ -0,0 +1,94 @@
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+import wheels
+import script_loader_pkg.script_loader_config as script_loader_config
+import script_loader_pkg.script_loader_batch as script_loader_batch
+
+
+class InstallManyTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp().replace("\\", "/")
+        self.scripts_folder = self.folder + "/scripts"
+        self.share = self.folder + "/share"
+        os.makedirs(self.share)
+        self.wheel_cache_folder = script_loader_config.wheel_cache_folder
+        script_loader_config.wheel_cache_folder = self.folder + "/wheels"
+
+    def tearDown(self):
+        script_loader_config.wheel_cache_folder = self.wheel_cache_folder
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_one_whl_per_project(self):
+        old = wheels.write_wheel(self.share, "bench_pkg_01_0003", "1.0.0")
+        new = wheels.write_wheel(self.share, "bench_pkg_01_0003", "1.1.0")
+        result = script_loader_batch.install_many([(old, "bench-pkg-01-0003"), (new, "bench_pkg_01_0003")],
+                                                  self.scripts_folder, install_dependencies=False)
+        self.assertEqual([name for name, extract_result in result.installed], ["bench_pkg_01_0003"])
+        self.assertEqual(result.skipped, [("bench-pkg-01-0003", old)])
+        self.assertEqual(sorted(n for n in os.listdir(self.scripts_folder) if n.endswith(".dist-info")),
+                         ["bench_pkg_01_0003-1.1.0.dist-info"])
+        with open(self.scripts_folder + "/bench_pkg_01_0003_mod/__init__.py") as f:
+            self.assertEqual(f.read(), "VERSION = '1.1.0'\n")
+
+    def test_same_whl_twice(self):
+        path = wheels.write_wheel(self.share, "pkg_a", "1.0.0")
+        selected, skipped = script_loader_batch.one_per_project([(path, "pkg-a"), (path, "pkg-a")])
+        self.assertEqual(selected, [(path, "pkg-a")])
+        self.assertEqual(skipped, [])
+
+    def test_other_projects_are_kept(self):
+        whls = [("/share/pkg_a-1.0.0-py2-none-any.whl", "pkg-a"), ("/share/pkg_b-2.0.0-py2-none-any.whl", "pkg-b"),
+                ("/share/pkg_a-0.9.0-py2-none-any.whl", "pkg-a")]
+        selected, skipped = script_loader_batch.one_per_project(whls)
+        self.assertEqual(selected, whls[:2])
+        self.assertEqual(skipped, [("pkg-a", whls[2][0])])
+
+    def test_broken_whls_fail_alone(self):
+        good = wheels.write_wheel(self.share, "pkg_a", "1.0.0")
+        truncated = wheels.write_wheel(self.share, "pkg_b", "1.0.0")
+        with open(truncated, "rb") as f:
+            data = f.read()
+        with open(truncated, "wb") as f:
+            f.write(data[:len(data) // 2])
+        no_dist_info = self.share + "/pkg_c-1.0.0-py2-none-any.whl"
+        archive = zipfile.ZipFile(no_dist_info, "w")
+        archive.writestr("pkg_c_mod/__init__.py", "")
+        archive.close()
+        result = script_loader_batch.install_many([(truncated, "pkg-b"), (good, "pkg-a"), (no_dist_info, "pkg-c")],
+                                                  self.scripts_folder, install_dependencies=False)
+        self.assertEqual([name for name, extract_result in result.installed], ["pkg-a"])
+        self.assertEqual([name for name, error in result.failed], ["pkg-b", "pkg-c"])
+        self.assertTrue(os.path.isdir(self.scripts_folder + "/pkg_a_mod"))
+
+    def test_update_replaces_the_installed_version(self):
+        old = wheels.write_wheel(self.share, "pkg_a", "1.0.0", files={
+            "pkg_a_mod/__init__.py": b"", "pkg_a_mod/removed.py": b"", "studio/a.py": b""})
+        other = wheels.write_wheel(self.share, "pkg_b", "1.0.0", files={"studio/b.py": b""})
+        script_loader_batch.install_many([(old, "pkg-a"), (other, "pkg-b")], self.scripts_folder,
+                                         install_dependencies=False)
+        new = wheels.write_wheel(self.share, "pkg_a", "1.1.0", files={"pkg_a_mod/__init__.py": b"", "studio/a.py": b""})
+        result = script_loader_batch.install_many([(new, "pkg-a")], self.scripts_folder, install_dependencies=False,
+                                                  background=False)
+        self.assertEqual(result.failed, [])
+        self.assertEqual(sorted(os.listdir(self.scripts_folder)),
+                         ["pkg_a-1.1.0.dist-info", "pkg_a_mod", "pkg_b-1.0.0.dist-info", "studio"])
+        self.assertEqual(os.listdir(self.scripts_folder + "/pkg_a_mod"), ["__init__.py"])
+        self.assertEqual(sorted(os.listdir(self.scripts_folder + "/studio")), ["a.py", "b.py"])
+
+    def test_failed_update_keeps_the_installed_version(self):
+        old = wheels.write_wheel(self.share, "pkg_a", "1.0.0")
+        script_loader_batch.install_many([(old, "pkg-a")], self.scripts_folder, install_dependencies=False)
+        broken = self.share + "/pkg_a-1.1.0-py2-none-any.whl"
+        with open(broken, "wb") as f:
+            f.write(b"not a zip file")
+        result = script_loader_batch.install_many([(broken, "pkg-a")], self.scripts_folder, install_dependencies=False,
+                                                  background=False)
+        self.assertEqual([name for name, error in result.failed], ["pkg-a"])
+        self.assertEqual(sorted(os.listdir(self.scripts_folder)), ["pkg_a-1.0.0.dist-info", "pkg_a_mod"])
+
+
+if __name__ == "__main__":
+    unittest.main()
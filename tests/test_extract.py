@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wheels
+import script_loader_pkg.script_loader_extract as script_loader_extract
+import script_loader_pkg.script_loader_wheel as script_loader_wheel
+
+
+class ExtractWheelTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp().replace("\\", "/")
+        self.scripts_folder = self.folder + "/scripts"
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_extract(self):
+        path = wheels.write_wheel(self.folder, "pkg_a", "1.0.0")
+        result = script_loader_extract.extract_wheel(path, self.scripts_folder)
+        self.assertEqual(result.installed, ["pkg_a-1.0.0.dist-info", "pkg_a_mod"])
+        self.assertEqual(sorted(os.listdir(self.scripts_folder)), ["pkg_a-1.0.0.dist-info", "pkg_a_mod"])
+
+    def test_unsafe_path_creates_nothing(self):
+        path = wheels.write_wheel(self.folder, "pkg_a", "1.0.0", files={
+            "pkg_a_mod/__init__.py": b"", "../../../escaped/evil.py": b"print('evil')\n"})
+        with self.assertRaises(script_loader_wheel.WheelIntegrityError):
+            script_loader_extract.extract_wheel(path, self.scripts_folder)
+        self.assertFalse(os.path.exists(self.folder + "/escaped"))
+        self.assertEqual(os.listdir(self.scripts_folder), [])
+
+    def test_file_missing_from_record(self):
+        path = wheels.write_wheel(self.folder, "pkg_a", "1.0.0", unlisted={"pkg_a_mod/extra.py": b"x = 1\n"})
+        with self.assertRaises(script_loader_wheel.WheelIntegrityError):
+            script_loader_extract.extract_wheel(path, self.scripts_folder)
+        self.assertEqual(os.listdir(self.scripts_folder), [])
+
+    def test_record_signature_is_allowed(self):
+        path = wheels.write_wheel(self.folder, "pkg_a", "1.0.0", unlisted={"pkg_a-1.0.0.dist-info/RECORD.jws": b"{}"})
+        result = script_loader_extract.extract_wheel(path, self.scripts_folder)
+        self.assertEqual(result.installed, ["pkg_a-1.0.0.dist-info", "pkg_a_mod"])
+
+    def test_shared_top_level_folder(self):
+        path_a = wheels.write_wheel(self.folder, "pkg_a", "1.0.0", files={
+            "studio/a/__init__.py": b"A = 1\n", "studio/shared.json": b"{}"})
+        path_b = wheels.write_wheel(self.folder, "pkg_b", "1.0.0", files={"studio/b/__init__.py": b"B = 1\n"})
+        script_loader_extract.extract_wheel(path_a, self.scripts_folder)
+        result = script_loader_extract.extract_wheel(path_b, self.scripts_folder)
+        self.assertEqual(result.installed, ["pkg_b-1.0.0.dist-info", "studio"])
+        path_a = wheels.write_wheel(self.folder, "pkg_a", "1.0.0", files={
+            "studio/a/__init__.py": b"A = 2\n", "studio/shared.json": b"{}"})
+        script_loader_extract.extract_wheel(path_a, self.scripts_folder)  # reinstall keeps pkg_b
+        self.assertEqual(sorted(os.listdir(self.scripts_folder + "/studio")), ["a", "b", "shared.json"])
+        self.assertEqual(os.listdir(self.scripts_folder + "/studio/b"), ["__init__.py"])
+        with open(self.scripts_folder + "/studio/a/__init__.py") as f:
+            self.assertEqual(f.read(), "A = 2\n")
+
+    def test_failed_merge_is_rolled_back(self):
+        path_a = wheels.write_wheel(self.folder, "pkg_a", "1.0.0", files={"studio/a/__init__.py": b"A = 1\n"})
+        path_b = wheels.write_wheel(self.folder, "pkg_b", "1.0.0", files={
+            "studio/a/__init__.py": b"A = 2\n", "studio/b/__init__.py": b"B = 1\n"})
+        script_loader_extract.extract_wheel(path_a, self.scripts_folder)
+        rename = os.rename
+
+        def failing_rename(source, target):
+            if target.endswith("studio/b"):
+                raise OSError("in use")
+            rename(source, target)
+        os.rename = failing_rename
+        try:
+            with self.assertRaises(OSError):
+                script_loader_extract.extract_wheel(path_b, self.scripts_folder)
+        finally:
+            os.rename = rename
+        self.assertEqual(sorted(os.listdir(self.scripts_folder + "/studio")), ["a"])
+        self.assertFalse(os.path.exists(self.scripts_folder + "/pkg_b-1.0.0.dist-info"))
+        with open(self.scripts_folder + "/studio/a/__init__.py") as f:
+            self.assertEqual(f.read(), "A = 1\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+import wheels  # noqa, puts the pkg folder on sys.path
+import script_loader_pkg.script_loader_install_dependencies as script_loader_install_dependencies
+
+
+class InstallDependenciesTest(unittest.TestCase):
+    def test_to_text(self):
+        self.assertEqual(script_loader_install_dependencies.to_text(b"C:/maya/bin/mayapy.exe"), u"C:/maya/bin/mayapy.exe")
+        self.assertEqual(script_loader_install_dependencies.to_text(u"pkg"), u"pkg")
+
+    def test_is_admin_without_windll(self):
+        ctypes = script_loader_install_dependencies.ctypes
+        script_loader_install_dependencies.ctypes = object()  # no windll, like off windows
+        try:
+            self.assertIs(script_loader_install_dependencies.is_admin(), False)
+        finally:
+            script_loader_install_dependencies.ctypes = ctypes
+
+    def test_pip_command_is_offline(self):
+        command = script_loader_install_dependencies.pip_command("/wheelhouse", ["pkg-a>=1.0"])
+        self.assertEqual(command[1:], ["-m", "pip", "install", "--no-index", "--find-links", "/wheelhouse", "pkg-a>=1.0"])
+
+    def test_exit_code_is_pips(self):
+        script = os.path.splitext(script_loader_install_dependencies.__file__)[0] + ".py"
+        wheelhouse = tempfile.mkdtemp()
+        try:
+            with open(os.devnull, "w") as devnull:
+                exit_code = subprocess.call([sys.executable, script, wheelhouse, "script-loader-not-in-the-wheelhouse"],
+                                            stdout=devnull, stderr=subprocess.STDOUT)
+        finally:
+            shutil.rmtree(wheelhouse)
+        self.assertNotEqual(exit_code, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import collections
+import unittest
+import wheels  # noqa, puts the pkg folder on sys.path
+try:
+    from PySide2 import QtCore
+    import script_loader_pkg.script_loader_model as script_loader_model
+except ImportError:  # the model needs Qt
+    script_loader_model = None
+
+CATEGORIES = ["Environment", "Animation", "Rigging", "Modeling", "FX", "Lighting"]
+Entry = collections.namedtuple("Entry", "path name version installed installed_version outdated duplicate preferred")
+
+
+@unittest.skipIf(script_loader_model is None, "PySide2 is not installed")
+class CatalogModelTest(unittest.TestCase):
+    def setUp(self):
+        self.app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+        self.model = script_loader_model.CatalogModel()
+
+    def category_names(self):
+        return [self.model.index(row, 0).data() for row in range(self.model.rowCount())]
+
+    def test_categories_keep_database_order(self):
+        self.model.set_categories(CATEGORIES + ["Animation"])
+        self.assertEqual(self.category_names(), CATEGORIES)
+
+    def test_reordered_categories_are_moved(self):
+        self.model.set_categories(CATEGORIES)
+        rigging = QtCore.QPersistentModelIndex(self.model.index(2, 0))
+        resets = []
+        self.model.modelReset.connect(lambda: resets.append(True))
+        order = ["Lighting", "Rigging", "Props", "Environment", "Animation", "FX"]
+        self.model.set_categories(order)
+        self.assertEqual(self.category_names(), order)
+        self.assertEqual((rigging.row(), resets), (1, []))
+
+    def test_new_entries_are_inserted_in_one_run(self):
+        self.model.set_categories(["Animation"])
+        inserted = []
+        parent = self.model.index(0, 0)
+        self.model.rowsInserted.connect(lambda index, first, last: inserted.append((first, last)))
+        entries = [Entry("/whls/pkg_%02d.whl" % i, "pkg_%02d" % i, "1.0", False, None, False, None, True)
+                   for i in range(10)]
+        self.model.set_category_entries("Animation", entries[:3] + entries[7:])
+        self.model.set_category_entries("Animation", entries)
+        self.assertEqual(inserted, [(0, 5), (3, 6)])
+        self.assertEqual([self.model.index(row, 0, parent).data(script_loader_model.ENTRY_ROLE).path
+                          for row in range(self.model.rowCount(parent))], [entry.path for entry in entries])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import wheels
+import script_loader_pkg.script_loader_publish as script_loader_publish
+
+
+class PublishTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp().replace("\\", "/")
+        self.database_path = self.folder + "/scripts.db"
+        self.whls = {}
+        con = sqlite3.connect(self.database_path)
+        con.execute('CREATE TABLE scripts ("Id" INT, "Name" TEXT, "Path" TEXT, "Category" TEXT, "Usercount" INT)')
+        for project_id, category in enumerate(["animation", "rigging"]):
+            os.makedirs(self.folder + "/" + category)
+            self.whls[category] = wheels.write_wheel(self.folder + "/" + category, "pkg_" + category, "1.0.0")
+            con.execute("INSERT INTO scripts VALUES (?, ?, ?, ?, 0)",
+                        (project_id + 1, category, self.folder + "/" + category, category))
+        con.commit()
+        con.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def catalog(self):
+        con = sqlite3.connect(self.database_path)
+        try:
+            return sorted(row[0] for row in con.execute("SELECT path FROM catalog"))
+        finally:
+            con.close()
+
+    def test_offline_folder_keeps_its_rows(self):
+        self.assertEqual(script_loader_publish.publish(self.database_path), (2, 2, 0, [], []))
+        os.rename(self.folder + "/rigging", self.folder + "/rigging_offline")
+        os.remove(self.whls["animation"])
+        indexed, read, removed, unavailable, skipped = script_loader_publish.publish(self.database_path)
+        self.assertEqual((removed, unavailable), (1, [self.folder + "/rigging"]))
+        self.assertEqual(self.catalog(), [self.whls["rigging"]])
+
+    def test_removed_whl(self):
+        script_loader_publish.publish(self.database_path)
+        os.remove(self.whls["rigging"])
+        self.assertEqual(script_loader_publish.publish(self.database_path), (1, 0, 1, [], []))
+        self.assertEqual(self.catalog(), [self.whls["animation"]])
+
+    def test_broken_whl_is_left_out(self):
+        broken = self.folder + "/animation/broken-1.0.0-py2-none-any.whl"
+        with open(broken, "wb") as f:
+            f.write(b"not a zip file")
+        indexed, read, removed, unavailable, skipped = script_loader_publish.publish(self.database_path)
+        self.assertEqual((indexed, read, skipped), (2, 2, [broken]))
+        self.assertEqual(self.catalog(), sorted(self.whls.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
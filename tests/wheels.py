@@ -0,0 +1,55 @@
+'''
+Small whls written on the fly for the tests.
+'''
+
+import os
+import sys
+import base64
+import hashlib
+import zipfile
+
+PKG_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pkg")
+if PKG_FOLDER not in sys.path:
+    sys.path.insert(0, PKG_FOLDER)
+
+
+def record_hash(data):
+    """
+    Args:
+        data: file contents
+    Returns: RECORD hash of the data
+    """
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode("ascii")
+    return "sha256=" + digest
+
+
+def write_wheel(folder, name, version, files=None, unlisted=None):
+    """
+    Write a whl with a package folder, METADATA, top_level.txt, WHEEL and RECORD
+    Args:
+        folder: folder to write the whl to
+        name: distribution name, with underscores
+        version: version
+        files: dict of member name: bytes, defaults to <name>_mod/__init__.py
+        unlisted: dict of member name: bytes that are added without a RECORD row
+    Returns: path to the whl
+    """
+    dist_info = "%s-%s.dist-info" % (name, version)
+    members = dict(files or {name + "_mod/__init__.py": ("VERSION = '%s'\n" % version).encode("utf-8")})
+    members[dist_info + "/METADATA"] = ("Metadata-Version: 2.1\nName: %s\nVersion: %s\n\n" %
+                                        (name.replace("_", "-"), version)).encode("utf-8")
+    members[dist_info + "/top_level.txt"] = (name + "_mod\n").encode("utf-8")
+    members[dist_info + "/WHEEL"] = b"Wheel-Version: 1.0\nGenerator: tests\nRoot-Is-Purelib: true\nTag: py2-none-any\n"
+    record = ["%s,%s,%d" % (member, record_hash(data), len(data)) for member, data in sorted(members.items())]
+    record.append(dist_info + "/RECORD,,")
+    path = "%s/%s-%s-py2-none-any.whl" % (folder, name, version)
+    archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+    try:
+        for member, data in sorted(members.items()):
+            archive.writestr(member, data)
+        for member, data in sorted((unlisted or {}).items()):
+            archive.writestr(member, data)
+        archive.writestr(dist_info + "/RECORD", ("\n".join(record) + "\n").encode("utf-8"))
+    finally:
+        archive.close()
+    return path